@@ -2,63 +2,83 @@
 Chat Routes - Controller Layer
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from typing import Optional
 from app.schemas.chat import (
     ChatRequest, 
     ChatResponse, 
+    ChatBatchRequest,
+    ChatBatchResponse,
     SimilarityRequest, 
     SimilarityResponse,
     FAQResponse
 )
 from app.services.chat_service import chat_service
 from app.services.embedding_service import embedding_service
-from app.services.knowledge_base import knowledge_base
+from app.services.inference_executor import InferenceOverloadedError
+from app.services.knowledge_base import TenantNotFoundError
+from app.core.metrics import STAGE_LATENCY
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 
 @router.post("/", response_model=ChatResponse, status_code=status.HTTP_200_OK)
-async def send_message(request: ChatRequest):
+async def send_message(request: ChatRequest, http_request: Request):
     """
     Endpoint untuk mengirim pesan ke chatbot.
     Menggunakan semantic similarity dengan model all-MiniLM-L6-v2.
     
     Args:
         request: ChatRequest dengan message, user_id, dan session_id
+        http_request: Raw request (waktu mulai request untuk metric validation)
         
     Returns:
         ChatResponse: Response dari chatbot dengan confidence score
     """
+    # Body parsing + validasi pydantic terjadi sebelum handler dipanggil
+    request_started = getattr(http_request.state, "request_started", None)
+    if request_started is not None:
+        STAGE_LATENCY.observe(time.perf_counter() - request_started, stage="validation")
+    
     try:
         logger.info(f"Received chat request from user: {request.user_id}")
         
-        # Panggil service untuk memproses message (business logic)
+        # Panggil service untuk memproses message (business logic).
+        # Turn dicatat ke history session oleh service (dengan embedding pesan).
         result = await chat_service.process_message(
             message=request.message,
             user_id=request.user_id,
-            session_id=request.session_id
+            session_id=request.session_id,
+            tenant_id=request.tenant_id
         )
         
-        # Optional: Simpan chat ke database
-        if request.user_id:
-            await chat_service.save_chat(
-                user_id=request.user_id,
-                message=request.message,
+        # Serialize langsung (response sudah tervalidasi sebagai ChatResponse)
+        with STAGE_LATENCY.time(stage="serialization"):
+            body = ChatResponse(
                 response=result["response"],
-                session_id=request.session_id
-            )
-        
-        return ChatResponse(
-            response=result["response"],
-            status="success",
-            matched_question=result.get("matched_question"),
-            method=result.get("method"),
-            confidence=result.get("confidence"),
-            suggestions=result.get("suggestions")
+                status="success",
+                matched_question=result.get("matched_question"),
+                method=result.get("method"),
+                confidence=result.get("confidence"),
+                suggestions=result.get("suggestions")
+            ).model_dump_json()
+        return Response(content=body, media_type="application/json")
+    
+    except TenantNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except InferenceOverloadedError as e:
+        logger.warning(f"Chat request rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server sedang sibuk, silakan coba lagi",
+            headers={"Retry-After": "1"}
         )
-        
     except Exception as e:
         logger.error(f"Error processing chat: {str(e)}")
         raise HTTPException(
@@ -67,13 +87,86 @@ async def send_message(request: ChatRequest):
         )
 
 
+@router.post("/batch", response_model=ChatBatchResponse, status_code=status.HTTP_200_OK)
+async def send_batch(request: ChatBatchRequest):
+    """
+    Endpoint untuk mengirim banyak pesan sekaligus (bulk question answering).
+    Semua pesan di-encode dalam satu batch; error satu item tidak
+    menggagalkan item lain. Jika server overload seluruh batch dijawab 503.
+    
+    Args:
+        request: ChatBatchRequest dengan list of ChatRequest
+        
+    Returns:
+        ChatBatchResponse: Response per item, urutan sama dengan request
+    """
+    try:
+        logger.info(f"Received batch chat request with {len(request.items)} items")
+        
+        results = await chat_service.process_batch(
+            [item.message for item in request.items],
+            [item.tenant_id for item in request.items]
+        )
+        
+        responses = []
+        failed = 0
+        for item, result in zip(request.items, results):
+            if isinstance(result, Exception):
+                failed += 1
+                responses.append(ChatResponse(
+                    response=f"Terjadi kesalahan saat memproses pesan: {str(result)}",
+                    status="error"
+                ))
+                continue
+            
+            if item.user_id or item.session_id:
+                await chat_service.save_chat(
+                    user_id=item.user_id,
+                    message=item.message,
+                    response=result["response"],
+                    session_id=item.session_id,
+                    tenant_id=item.tenant_id,
+                    result=result
+                )
+            
+            responses.append(ChatResponse(
+                response=result["response"],
+                status="success",
+                matched_question=result.get("matched_question"),
+                method=result.get("method"),
+                confidence=result.get("confidence"),
+                suggestions=result.get("suggestions")
+            ))
+        
+        return ChatBatchResponse(
+            results=responses,
+            total=len(responses),
+            failed=failed
+        )
+    
+    except InferenceOverloadedError as e:
+        logger.warning(f"Batch chat request rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server sedang sibuk, silakan coba lagi",
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        logger.error(f"Error processing batch chat: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan saat memproses batch: {str(e)}"
+        )
+
+
 @router.get("/history/{user_id}", response_model=list)
-async def get_chat_history(user_id: str, limit: int = 10):
+async def get_chat_history(user_id: str, limit: int = 10, tenant_id: Optional[str] = None):
     """
-    Endpoint untuk mendapatkan riwayat chat user
+    Endpoint untuk mendapatkan riwayat chat user di satu tenant
     
     Args:
         user_id: ID user
+        tenant_id: ID tenant (opsional, default tenant default)
         limit: Jumlah maksimal history yang diambil (default: 10)
         
     Returns:
@@ -84,11 +177,12 @@ async def get_chat_history(user_id: str, limit: int = 10):
         
         history = await chat_service.get_chat_history(
             user_id=user_id,
+            tenant_id=tenant_id,
             limit=limit
         )
         
         return history
-        
+    
     except Exception as e:
         logger.error(f"Error getting chat history: {str(e)}")
         raise HTTPException(
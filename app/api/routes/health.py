@@ -2,9 +2,21 @@
 Health Check Routes
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.schemas.chat import HealthResponse
 from app.core.config import settings
+from app.core.lifecycle import lifecycle
+from app.core.memory import process_memory
+from app.core.metrics import CallbackMetric, registry
+from app.services.chat_service import chat_service
+from app.services.embedding_batcher import embedding_batcher
+from app.services.embedding_service import embedding_service
+from app.services.faq_ingest import ingest_manager
+from app.services.inference_executor import InferenceOverloadedError, inference_executor
+from app.services.intent_router import aggregate_stats as intent_stats
+from app.services.knowledge_base import knowledge_base, knowledge_bases
+from app.services.warmup import is_ready
 
 router = APIRouter(tags=["Health"])
 
@@ -21,9 +33,142 @@ async def root():
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Endpoint untuk health check"""
+    """Endpoint untuk health check (liveness, tidak menunggu model)"""
     return HealthResponse(
         status="healthy",
         version=settings.APP_VERSION
     )
 
+
+@router.get("/ready", response_model=dict)
+async def readiness_check():
+    """
+    Endpoint readiness: 200 jika model dan index FAQ sudah siap, 503 jika belum.
+    Termasuk breakdown waktu startup (import, model_load, kb_index).
+    """
+    ready = is_ready()
+    body = {
+        "status": "ready" if ready else "starting",
+        "model_loaded": embedding_service.is_loaded,
+        "knowledge_base_ready": knowledge_base.is_ready,
+        **lifecycle.status()
+    }
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=body
+    )
+
+
+
+@router.get("/stats", response_model=dict)
+async def get_stats(recall_sample: int = 0):
+    """
+    Endpoint untuk statistik runtime (cache hit rate, dll)
+    
+    Args:
+        recall_sample: Jika > 0, hitung recall@10 vector index terhadap exact
+            float32 search dengan sejumlah FAQ embedding sebagai query uji
+    """
+    # Statistik index (terutama recall) dihitung di inference executor, bukan
+    # di event loop; selama warmup index belum di-build dan tidak di-build di sini
+    if is_ready():
+        try:
+            vector_index = await inference_executor.run(
+                knowledge_base.index_stats, recall_sample=recall_sample
+            )
+        except InferenceOverloadedError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server sedang sibuk, silakan coba lagi",
+                headers={"Retry-After": "1"}
+            )
+    else:
+        vector_index = knowledge_base.index_stats()
+    
+    return {
+        "query_embedding_cache": embedding_service.query_cache.stats(),
+        "candidate_embedding_cache": {
+            **embedding_service.candidate_cache.stats(),
+            "encodes_saved": embedding_service.candidate_encodes_saved
+        },
+        "response_cache": chat_service.response_cache.stats(),
+        "chat_history": {
+            **chat_service.history.stats(),
+            "persistence": chat_service.history_writer.stats()
+        },
+        "knowledge_base": knowledge_base.stats(),
+        "tenants": knowledge_bases.stats(),
+        "ingest": ingest_manager.stats(),
+        "vector_index": vector_index,
+        "intent_router": intent_stats(kb.intent_router for kb in knowledge_bases.loaded()),
+        "query_batching": embedding_batcher.stats(),
+        "inference_executor": inference_executor.stats(),
+        "process_memory": process_memory()
+    }
+
+
+def _cache_stats() -> dict:
+    return {
+        "query_embedding": embedding_service.query_cache.stats(),
+        "candidate_embedding": embedding_service.candidate_cache.stats(),
+        "response": chat_service.response_cache.stats(),
+    }
+
+
+registry.register(CallbackMetric(
+    "chatbot_cache_hits_total",
+    "Cache hits",
+    lambda: {(name,): stats["hits"] for name, stats in _cache_stats().items()},
+    ["cache"],
+    kind="counter"
+))
+registry.register(CallbackMetric(
+    "chatbot_cache_misses_total",
+    "Cache misses",
+    lambda: {(name,): stats["misses"] for name, stats in _cache_stats().items()},
+    ["cache"],
+    kind="counter"
+))
+registry.register(CallbackMetric(
+    "chatbot_cache_hit_ratio",
+    "Cache hit ratio since startup",
+    lambda: {(name,): stats["hit_rate"] for name, stats in _cache_stats().items()},
+    ["cache"]
+))
+registry.register(CallbackMetric(
+    "chatbot_intent_hits_total",
+    "Intent fast-path hits per loaded tenant (including response cache hits)",
+    lambda: {
+        (kb.tenant_id or settings.DEFAULT_TENANT_ID, name): hits
+        for kb in knowledge_bases.loaded()
+        for name, hits in kb.intent_router.hits.items()
+    },
+    ["tenant", "intent"],
+    kind="counter"
+))
+registry.register(CallbackMetric(
+    "chatbot_inference_in_flight",
+    "Inference jobs running or queued in the inference executor",
+    lambda: {(): inference_executor.stats()["in_flight"]}
+))
+registry.register(CallbackMetric(
+    "chatbot_tenant_kb_memory_bytes",
+    "Estimated embedding + index memory per loaded tenant knowledge base",
+    lambda: {(kb.tenant_id or settings.DEFAULT_TENANT_ID,): kb.memory_bytes() for kb in knowledge_bases.loaded()},
+    ["tenant"]
+))
+registry.register(CallbackMetric(
+    "chatbot_tenant_kb_evictions_total",
+    "Tenant knowledge bases evicted by the memory budget",
+    lambda: {(): knowledge_bases.evictions},
+    kind="counter"
+))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Endpoint metrics format Prometheus text"""
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,104 @@
+"""
+Knowledge Base Routes - Bulk ingestion FAQ (CSV / JSONL)
+"""
+
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, status
+from app.core.config import settings
+from app.services.faq_ingest import FORMATS, IngestError, UploadTooLargeError, ingest_manager, validate_job_id
+from app.services.knowledge_base import TenantNotFoundError, knowledge_bases
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/knowledge-base", tags=["Knowledge Base"])
+
+# Content-Type body -> format ingest
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/x-jsonlines": "jsonl",
+}
+
+
+@router.post("/import", status_code=status.HTTP_202_ACCEPTED)
+async def import_faqs(
+    request: Request,
+    format: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+    job_id: Optional[str] = None
+):
+    """
+    Bulk import FAQ. Body berupa CSV (kolom question, answer) atau JSONL
+    ({"question", "answer"} per baris), di-stream ke disk lalu diproses di
+    background: dedupe, encode per batch, commit sebagai satu snapshot.
+    Upload ulang file yang sama melanjutkan checkpoint job yang gagal.
+    
+    Args:
+        format: "csv" atau "jsonl" (default: dari Content-Type)
+        tenant_id: ID tenant (opsional, default tenant default)
+        job_id: ID job (opsional, default: dari isi file dan tenant)
+        
+    Returns:
+        Status job (poll GET /knowledge-base/import/{job_id})
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = format or CONTENT_TYPES.get(content_type)
+    if fmt not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Gunakan Content-Type text/csv atau application/x-ndjson, atau parameter format=csv|jsonl"
+        )
+    
+    try:
+        kb = await knowledge_bases.get_async(tenant_id)
+        validate_job_id(job_id)
+        path, fingerprint = await ingest_manager.save_upload(
+            request.stream(), fmt, int(settings.INGEST_MAX_UPLOAD_MB * 1024 * 1024)
+        )
+        job = ingest_manager.submit(kb, path, fmt, fingerprint, job_id)
+        logger.info(f"Queued FAQ import job {job.job_id} ({fmt})")
+        return job.to_dict()
+    
+    except TenantNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except IngestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error importing FAQs: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan saat import FAQ: {str(e)}"
+        )
+
+
+@router.get("/import/{job_id}")
+async def get_import_status(job_id: str):
+    """
+    Status dan progress job import (rows, duplicates, encoded, throughput)
+    
+    Args:
+        job_id: ID job dari POST /knowledge-base/import
+        
+    Returns:
+        Status job
+    """
+    job = ingest_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job import tidak ditemukan: {job_id}"
+        )
+    return job.to_dict()
@@ -2,10 +2,21 @@
 Similarity Routes - Endpoints untuk semantic similarity
 """
 
-from fastapi import APIRouter, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, status
 from app.schemas.chat import SimilarityRequest, SimilarityResponse, FAQResponse
+from app.services.embedding_batcher import embedding_batcher
 from app.services.embedding_service import embedding_service
-from app.services.knowledge_base import knowledge_base
+from app.services.inference_executor import InferenceOverloadedError, inference_executor
+from app.core.config import settings
+from app.services.knowledge_base import TenantNotFoundError, knowledge_bases
+from app.services.stream_search import (
+    NDJSONError,
+    NDJSONLineTooLongError,
+    iter_ndjson_texts,
+    stream_similarity_search
+)
+from app.services.warmup import ensure_knowledge_base_ready
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,7 +39,8 @@ async def similarity_search(request: SimilarityRequest):
         logger.info(f"Similarity search for: {request.query[:50]}...")
         
         # Find most similar texts
-        results = embedding_service.find_most_similar(
+        results, stats = await inference_executor.run(
+            embedding_service.find_most_similar_with_stats,
             query=request.query,
             candidates=request.candidates,
             top_k=request.top_k
@@ -46,9 +58,17 @@ async def similarity_search(request: SimilarityRequest):
         
         return SimilarityResponse(
             results=formatted_results,
-            status="success"
+            status="success",
+            stats=stats
+        )
+    
+    except InferenceOverloadedError as e:
+        logger.warning(f"Similarity search rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server sedang sibuk, silakan coba lagi",
+            headers={"Retry-After": "1"}
         )
-        
     except Exception as e:
         logger.error(f"Error in similarity search: {str(e)}")
         raise HTTPException(
@@ -57,22 +77,120 @@ async def similarity_search(request: SimilarityRequest):
         )
 
 
+@router.post("/search/stream", response_model=SimilarityResponse)
+async def similarity_search_stream(
+    request: Request,
+    query: str,
+    top_k: int = 3,
+    chunk_size: int = 0
+):
+    """
+    Similarity search untuk candidate list sangat besar.
+    Body berupa NDJSON (satu candidate per baris: "teks" atau {"text": "teks"}),
+    di-encode per chunk sehingga memory tetap O(chunk + top_k).
+    
+    Args:
+        query: Query text
+        top_k: Number of top results (1-100)
+        chunk_size: Jumlah candidate per encode (0 = SIMILARITY_STREAM_CHUNK_SIZE,
+            maks SIMILARITY_STREAM_MAX_CHUNK_SIZE)
+            
+    Returns:
+        SimilarityResponse: List of similar texts dengan score
+    """
+    if not query or not 1 <= top_k <= 100:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="query wajib diisi dan top_k harus 1-100"
+        )
+    if not 0 <= chunk_size <= settings.SIMILARITY_STREAM_MAX_CHUNK_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"chunk_size harus 0-{settings.SIMILARITY_STREAM_MAX_CHUNK_SIZE}"
+        )
+    
+    try:
+        logger.info(f"Streaming similarity search for: {query[:50]}...")
+        
+        query_embedding = embedding_service.normalize(await embedding_batcher.encode(query))
+        top = await stream_similarity_search(
+            query_embedding=query_embedding,
+            texts=iter_ndjson_texts(request.stream(), settings.SIMILARITY_STREAM_MAX_LINE_BYTES),
+            service=embedding_service,
+            executor=inference_executor,
+            top_k=top_k,
+            chunk_size=chunk_size or settings.SIMILARITY_STREAM_CHUNK_SIZE
+        )
+        
+        formatted_results = [
+            {
+                "text": text,
+                "similarity": float(similarity),
+                "index": idx
+            }
+            for idx, text, similarity in top.results()
+        ]
+        
+        return SimilarityResponse(
+            results=formatted_results,
+            status="success",
+            stats={
+                "total": top.processed,
+                "cached": top.cached,
+                "encoded": top.processed - top.cached
+            }
+        )
+    
+    except NDJSONLineTooLongError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except NDJSONError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except InferenceOverloadedError as e:
+        logger.warning(f"Streaming similarity search rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server sedang sibuk, silakan coba lagi",
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        logger.error(f"Error in streaming similarity search: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan saat mencari similarity: {str(e)}"
+        )
+
+
 @router.get("/faqs", response_model=FAQResponse)
-async def get_all_faqs():
+async def get_all_faqs(tenant_id: Optional[str] = None):
     """
     Endpoint untuk mendapatkan semua FAQ dari knowledge base
     
+    Args:
+        tenant_id: ID tenant (opsional, default tenant default)
+        
     Returns:
         FAQResponse: List of all FAQs
     """
     try:
-        faqs = knowledge_base.get_all_faqs()
+        kb = await knowledge_bases.get_async(tenant_id)
+        faqs = kb.get_all_faqs()
         
         return FAQResponse(
             faqs=faqs,
             total=len(faqs)
         )
-        
+    
+    except TenantNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error getting FAQs: {str(e)}")
         raise HTTPException(
@@ -82,13 +200,14 @@ async def get_all_faqs():
 
 
 @router.get("/faqs/search")
-async def search_faqs(query: str, top_k: int = 3):
+async def search_faqs(query: str, top_k: int = 3, tenant_id: Optional[str] = None):
     """
     Endpoint untuk mencari FAQ yang paling relevan dengan query
     
     Args:
         query: Query text
         top_k: Number of top results (default: 3)
+        tenant_id: ID tenant (opsional, default tenant default)
         
     Returns:
         List of relevant FAQs dengan similarity score
@@ -96,26 +215,28 @@ async def search_faqs(query: str, top_k: int = 3):
     try:
         logger.info(f"Searching FAQs for: {query[:50]}...")
         
-        # Get all questions
-        questions = knowledge_base.get_all_questions()
-        
-        if not questions:
+        kb = await knowledge_bases.get_async(tenant_id)
+        if not kb.faqs:
             return {
                 "results": [],
                 "message": "Knowledge base kosong"
             }
         
-        # Find most similar questions
-        results = embedding_service.find_most_similar(
-            query=query,
-            candidates=questions,
-            top_k=min(top_k, len(questions))
+        # Find most similar questions (memakai embedding matrix yang sudah di-cache)
+        await ensure_knowledge_base_ready(kb)
+        query_embedding = await embedding_batcher.encode(query)
+        snapshot = kb.get_snapshot()
+        results = kb.search_by_embedding(
+            query_embedding=query_embedding,
+            top_k=min(top_k, len(snapshot.faqs)),
+            query_text=query,
+            snapshot=snapshot
         )
         
         # Format results with full FAQ
         formatted_results = []
         for idx, question, similarity in results:
-            faq = knowledge_base.get_faq(idx)
+            faq = snapshot.get_faq(idx)
             if faq:
                 formatted_results.append({
                     "question": faq["question"],
@@ -127,7 +248,19 @@ async def search_faqs(query: str, top_k: int = 3):
             "results": formatted_results,
             "total": len(formatted_results)
         }
-        
+    
+    except TenantNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except InferenceOverloadedError as e:
+        logger.warning(f"FAQ search rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server sedang sibuk, silakan coba lagi",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Error searching FAQs: {str(e)}")
         raise HTTPException(
@@ -147,6 +280,7 @@ async def get_model_info():
     return {
         "model_name": embedding_service.model_name,
         "model_type": "sentence-transformers",
+        "backend": embedding_service.backend,
         "description": "all-MiniLM-L6-v2 adalah model untuk sentence embeddings dan semantic similarity",
         "embedding_dimension": 384,
         "max_sequence_length": 256
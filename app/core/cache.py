@@ -0,0 +1,307 @@
+"""
+Cache - Thread-safe LRU cache dengan TTL dan hit/miss metrics
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """
+    Interface cache backend (get/set/clear/stats).
+    Implementasi shared (misal Redis) cukup meng-implement method yang sama.
+    """
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        raise NotImplementedError
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        raise NotImplementedError
+    
+    def clear(self) -> None:
+        raise NotImplementedError
+    
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """
+    Bounded LRU cache dengan optional TTL (detik), optional byte budget
+    (max_bytes + sizeof) dan counters
+    """
+    
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float = 0,
+        max_bytes: int = 0,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        """
+        Inisialisasi LRUCache
+        
+        Args:
+            max_size: Jumlah maksimal entry (0 = cache disabled)
+            ttl: Time-to-live entry dalam detik (0 = tanpa expiry)
+            max_bytes: Total ukuran maksimal value dalam bytes (0 = tanpa batas)
+            sizeof: Function untuk menghitung ukuran value (wajib jika max_bytes > 0)
+        """
+        if max_bytes > 0 and sizeof is None:
+            raise ValueError("sizeof wajib diisi jika max_bytes > 0")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Ambil value dari cache (None jika tidak ada atau expired)
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached value atau None
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires_at, size = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                self.bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Simpan value ke cache, evict entry paling lama jika penuh
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        if self.max_size <= 0:
+            return
+        
+        size = self.sizeof(value) if self.sizeof else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else 0
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self._data) > self.max_size or (
+                self.max_bytes and self.bytes > self.max_bytes
+            ):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Hapus semua entry (counters tidak di-reset)"""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get statistik cache
+        
+        Returns:
+            Dict dengan size, hits, misses, evictions, expirations, hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class FileCacheBackend(CacheBackend):
+    """
+    File-backed cache (satu JSON file per key) yang bisa di-share antar
+    worker di host yang sama. Value harus JSON-serializable.
+    """
+    
+    def __init__(self, directory: str, max_size: int = 10000, ttl: float = 0):
+        """
+        Inisialisasi FileCacheBackend
+        
+        Args:
+            directory: Directory untuk menyimpan cache files
+            max_size: Jumlah maksimal file, file paling lama dihapus saat penuh
+            ttl: Time-to-live entry dalam detik (0 = tanpa expiry)
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key: Hashable) -> str:
+        digest = hashlib.sha1(str(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        
+        if entry["key"] != str(key):
+            self.misses += 1
+            return None
+        
+        if entry["expires_at"] and entry["expires_at"] < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.expirations += 1
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return entry["value"]
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        
+        entry = {
+            "key": str(key),
+            "expires_at": time.time() + self.ttl if self.ttl > 0 else 0,
+            "value": value,
+        }
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError) as e:
+            logger.warning(f"Failed to write cache entry: {e}")
+            return
+        
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._prune()
+    
+    def _prune(self) -> None:
+        """Hapus file paling lama jika jumlah file melebihi max_size"""
+        try:
+            entries = [
+                entry for entry in os.scandir(self.directory)
+                if entry.name.endswith(".json")
+            ]
+        except OSError:
+            return
+        
+        excess = len(entries) - self.max_size
+        if excess <= 0:
+            return
+        
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:excess]:
+            try:
+                os.remove(entry.path)
+                self.evictions += 1
+            except OSError:
+                pass
+    
+    def clear(self) -> None:
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "file",
+            "directory": self.directory,
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_cache_backend(
+    backend: str,
+    max_size: int,
+    ttl: float = 0,
+    directory: Optional[str] = None
+) -> CacheBackend:
+    """
+    Factory cache backend berdasarkan nama
+    
+    Args:
+        backend: "memory" atau "file"
+        max_size: Jumlah maksimal entry
+        ttl: Time-to-live dalam detik
+        directory: Directory untuk file backend
+        
+    Returns:
+        CacheBackend instance
+    """
+    if backend == "memory":
+        return LRUCache(max_size=max_size, ttl=ttl)
+    if backend == "file":
+        if not directory:
+            raise ValueError("File cache backend membutuhkan directory")
+        return FileCacheBackend(directory, max_size=max_size, ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
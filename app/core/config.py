@@ -28,6 +28,113 @@ class Settings(BaseSettings):
     # API Keys (untuk future use)
     API_KEY: Optional[str] = None
     
+    # Embedding Backend ("torch", "onnx", atau "onnx-int8")
+    # onnx/onnx-int8 membutuhkan: pip install "sentence-transformers[onnx]"
+    EMBEDDING_BACKEND: str = "torch"
+    ONNX_INT8_FILE: str = "onnx/model_quint8_avx2.onnx"
+    
+    # Encode batching (length-bucketed, adaptive batch size)
+    MAX_SEQ_LENGTH: int = 256  # Input lebih panjang di-truncate
+    ENCODE_TOKEN_BUDGET: int = 8192  # batch_size x padded length per forward pass
+    ENCODE_MAX_BATCH_SIZE: int = 128
+    
+    # Model Lifecycle (load model + build index di background saat startup)
+    WARMUP_ON_STARTUP: bool = True
+    
+    # Embedding Store (cache embedding FAQ di disk, di-share antar worker via mmap)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: str = ".cache/embeddings"
+    
+    # Vector Index ("flat" = exact, "ivf" = approximate untuk KB besar)
+    VECTOR_INDEX: str = "flat"
+    IVF_NLIST: int = 0  # Jumlah cluster, 0 = otomatis (~4 * sqrt(N))
+    IVF_NPROBE: int = 8  # Cluster yang di-scan per query (recall vs latency)
+    IVF_MIN_TRAIN_SIZE: int = 1000  # Di bawah ini IVF memakai exact search
+    
+    # Kompresi embedding untuk flat index ("float32", "float16", "int8", "pq")
+    EMBEDDING_STORAGE: str = "float32"
+    PQ_SUBVECTORS: int = 48  # Dimensi embedding harus habis dibagi (384 / 48 = 8)
+    QUANTIZED_RERANK_FACTOR: int = 4  # top_k x factor kandidat di-rescore float32 (0 = off)
+    
+    # Knowledge base storage
+    KB_BACKEND: str = "memory"  # "memory", "json" (.json/.jsonl) atau "sqlite"
+    KB_PATH: str = "data/faqs.json"
+    KB_RELOAD_INTERVAL: float = 5.0  # Detik antar polling versi store (0 = disabled)
+    
+    # Multi-tenant knowledge base (tenant_id di request, kosong = tenant default di KB_PATH)
+    DEFAULT_TENANT_ID: str = "default"
+    TENANT_KB_BACKEND: str = "json"  # Store per tenant: "json" atau "sqlite"
+    TENANT_KB_DIR: str = "data/tenants"  # <dir>/<tenant_id>.json(l) atau <dir>/<tenant_id>.db
+    TENANT_MEMORY_BUDGET_MB: float = 512  # Embedding + index tenant yang ter-load (LRU eviction)
+    
+    # Bulk FAQ ingestion (CSV/JSONL, CLI dan POST /knowledge-base/import)
+    INGEST_BATCH_SIZE: int = 1024  # Pertanyaan per panggilan encode (per checkpoint)
+    INGEST_DIR: str = "data/ingest"  # Checkpoint dan upload per job
+    INGEST_MAX_UPLOAD_MB: float = 200
+    
+    # Intent fast-path router (greeting/thanks/contact tanpa model)
+    INTENT_ROUTER_ENABLED: bool = True
+    INTENTS_FILE: str = ""  # JSON intent tables, kosong = default tables
+    
+    # Hybrid lexical (BM25) + semantic retrieval
+    # "off" = dense saja, "prefilter" = dense scoring atas kandidat BM25, "rrf" = rank fusion
+    # prefilter menukar akurasi dengan kecepatan: FAQ terbaik yang tidak masuk kandidat
+    # BM25 (misal parafrase) tidak pernah ditemukan. Top-1 agreement terhadap dense scan
+    # penuh terukur 0.48-0.60 pada 100k FAQ sintetis (python -m benchmarks.lexical).
+    HYBRID_MODE: str = "off"
+    LEXICAL_PREFILTER_K: int = 500  # Jumlah kandidat BM25 untuk prefilter
+    LEXICAL_PREFILTER_MIN_SIZE: int = 5000  # Prefilter hanya untuk KB sebesar ini
+    LEXICAL_PREFILTER_MIN_SCORE: float = 1.0  # Skor BM25 terbaik di bawah ini = full dense scan
+    RRF_DEPTH: int = 50  # Kedalaman ranking yang di-fuse
+    RRF_K: int = 60
+    
+    # Query Embedding Cache
+    QUERY_CACHE_SIZE: int = 4096  # 0 = disabled
+    QUERY_CACHE_TTL: float = 3600.0  # detik, 0 = tanpa expiry
+    
+    # Candidate Embedding Cache untuk /similarity/search (content-addressed)
+    CANDIDATE_CACHE_MAX_ITEMS: int = 200000  # 0 = disabled
+    CANDIDATE_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+    
+    # Response Cache untuk /chat/ (backend: "memory" atau "file")
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_SIZE: int = 2048  # 0 = disabled
+    RESPONSE_CACHE_TTL: float = 600.0
+    RESPONSE_CACHE_DIR: str = ".cache/responses"
+    
+    # Riwayat chat per session (ring buffer in-memory + optional persistence)
+    HISTORY_ENABLED: bool = True
+    HISTORY_TURNS_PER_SESSION: int = 20
+    HISTORY_SESSION_TTL: float = 1800.0  # Session idle lebih lama dari ini di-evict
+    HISTORY_MAX_BYTES: int = 64 * 1024 * 1024  # Total semua session, LRU eviction
+    HISTORY_BACKEND: str = "memory"  # "memory" (tanpa persistence) atau "sqlite"
+    HISTORY_PATH: str = "data/chat_history.db"
+    HISTORY_FLUSH_INTERVAL: float = 1.0  # Detik maksimal sebelum batch ditulis
+    HISTORY_FLUSH_BATCH_SIZE: int = 256
+    HISTORY_QUEUE_SIZE: int = 10000  # Di atas ini turn baru tidak dipersist (di-drop)
+    
+    # Follow-up disambiguation dengan embedding turn sebelumnya
+    HISTORY_CONTEXT_TURNS: int = 3
+    HISTORY_CONTEXT_WEIGHT: float = 0.5  # Bobot konteks terhadap query saat ini
+    
+    # Multi-process serving (serve.py)
+    SERVE_WORKERS: int = 2
+    TORCH_THREADS_PER_WORKER: int = 0  # 0 = cpu_count // workers
+    
+    # Inference Executor (thread pool khusus untuk model inference)
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_MAX_QUEUE: int = 64  # Di atas ini request ditolak dengan 503
+    
+    # Micro-batching query encode (request /chat/ yang datang bersamaan)
+    BATCH_ENABLED: bool = True
+    BATCH_MAX_WAIT_MS: float = 3.0
+    BATCH_MAX_SIZE: int = 32
+    
+    # Streaming similarity search (NDJSON candidates)
+    SIMILARITY_STREAM_CHUNK_SIZE: int = 256
+    SIMILARITY_STREAM_MAX_CHUNK_SIZE: int = 2048  # Batas chunk_size dari query parameter
+    SIMILARITY_STREAM_MAX_LINE_BYTES: int = 64 * 1024  # Baris lebih panjang ditolak dengan 413
+    
     # Logging
     LOG_LEVEL: str = "INFO"
     
@@ -0,0 +1,62 @@
+"""
+Lifecycle - Status readiness dan breakdown waktu startup aplikasi
+"""
+
+from typing import Any, Dict, Optional
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """Menyimpan status warmup dan durasi setiap tahap startup"""
+    
+    def __init__(self):
+        self.warmup_state = "pending"  # pending, running, done, failed
+        self.warmup_error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+    
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Catat durasi satu tahap startup
+        
+        Args:
+            stage: Nama tahap (misal "import", "model_load", "kb_index")
+            seconds: Durasi dalam detik
+        """
+        self.timings[stage] = round(seconds, 4)
+        logger.info(f"Startup stage '{stage}' took {seconds:.3f}s")
+    
+    def status(self) -> Dict[str, Any]:
+        """
+        Get status warmup
+        
+        Returns:
+            Dict dengan warmup state, error (jika ada), dan timings per tahap
+        """
+        return {
+            "warmup": self.warmup_state,
+            "error": self.warmup_error,
+            "timings": dict(self.timings),
+        }
+
+
+class StageTimer:
+    """Context manager untuk mencatat durasi satu tahap ke Lifecycle"""
+    
+    def __init__(self, lifecycle: Lifecycle, stage: str):
+        self.lifecycle = lifecycle
+        self.stage = stage
+        self.started = 0.0
+    
+    def __enter__(self) -> "StageTimer":
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.lifecycle.record(self.stage, time.perf_counter() - self.started)
+
+
+# Singleton instance
+lifecycle = Lifecycle()
@@ -0,0 +1,62 @@
+"""
+Memory reporting per proses (RSS, PSS, shared vs private)
+
+PSS (proportional set size) membagi page yang di-share antar proses secara
+proporsional, sehingga jumlah PSS semua worker = memory yang benar-benar dipakai.
+Data dibaca dari /proc/<pid>/smaps_rollup (Linux); di platform lain hanya
+peak RSS dari getrusage yang tersedia.
+"""
+
+from typing import Dict, Union
+import resource
+import sys
+
+SMAPS_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_clean_mb",
+    "Shared_Dirty": "shared_dirty_mb",
+    "Private_Clean": "private_clean_mb",
+    "Private_Dirty": "private_dirty_mb",
+}
+
+
+def process_memory(pid: Union[int, str] = "self") -> Dict[str, float]:
+    """
+    Memory usage satu proses dalam MB
+    
+    Args:
+        pid: Process ID (default: proses saat ini)
+        
+    Returns:
+        Dict rss_mb, pss_mb, shared_*_mb, private_*_mb (Linux) atau max_rss_mb
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            lines = f.readlines()
+    except OSError:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss: KB di Linux, bytes di macOS
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return {"max_rss_mb": round(max_rss / divisor, 1)}
+    
+    memory = {}
+    for line in lines:
+        parts = line.split()
+        field = parts[0].rstrip(":")
+        if field in SMAPS_FIELDS:
+            memory[SMAPS_FIELDS[field]] = round(int(parts[1]) / 1024, 1)
+    return memory
+
+
+def format_memory(memory: Dict[str, float]) -> str:
+    """Ringkas hasil process_memory untuk log"""
+    if "rss_mb" not in memory:
+        return f"max RSS {memory.get('max_rss_mb', 0)} MB"
+    
+    shared = memory.get("shared_clean_mb", 0) + memory.get("shared_dirty_mb", 0)
+    private = memory.get("private_clean_mb", 0) + memory.get("private_dirty_mb", 0)
+    return (
+        f"RSS {memory['rss_mb']} MB, PSS {memory.get('pss_mb', 0)} MB "
+        f"(shared {shared:.1f} MB, private {private:.1f} MB)"
+    )
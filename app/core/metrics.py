@@ -0,0 +1,278 @@
+"""
+Metrics - Collector in-process dengan output format Prometheus text (0.0.4)
+
+Counter, Gauge dan Histogram sederhana tanpa dependency tambahan. Setiap
+update hanya berupa operasi dict + lock singkat, jadi aman dipanggil di hot
+path. Nilai dihitung per process; dengan beberapa worker, Prometheus
+men-scrape setiap worker (atau jumlahkan per instance).
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from contextlib import contextmanager
+import math
+import threading
+import time
+
+LabelValues = Tuple[str, ...]
+
+# Default bucket latency (detik): 0.5 ms sampai 10 detik
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric:
+    """Base class metric dengan label"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Inisialisasi Metric
+        
+        Args:
+            name: Nama metric (snake_case, dengan prefix aplikasi)
+            documentation: Teks HELP
+            labelnames: Nama label, nilai label diberikan saat update
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """List of (suffix nama, label string, value) untuk render"""
+        raise NotImplementedError
+    
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Nilai yang hanya bertambah"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = list(self._values.items())
+        return [("", _format_labels(self.labelnames, key), value) for key, value in values]
+
+
+class Gauge(Counter):
+    """Nilai yang bisa naik turun (contoh: request in-flight)"""
+    
+    kind = "gauge"
+    
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+    
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Distribusi nilai dalam bucket (cumulative saat di-render), plus sum dan count"""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+    
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[position] += 1
+            self._sums[key] += value
+    
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Context manager: observe durasi block (detik)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            snapshot = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        
+        samples = []
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                samples.append(("_bucket", labels, cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """Metric yang nilainya diambil saat scrape (contoh: statistik cache)"""
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge"
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [
+            ("", _format_labels(self.labelnames, key), value)
+            for key, value in self.callback().items()
+        ]
+
+
+class MetricsRegistry:
+    """Kumpulan metric yang di-render oleh endpoint /metrics"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry dan metric aplikasi
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "chatbot_http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route", "status"]
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "chatbot_http_requests_in_flight",
+    "HTTP requests currently being processed"
+))
+STAGE_LATENCY = registry.register(Histogram(
+    "chatbot_chat_stage_duration_seconds",
+    "Chat request latency per stage (validation, query_encode, scoring, kb_lookup, serialization)",
+    ["stage"]
+))
+CHAT_RESPONSES = registry.register(Counter(
+    "chatbot_chat_responses_total",
+    "Chat responses by answer method",
+    ["method"]
+))
+MODEL_BATCH_SIZE = registry.register(Histogram(
+    "chatbot_model_batch_size",
+    "Number of texts per model forward pass",
+    buckets=SIZE_BUCKETS
+))
+QUERY_BATCH_SIZE = registry.register(Histogram(
+    "chatbot_query_batch_size",
+    "Number of concurrent queries coalesced per encode batch",
+    buckets=SIZE_BUCKETS
+))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request latency per route template dan gauge in-flight.
+    Waktu mulai request disimpan di request.state.request_started sehingga
+    handler bisa menghitung stage "validation".
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        scope.setdefault("state", {})["request_started"] = started
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - started,
+                method=scope["method"], route=route, status=str(status_code)
+            )
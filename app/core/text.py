@@ -0,0 +1,31 @@
+"""
+Text Utilities - Normalisasi text untuk cache key dan deduplikasi
+"""
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalisasi text: trim, collapse whitespace, dan lowercase.
+    Model all-MiniLM-L6-v2 uncased, jadi embedding tidak berubah.
+    
+    Args:
+        text: Text to normalize
+        
+    Returns:
+        Normalized text
+    """
+    return " ".join(text.split()).lower()
+
+
+def question_key(question: str) -> str:
+    """
+    Key deduplikasi pertanyaan FAQ: normalize_text tanpa tanda baca di akhir,
+    sehingga "Apa itu S2B2C?" dan "apa itu  s2b2c" dianggap pertanyaan yang sama.
+    
+    Args:
+        question: Question text
+        
+    Returns:
+        Dedupe key
+    """
+    return normalize_text(question).rstrip(" ?!.")
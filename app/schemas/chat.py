@@ -12,13 +12,17 @@ class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, description="Pesan dari user")
     user_id: Optional[str] = Field(None, description="ID user (opsional)")
     session_id: Optional[str] = Field(None, description="ID session (opsional)")
+    tenant_id: Optional[str] = Field(
+        None, pattern=r"^[A-Za-z0-9_-]{1,64}$", description="ID tenant pemilik knowledge base (opsional)"
+    )
 
     class Config:
         json_schema_extra = {
             "example": {
                 "message": "Halo, apa kabar?",
                 "user_id": "user123",
-                "session_id": "session456"
+                "session_id": "session456",
+                "tenant_id": "default"
             }
         }
 
@@ -47,6 +51,30 @@ class ChatResponse(BaseModel):
         }
 
 
+class ChatBatchRequest(BaseModel):
+    """Schema untuk request batch chat (bulk question answering)"""
+    items: list[ChatRequest] = Field(
+        ..., min_length=1, max_length=1000, description="List of chat requests (maks 1000)"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"message": "Apa itu Kanvas Store?", "user_id": "user123"},
+                    {"message": "Bagaimana cara menghubungi Kanvas Store?"}
+                ]
+            }
+        }
+
+
+class ChatBatchResponse(BaseModel):
+    """Schema untuk response batch chat, urutan results sama dengan items"""
+    results: list[ChatResponse] = Field(..., description="Response per item (status 'error' jika gagal)")
+    total: int = Field(..., description="Jumlah item")
+    failed: int = Field(default=0, description="Jumlah item yang gagal diproses")
+
+
 class SimilarityRequest(BaseModel):
     """Schema untuk request similarity search"""
     query: str = Field(..., min_length=1, description="Query text untuk dicari")
@@ -71,6 +99,7 @@ class SimilarityResponse(BaseModel):
     """Schema untuk response similarity search"""
     results: list = Field(..., description="List of (text, similarity_score)")
     status: str = Field(default="success", description="Status response")
+    stats: Optional[dict] = Field(None, description="Statistik encode (total, cached, encoded)")
     
     class Config:
         json_schema_extra = {
@@ -2,13 +2,27 @@
 Chat Service - Business Logic untuk Chat
 """
 
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple, Union
+import asyncio
+import copy
 import logging
+import numpy as np
+from app.core.cache import create_cache_backend
+from app.core.config import settings
+from app.core.metrics import CHAT_RESPONSES, STAGE_LATENCY
+from app.core.text import normalize_text
+from app.services.embedding_batcher import embedding_batcher
 from app.services.embedding_service import embedding_service
-from app.services.knowledge_base import knowledge_base
+from app.services.history_store import ChatTurn, history_store, history_writer
+from app.services.inference_executor import InferenceOverloadedError, inference_executor
+from app.services.knowledge_base import KnowledgeBase, KnowledgeBaseSnapshot, knowledge_bases
+from app.services.warmup import ensure_knowledge_base_ready
 
 logger = logging.getLogger(__name__)
 
+# Method hasil semantic search (intent fast-path tidak dipakai sebagai konteks)
+SEARCH_METHODS = ("semantic_similarity", "no_match")
+
 
 class ChatService:
     """Service untuk menangani logika bisnis chat dengan semantic similarity"""
@@ -16,63 +30,299 @@ class ChatService:
     def __init__(self):
         """Inisialisasi ChatService"""
         self.embedding_service = embedding_service
-        self.knowledge_base = knowledge_base
+        self.embedding_batcher = embedding_batcher
+        self.knowledge_bases = knowledge_bases
+        self.history = history_store
+        self.history_writer = history_writer
         self.similarity_threshold = 0.5  # Minimum similarity untuk match
+        self.response_cache = create_cache_backend(
+            backend=settings.RESPONSE_CACHE_BACKEND,
+            max_size=settings.RESPONSE_CACHE_SIZE,
+            ttl=settings.RESPONSE_CACHE_TTL,
+            directory=settings.RESPONSE_CACHE_DIR
+        )
         logger.info("ChatService initialized with semantic similarity")
     
     async def process_message(
         self, 
         message: str, 
         user_id: Optional[str] = None,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        tenant_id: Optional[str] = None
     ) -> Dict[str, any]:
         """
         Memproses pesan dari user dan mengembalikan response
-        Menggunakan semantic similarity untuk mencari jawaban dari knowledge base
+        Menggunakan semantic similarity untuk mencari jawaban dari knowledge base.
+        Jika request punya session_id/user_id, turn dicatat di history dan
+        follow-up yang ambigu dijawab dengan konteks turn sebelumnya.
         
         Args:
             message: Pesan dari user
             user_id: ID user (opsional)
             session_id: ID session (opsional)
+            tenant_id: ID tenant pemilik knowledge base (opsional, default tenant default)
             
         Returns:
             Dict: Response dari chatbot dengan metadata
+            
+        Raises:
+            TenantNotFoundError: Tenant tidak dikenal
         """
         logger.info(f"Processing message: {message[:50]}...")
         
-        # Simple greeting detection
-        message_lower = message.lower()
-        if any(word in message_lower for word in ["halo", "hai", "hello", "hi"]):
-            return {
-                "response": "Halo! Selamat datang di Kanvas Chatbot. Saya menggunakan AI untuk menjawab pertanyaan Anda. Silakan tanya apa saja!",
-                "method": "greeting",
-                "confidence": 1.0
-            }
+        kb = await self.knowledge_bases.get_async(tenant_id)
+        session_key = None
+        if settings.HISTORY_ENABLED:
+            session_key = self.history.session_key(session_id, user_id, kb.tenant_id)
         
-        # Find similar question from knowledge base
-        questions = self.knowledge_base.get_all_questions()
+        # Response cache hanya menyimpan jawaban tanpa konteks session
+        cache_key = self._response_cache_key(message, kb)
+        query_embedding = None
+        result = self._cached_response(cache_key, kb)
+        if result is None:
+            result, query_embedding = await self._answer(message, kb)
+            self.response_cache.set(cache_key, result)
+        result = copy.deepcopy(result)
+        
+        if session_key is not None and result["method"] in SEARCH_METHODS:
+            if query_embedding is None:
+                query_embedding = self.embedding_service.normalize(await self.embedding_batcher.encode(message))
+            # Konteks hanya dicoba jika query langsung tidak menemukan jawaban
+            if result["method"] == "no_match":
+                contextual = await self._answer_with_context(message, query_embedding, session_key, kb)
+                if contextual is not None:
+                    result = contextual
+        
+        CHAT_RESPONSES.inc(method=result["method"])
+        if session_key is not None:
+            await self.save_chat(
+                user_id=user_id,
+                message=message,
+                response=result["response"],
+                session_id=session_id,
+                tenant_id=kb.tenant_id,
+                result=result,
+                embedding=query_embedding
+            )
+        return result
+    
+    def _response_cache_key(self, message: str, kb: KnowledgeBase) -> str:
+        """
+        Cache key response: normalized message + tenant dan hash isi knowledge
+        base, model dan threshold (semua input yang menentukan hasil). Hash isi
+        (bukan counter versi per proses) supaya entry cache file/shared yang
+        dibuat dari isi KB lain tidak terpakai setelah restart atau di worker lain.
+        """
+        return "|".join([
+            self.embedding_service.model_id,
+            kb.tenant_id or "",
+            kb.snapshot.content_hash,
+            str(self.similarity_threshold),
+            normalize_text(message),
+        ])
+    
+    async def _answer(self, message: str, kb: KnowledgeBase) -> Tuple[Dict[str, any], Optional[np.ndarray]]:
+        """
+        Cari jawaban untuk message (tanpa cache)
+        
+        Args:
+            message: Pesan dari user
+            kb: Knowledge base tenant
+            
+        Returns:
+            Tuple (response dict dengan metadata, normalized query embedding
+            atau None jika dijawab tanpa model)
+        """
+        result = self._answer_without_model(message, kb)
+        if result is not None:
+            return result, None
+        
+        # Find most similar question (query encode di-batch dengan request lain)
+        await ensure_knowledge_base_ready(kb)
+        with STAGE_LATENCY.time(stage="query_encode"):
+            query_embedding = self.embedding_service.normalize(await self.embedding_batcher.encode(message))
+        
+        # Satu snapshot untuk search dan ambil jawaban (konsisten walau KB berubah)
+        with STAGE_LATENCY.time(stage="scoring"):
+            results, snapshot = await inference_executor.run(self._search, kb, query_embedding, message)
+        
+        with STAGE_LATENCY.time(stage="kb_lookup"):
+            return self._build_answer(results, snapshot), query_embedding
+    
+    async def _answer_with_context(
+        self,
+        message: str,
+        query_embedding: np.ndarray,
+        session_key: str,
+        kb: KnowledgeBase
+    ) -> Optional[Dict[str, any]]:
+        """
+        Jawab follow-up dengan query embedding yang digabung embedding konteks
+        turn sebelumnya (embedding turn di-cache di history, tidak di-encode ulang).
+        Query gabungan hanya dipakai untuk memilih FAQ; confidence dan similarity
+        suggestion yang dilaporkan adalah cosine query langsung terhadap FAQ tersebut.
+        
+        Args:
+            message: Pesan dari user
+            query_embedding: Normalized embedding pesan
+            session_key: Key session di history store
+            kb: Knowledge base tenant
+            
+        Returns:
+            Response dengan method "contextual_similarity", atau None jika
+            tidak ada konteks atau tidak ada match di atas threshold
+        """
+        context = self.history.context_embedding(session_key, settings.HISTORY_CONTEXT_TURNS)
+        if context is None:
+            return None
+        
+        previous = self.history.recent(session_key, 1)
+        query_text = f"{previous[-1].message} {message}" if previous else message
+        combined = self.embedding_service.normalize(
+            query_embedding + settings.HISTORY_CONTEXT_WEIGHT * context
+        )
+        
+        await ensure_knowledge_base_ready(kb)
+        with STAGE_LATENCY.time(stage="scoring"):
+            results, snapshot = await inference_executor.run(self._search, kb, combined, query_text)
+        if not results:
+            return None
+        
+        result = self._build_answer(results, snapshot)
+        if result["method"] != "semantic_similarity":
+            return None
+        
+        # Score query gabungan tidak sebanding dengan score query langsung
+        direct = {
+            question: float(np.asarray(snapshot.embeddings[idx]) @ query_embedding)
+            for idx, question, _ in results
+        }
+        result["confidence"] = direct[result["matched_question"]]
+        for suggestion in result["suggestions"] or []:
+            suggestion["similarity"] = direct[suggestion["question"]]
+        result["method"] = "contextual_similarity"
+        return result
+    
+    def _search(
+        self,
+        kb: KnowledgeBase,
+        query_embedding: np.ndarray,
+        query_text: str
+    ) -> Tuple[List[Tuple[int, str, float]], KnowledgeBaseSnapshot]:
+        """
+        Top-3 FAQ untuk satu query embedding (dijalankan di inference executor,
+        bukan di event loop)
+        
+        Returns:
+            Tuple (results, snapshot yang dipakai untuk search)
+        """
+        snapshot = kb.get_snapshot()
+        results = kb.search_by_embedding(
+            query_embedding=query_embedding,
+            top_k=3,
+            query_text=query_text,
+            snapshot=snapshot
+        )
+        return results, snapshot
+    
+    def _encode_and_search_batch(
+        self,
+        messages: List[str],
+        groups: List[Tuple[KnowledgeBase, List[int]]]
+    ) -> List[Union[Tuple[List[List[Tuple[int, str, float]]], KnowledgeBaseSnapshot], Exception]]:
+        """
+        Encode semua pesan sekaligus lalu search per tenant, dalam satu job
+        inference executor
+        
+        Args:
+            messages: Pesan yang perlu semantic search
+            groups: (knowledge base, index baris di messages) per tenant
+            
+        Returns:
+            Per group: (results per pesan, snapshot), atau Exception jika search
+            tenant tersebut gagal (error encode di-raise untuk semua pesan)
+        """
+        query_embeddings = self.embedding_service.encode_cached(messages)
+        searched = []
+        for kb, rows in groups:
+            try:
+                snapshot = kb.get_snapshot()
+                searched.append((kb.search_by_embeddings(
+                    query_embeddings=query_embeddings[rows],
+                    top_k=3,
+                    query_texts=[messages[row] for row in rows],
+                    snapshot=snapshot
+                ), snapshot))
+            except Exception as e:
+                searched.append(e)
+        return searched
+    
+    def _cached_response(self, cache_key: str, kb: KnowledgeBase) -> Optional[Dict[str, any]]:
+        """
+        Ambil response dari response cache. Cache hit tetap dicatat di intent
+        router tenant, karena router tidak dijalankan untuk pesan yang di-cache.
+        
+        Args:
+            cache_key: Key dari _response_cache_key
+            kb: Knowledge base tenant
+            
+        Returns:
+            Dict response (belum di-copy) atau None jika tidak ada di cache
+        """
+        result = self.response_cache.get(cache_key)
+        if result is not None and settings.INTENT_ROUTER_ENABLED:
+            kb.intent_router.record_cached(result["method"])
+        return result
+    
+    def _answer_without_model(self, message: str, kb: KnowledgeBase) -> Optional[Dict[str, any]]:
+        """
+        Jawaban yang tidak membutuhkan model (intent trivial, knowledge base kosong)
         
-        if not questions:
+        Args:
+            message: Pesan dari user
+            kb: Knowledge base tenant
+            
+        Returns:
+            Dict response atau None jika perlu semantic search
+        """
+        # Fast-path intent trivial (greeting, terima kasih, kontak) milik tenant
+        if settings.INTENT_ROUTER_ENABLED:
+            result = kb.intent_router.route(message)
+            if result is not None:
+                return result
+        
+        # Find similar question from knowledge base
+        if not kb.faqs:
             return {
                 "response": "Maaf, knowledge base masih kosong. Silakan tambahkan FAQ terlebih dahulu.",
                 "method": "no_data",
                 "confidence": 0.0
             }
         
-        # Find most similar question
-        results = self.embedding_service.find_most_similar(
-            query=message,
-            candidates=questions,
-            top_k=3  # Get top 3 results
-        )
+        return None
+    
+    def _build_answer(
+        self,
+        results: List[Tuple[int, str, float]],
+        snapshot: KnowledgeBaseSnapshot
+    ) -> Dict[str, any]:
+        """
+        Susun response dari hasil semantic search
         
+        Args:
+            results: List of (index, question, similarity_score), descending
+            snapshot: Snapshot knowledge base yang menghasilkan results
+            
+        Returns:
+            Dict: Response dari chatbot dengan metadata
+        """
         best_match_idx, best_match_question, similarity_score = results[0]
         
         logger.info(f"Best match: '{best_match_question}' (similarity: {similarity_score:.3f})")
         
         # Check if similarity is above threshold
         if similarity_score >= self.similarity_threshold:
-            answer = self.knowledge_base.get_answer(best_match_idx)
+            answer = snapshot.get_answer(best_match_idx)
             
             # Add suggestions if similarity is not very high
             suggestions = []
@@ -109,42 +359,176 @@ class ChatService:
                 "suggestions": suggestions
             }
     
-    async def get_chat_history(self, user_id: str, limit: int = 10) -> list:
+    async def process_batch(
+        self,
+        messages: List[str],
+        tenant_ids: Optional[List[Optional[str]]] = None
+    ) -> List[Union[Dict[str, any], Exception]]:
         """
-        Mendapatkan riwayat chat user
+        Memproses banyak pesan sekaligus: semua query di-encode dalam satu
+        batched pass dan di-score terhadap knowledge base tenant masing-masing
+        dengan satu matrix-matrix product per tenant. Error satu item tidak
+        menggagalkan item lain, kecuali inference executor penuh (seluruh batch ditolak).
+        
+        Args:
+            messages: List of pesan dari user
+            tenant_ids: ID tenant per pesan (opsional, default tenant default)
+            
+        Returns:
+            List (urutan sama dengan messages) of response dict atau Exception
+            
+        Raises:
+            InferenceOverloadedError: Jika inference queue penuh
+        """
+        logger.info(f"Processing batch of {len(messages)} messages")
+        results: List[Union[Dict[str, any], Exception, None]] = [None] * len(messages)
+        tenant_ids = tenant_ids or [None] * len(messages)
+        knowledge_bases: List[Optional[KnowledgeBase]] = [None] * len(messages)
+        cache_keys: List[Optional[str]] = [None] * len(messages)
+        
+        pending = []
+        for i, message in enumerate(messages):
+            try:
+                kb = knowledge_bases[i] = await self.knowledge_bases.get_async(tenant_ids[i])
+                cache_keys[i] = self._response_cache_key(message, kb)
+                cached = self._cached_response(cache_keys[i], kb)
+                if cached is None:
+                    cached = self._answer_without_model(message, kb)
+                    if cached is not None:
+                        self.response_cache.set(cache_keys[i], cached)
+                if cached is not None:
+                    CHAT_RESPONSES.inc(method=cached["method"])
+                    results[i] = copy.deepcopy(cached)
+                else:
+                    pending.append(i)
+            except Exception as e:
+                results[i] = e
+        
+        if not pending:
+            return results
+        
+        groups: Dict[int, List[int]] = {}
+        for i in pending:
+            groups.setdefault(id(knowledge_bases[i]), []).append(i)
+        
+        ready = []
+        for items in groups.values():
+            kb = knowledge_bases[items[0]]
+            try:
+                await ensure_knowledge_base_ready(kb)
+                ready.append(items)
+            except InferenceOverloadedError:
+                raise
+            except Exception as e:
+                for i in items:
+                    results[i] = e
+        if not ready:
+            return results
+        
+        # Model di-share semua tenant: encode semua pesan pending sekaligus,
+        # search per tenant di job executor yang sama (tidak di event loop)
+        pending = [i for items in ready for i in items]
+        rows = {i: row for row, i in enumerate(pending)}
+        try:
+            searched = await inference_executor.run(
+                self._encode_and_search_batch,
+                [messages[i] for i in pending],
+                [(knowledge_bases[items[0]], [rows[i] for i in items]) for items in ready]
+            )
+        except InferenceOverloadedError:
+            raise
+        except Exception as e:
+            for i in pending:
+                results[i] = e
+            return results
+        
+        for items, group in zip(ready, searched):
+            if isinstance(group, Exception):
+                for i in items:
+                    results[i] = group
+                continue
+            
+            batch_results, snapshot = group
+            for i, search_results in zip(items, batch_results):
+                try:
+                    result = self._build_answer(search_results, snapshot)
+                    self.response_cache.set(cache_keys[i], result)
+                    CHAT_RESPONSES.inc(method=result["method"])
+                    results[i] = copy.deepcopy(result)
+                except Exception as e:
+                    results[i] = e
+        
+        return results
+    
+    async def get_chat_history(self, user_id: str, tenant_id: Optional[str] = None, limit: int = 10) -> list:
+        """
+        Mendapatkan riwayat chat user di satu tenant
         
         Args:
             user_id: ID user
+            tenant_id: ID tenant (opsional, default tenant default)
             limit: Jumlah maksimal history yang diambil
             
         Returns:
-            list: List of chat history
+            list: List of chat history (terbaru lebih dulu)
         """
-        # TODO: Implementasi get history dari database
         logger.info(f"Getting chat history for user: {user_id}")
-        return []
+        # Turn tenant default disimpan dengan tenant_id None (lihat process_message)
+        if tenant_id == settings.DEFAULT_TENANT_ID:
+            tenant_id = None
+        backend = self.history_writer.backend
+        if backend is None:
+            return [turn.to_dict() for turn in self.history.user_turns(user_id, tenant_id, limit)]
+        
+        # Turn yang masih di queue ditulis dulu supaya riwayat lengkap
+        await self.history_writer.flush()
+        return await asyncio.to_thread(backend.load_user, user_id, tenant_id, limit)
     
     async def save_chat(
         self, 
-        user_id: str, 
+        user_id: Optional[str],
         message: str, 
         response: str,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        result: Optional[Dict[str, any]] = None,
+        embedding: Optional[np.ndarray] = None
     ) -> bool:
         """
-        Menyimpan chat ke database
+        Menyimpan chat ke history session (ring buffer in-memory) dan
+        mengantrikannya untuk ditulis ke HISTORY_BACKEND secara batch
         
         Args:
             user_id: ID user
             message: Pesan dari user
             response: Response dari chatbot
             session_id: ID session (opsional)
+            tenant_id: ID tenant (opsional)
+            result: Response dict lengkap (method, confidence, matched_question)
+            embedding: Normalized embedding pesan, di-cache untuk konteks follow-up
             
         Returns:
             bool: True jika berhasil disimpan
         """
-        # TODO: Implementasi save ke database
-        logger.info(f"Saving chat for user: {user_id}")
+        session_key = self.history.session_key(session_id, user_id, tenant_id)
+        if not settings.HISTORY_ENABLED or session_key is None:
+            return False
+        
+        result = result or {}
+        turn = ChatTurn(
+            session_key=session_key,
+            message=message,
+            response=response,
+            method=result.get("method"),
+            confidence=result.get("confidence"),
+            matched_question=result.get("matched_question"),
+            user_id=user_id,
+            session_id=session_id,
+            tenant_id=tenant_id,
+            embedding=embedding
+        )
+        self.history.append(turn)
+        self.history_writer.submit(turn)
         return True
 
 
@@ -0,0 +1,153 @@
+"""
+Embedding Batcher - Menggabungkan query encode dari request yang bersamaan
+menjadi satu batched forward pass model
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import QUERY_BATCH_SIZE
+from app.services.embedding_service import EmbeddingService, embedding_service
+from app.services.inference_executor import InferenceExecutor, inference_executor
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Async request coalescer di depan EmbeddingService.encode.
+    Query yang datang dalam window `max_wait_ms` (atau sampai `max_batch_size`
+    item) di-encode bersama, lalu hasilnya dibagikan ke masing-masing future.
+    """
+    
+    def __init__(
+        self,
+        service: EmbeddingService,
+        executor: InferenceExecutor,
+        max_wait_ms: float = 3.0,
+        max_batch_size: int = 32,
+        enabled: bool = True
+    ):
+        """
+        Inisialisasi EmbeddingBatcher
+        
+        Args:
+            service: EmbeddingService yang dipakai untuk encode
+            executor: Executor tempat batch encode dijalankan
+            max_wait_ms: Waktu tunggu maksimal sebelum batch di-flush
+            max_batch_size: Jumlah item maksimal per batch
+            enabled: False = setiap query langsung di-encode sendiri
+        """
+        self.service = service
+        self.executor = executor
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.enabled = enabled
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+        self.batch_sizes: Dict[int, int] = {}
+    
+    async def encode(self, text: str) -> np.ndarray:
+        """
+        Encode satu query text (cache-aware, di-batch dengan query lain)
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            numpy array of embedding
+        """
+        cached = self.service.get_cached(text)
+        if cached is not None:
+            return cached
+        
+        if not self.enabled:
+            self._record(1)
+            return (await self._encode_batch([text]))[0]
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        """Ambil semua pending query dan jalankan satu batch encode"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Query yang sama dalam satu batch cukup di-encode sekali
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self._record(len(texts))
+        
+        try:
+            embeddings = await self._encode_batch(texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        by_text = dict(zip(texts, embeddings))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+    
+    async def _encode_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Encode batch di inference executor agar event loop tidak terblokir"""
+        embeddings = await self.executor.run(self.service.encode, texts)
+        return [self.service.put_cached(text, emb) for text, emb in zip(texts, embeddings)]
+    
+    def _record(self, size: int) -> None:
+        QUERY_BATCH_SIZE.observe(size)
+        self.batches += 1
+        self.items += size
+        self.max_observed_batch = max(self.max_observed_batch, size)
+        self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get statistik batching
+        
+        Returns:
+            Dict dengan jumlah batch, item, rata-rata dan distribusi batch size
+        """
+        return {
+            "enabled": self.enabled,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_observed_batch": self.max_observed_batch,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
+
+
+# Singleton instance
+embedding_batcher = EmbeddingBatcher(
+    embedding_service,
+    inference_executor,
+    max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+    max_batch_size=settings.BATCH_MAX_SIZE,
+    enabled=settings.BATCH_ENABLED
+)
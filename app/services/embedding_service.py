@@ -1,29 +1,110 @@
 """
 Embedding Service - Handle sentence embeddings dan similarity
+
+Model (dan torch/onnxruntime) baru di-import/di-load saat pertama kali dipakai
+atau saat warmup, sehingga import module ini murah (penting untuk serverless
+cold start). Backend dipilih lewat Settings.EMBEDDING_BACKEND:
+- torch: PyTorch (default)
+- onnx: ONNX graph dijalankan dengan onnxruntime
+- onnx-int8: ONNX graph dengan dynamic int8 quantization (ONNX_INT8_FILE)
 """
 
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
+import threading
+import time
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.metrics import MODEL_BATCH_SIZE
+from app.core.text import normalize_text
+from app.services.embedding_store import text_hash
 
 logger = logging.getLogger(__name__)
 
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
 
 class EmbeddingService:
     """Service untuk handle embeddings menggunakan all-MiniLM-L6-v2"""
     
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        backend: str = "torch"
+    ):
         """
         Inisialisasi EmbeddingService dengan model
         
         Args:
             model_name: Nama model dari Hugging Face
+            backend: Inference backend ("torch", "onnx", atau "onnx-int8")
         """
-        logger.info(f"Loading model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}")
         self.model_name = model_name
-        logger.info("Model loaded successfully")
+        self.backend = backend
+        self._model = None
+        self._model_lock = threading.Lock()
+        self.load_time: Optional[float] = None
+        self.query_cache = LRUCache(
+            max_size=settings.QUERY_CACHE_SIZE,
+            ttl=settings.QUERY_CACHE_TTL
+        )
+        self.candidate_cache = LRUCache(
+            max_size=settings.CANDIDATE_CACHE_MAX_ITEMS,
+            max_bytes=settings.CANDIDATE_CACHE_MAX_BYTES,
+            sizeof=lambda embedding: embedding.nbytes
+        )
+        self.candidate_encodes_saved = 0
+    
+    @property
+    def model(self):
+        """SentenceTransformer model, di-load saat pertama kali diakses"""
+        if self._model is None:
+            self.load_model()
+        return self._model
+    
+    @property
+    def model_id(self) -> str:
+        """
+        Identitas model untuk cache key. Backend selain torch menghasilkan
+        embedding yang sedikit berbeda, jadi cache-nya dipisah.
+        """
+        if self.backend == "torch":
+            return self.model_name
+        return f"{self.model_name}@{self.backend}"
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+    
+    def load_model(self) -> None:
+        """Load model (thread-safe, hanya sekali)"""
+        with self._model_lock:
+            if self._model is not None:
+                return
+            
+            logger.info(f"Loading model: {self.model_name} (backend: {self.backend})")
+            started = time.perf_counter()
+            self._model = self._create_model()
+            self._model.max_seq_length = settings.MAX_SEQ_LENGTH
+            self.load_time = time.perf_counter() - started
+            logger.info(f"Model loaded successfully in {self.load_time:.2f}s")
+    
+    def _create_model(self):
+        """Buat SentenceTransformer sesuai backend (ONNX butuh onnxruntime)"""
+        from sentence_transformers import SentenceTransformer
+        
+        if self.backend == "onnx":
+            return SentenceTransformer(self.model_name, backend="onnx")
+        if self.backend == "onnx-int8":
+            return SentenceTransformer(
+                self.model_name,
+                backend="onnx",
+                model_kwargs={"file_name": settings.ONNX_INT8_FILE}
+            )
+        return SentenceTransformer(self.model_name)
     
     def encode(self, texts: List[str]) -> np.ndarray:
         """
@@ -36,12 +117,81 @@ class EmbeddingService:
             numpy array of embeddings
         """
         logger.info(f"Encoding {len(texts)} texts")
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
+        model = self.model
+        
+        # Input patologis (sangat panjang) dipotong sebelum tokenization
+        max_chars = settings.MAX_SEQ_LENGTH * 10
+        texts = [text[:max_chars] for text in texts]
+        
+        if len(texts) <= 1:
+            MODEL_BATCH_SIZE.observe(len(texts))
+            return model.encode(texts, convert_to_numpy=True)
+        
+        lengths = self._token_lengths(texts)
+        order = np.argsort(-lengths, kind="stable")
+        
+        embeddings = None
+        for batch in self._plan_batches(lengths[order]):
+            batch_indices = order[batch]
+            MODEL_BATCH_SIZE.observe(len(batch_indices))
+            batch_embeddings = model.encode(
+                [texts[i] for i in batch_indices],
+                batch_size=len(batch_indices),
+                convert_to_numpy=True
+            )
+            if embeddings is None:
+                embeddings = np.empty(
+                    (len(texts), batch_embeddings.shape[1]), dtype=batch_embeddings.dtype
+                )
+            embeddings[batch_indices] = batch_embeddings
+        
         return embeddings
     
+    def _token_lengths(self, texts: List[str]) -> np.ndarray:
+        """
+        Panjang token setiap text (maksimal max_seq_length).
+        Fallback ke estimasi dari jumlah karakter jika tokenizer tidak tersedia.
+        """
+        max_length = settings.MAX_SEQ_LENGTH
+        tokenizer = getattr(self.model, "tokenizer", None)
+        
+        if tokenizer is not None:
+            input_ids = tokenizer(
+                texts, add_special_tokens=True, truncation=True, max_length=max_length
+            )["input_ids"]
+            lengths = [len(ids) for ids in input_ids]
+        else:
+            lengths = [len(text) // 4 + 2 for text in texts]
+        
+        return np.minimum(np.asarray(lengths, dtype=np.int64), max_length)
+    
+    def _plan_batches(self, sorted_lengths: np.ndarray) -> List[slice]:
+        """
+        Bagi input (sudah diurutkan dari token terpanjang) menjadi batch adaptif:
+        setiap batch di-padding ke text terpanjangnya, jadi jumlah item dibatasi
+        supaya batch_size x panjang_padding <= ENCODE_TOKEN_BUDGET.
+        
+        Args:
+            sorted_lengths: Panjang token, descending
+            
+        Returns:
+            List of slice atas urutan yang sudah di-sort
+        """
+        budget = settings.ENCODE_TOKEN_BUDGET
+        max_batch_size = settings.ENCODE_MAX_BATCH_SIZE
+        
+        batches = []
+        start = 0
+        while start < len(sorted_lengths):
+            padded_length = max(1, int(sorted_lengths[start]))
+            size = max(1, min(max_batch_size, budget // padded_length))
+            batches.append(slice(start, start + size))
+            start += size
+        return batches
+    
     def encode_single(self, text: str) -> np.ndarray:
         """
-        Encode single text menjadi embedding
+        Encode single text menjadi embedding (memakai query cache)
         
         Args:
             text: Text to encode
@@ -49,7 +199,83 @@ class EmbeddingService:
         Returns:
             numpy array of embedding
         """
-        return self.encode([text])[0]
+        return self.encode_cached([text])[0]
+    
+    def encode_cached(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode query texts dengan LRU cache per text.
+        Hanya text yang belum ada di cache yang di-encode (dalam satu batch).
+        
+        Args:
+            texts: List of query texts
+            
+        Returns:
+            numpy array of embeddings (urutan sama dengan texts)
+        """
+        embeddings: List[Optional[np.ndarray]] = [self.get_cached(text) for text in texts]
+        
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        if missing:
+            encoded = self.encode([texts[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = self.put_cached(texts[i], embedding)
+        
+        return np.stack(embeddings)
+    
+    def get_cached(self, text: str) -> Optional[np.ndarray]:
+        """
+        Ambil query embedding dari cache
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            Cached embedding atau None
+        """
+        return self.query_cache.get((self.model_id, normalize_text(text)))
+    
+    def put_cached(self, text: str, embedding: np.ndarray) -> np.ndarray:
+        """
+        Simpan query embedding ke cache (sebagai array read-only)
+        
+        Args:
+            text: Query text
+            embedding: Embedding hasil encode
+            
+        Returns:
+            Embedding yang disimpan
+        """
+        embedding = np.array(embedding)
+        embedding.setflags(write=False)
+        self.query_cache.set((self.model_id, normalize_text(text)), embedding)
+        return embedding
+    
+    def normalize(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        L2-normalize embeddings sehingga dot product = cosine similarity
+        
+        Args:
+            embeddings: Array of embeddings (1D atau 2D)
+            
+        Returns:
+            numpy array of normalized embeddings (float32)
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+    
+    def encode_normalized(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode teks menjadi embeddings yang sudah L2-normalized
+        
+        Args:
+            texts: List of texts to encode
+            
+        Returns:
+            numpy array of normalized embeddings
+        """
+        return self.normalize(self.encode(texts))
     
     def cosine_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """
@@ -84,22 +310,167 @@ class EmbeddingService:
         Returns:
             List of (index, text, similarity_score)
         """
+        return self.find_most_similar_with_stats(query, candidates, top_k)[0]
+    
+    def find_most_similar_with_stats(
+        self,
+        query: str,
+        candidates: List[str],
+        top_k: int = 1
+    ) -> Tuple[List[Tuple[int, str, float]], Dict[str, int]]:
+        """
+        Sama seperti find_most_similar, ditambah statistik candidate cache
+        
+        Args:
+            query: Query text
+            candidates: List of candidate texts
+            top_k: Number of top results to return
+            
+        Returns:
+            Tuple (list of (index, text, similarity_score), stats encode)
+        """
         logger.info(f"Finding similar texts for query: {query[:50]}...")
         
         # Encode query and candidates
-        query_embedding = self.encode_single(query)
-        candidate_embeddings = self.encode(candidates)
+        query_embedding = self.normalize(self.encode_single(query))
+        candidate_embeddings, stats = self.encode_candidates(candidates)
+        
+        results = self.search_embeddings(
+            query_embedding=query_embedding,
+            embeddings=candidate_embeddings,
+            candidates=candidates,
+            top_k=top_k
+        )
+        return results, stats
+    
+    def encode_candidates(self, texts: List[str]) -> Tuple[np.ndarray, Dict[str, int]]:
+        """
+        Encode candidate texts dengan content-addressed cache (key: model + hash text).
+        Hanya candidate yang belum pernah dilihat yang di-encode.
+        
+        Args:
+            texts: List of candidate texts
+            
+        Returns:
+            Tuple (normalized embedding matrix, stats {"total", "cached", "encoded"}),
+            cached = jumlah encode yang dihemat (termasuk duplikat dalam request)
+        """
+        keys = [(self.model_id, text_hash(text)) for text in texts]
+        embeddings: List[Optional[np.ndarray]] = [self.candidate_cache.get(key) for key in keys]
+        
+        # Candidate duplikat dalam satu request cukup di-encode sekali
+        missing: Dict[Tuple[str, str], List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(keys[i], []).append(i)
+        
+        if missing:
+            positions = list(missing.values())
+            encoded = self.encode_normalized([texts[rows[0]] for rows in positions])
+            for rows, embedding in zip(positions, encoded):
+                embedding = np.array(embedding)
+                embedding.setflags(write=False)
+                self.candidate_cache.set(keys[rows[0]], embedding)
+                for i in rows:
+                    embeddings[i] = embedding
+        
+        stats = {
+            "total": len(texts),
+            "cached": len(texts) - len(missing),
+            "encoded": len(missing),
+        }
+        self.candidate_encodes_saved += len(texts) - len(missing)
+        logger.info(
+            f"Candidate embeddings: {stats['cached']} cached, {stats['encoded']} encoded"
+        )
+        
+        if not embeddings:
+            return np.empty((0, 0), dtype=np.float32), stats
+        return np.stack(embeddings), stats
+    
+    def find_most_similar_batch(
+        self,
+        queries: List[str],
+        candidates: List[str],
+        top_k: int = 1
+    ) -> List[List[Tuple[int, str, float]]]:
+        """
+        Find most similar texts untuk banyak query sekaligus
+        
+        Args:
+            queries: List of query texts
+            candidates: List of candidate texts
+            top_k: Number of top results per query
+            
+        Returns:
+            List (per query) of (index, text, similarity_score)
+        """
+        query_embeddings = self.normalize(self.encode_cached(queries))
+        candidate_embeddings = self.encode_normalized(candidates)
         
-        # Calculate similarities
-        similarities = []
-        for idx, (candidate, candidate_embedding) in enumerate(zip(candidates, candidate_embeddings)):
-            similarity = self.cosine_similarity(query_embedding, candidate_embedding)
-            similarities.append((idx, candidate, similarity))
+        return self.search_embeddings_batch(
+            query_embeddings=query_embeddings,
+            embeddings=candidate_embeddings,
+            candidates=candidates,
+            top_k=top_k
+        )
+    
+    def search_embeddings(
+        self,
+        query_embedding: np.ndarray,
+        embeddings: np.ndarray,
+        candidates: List[str],
+        top_k: int = 1
+    ) -> List[Tuple[int, str, float]]:
+        """
+        Cari candidates paling mirip dari embedding matrix yang sudah di-normalize
         
-        # Sort by similarity (descending)
-        similarities.sort(key=lambda x: x[2], reverse=True)
+        Args:
+            query_embedding: Normalized query embedding
+            embeddings: Normalized candidate embedding matrix (N x dim)
+            candidates: List of candidate texts (sesuai urutan baris matrix)
+            top_k: Number of top results to return
+            
+        Returns:
+            List of (index, text, similarity_score)
+        """
+        if len(candidates) == 0:
+            return []
+        
+        scores = embeddings @ query_embedding
+        indices = top_k_indices(scores, top_k)
         
-        return similarities[:top_k]
+        return [(int(idx), candidates[idx], float(scores[idx])) for idx in indices]
+    
+    def search_embeddings_batch(
+        self,
+        query_embeddings: np.ndarray,
+        embeddings: np.ndarray,
+        candidates: List[str],
+        top_k: int = 1
+    ) -> List[List[Tuple[int, str, float]]]:
+        """
+        Versi batch dari search_embeddings: satu matrix-matrix product untuk semua query
+        
+        Args:
+            query_embeddings: Normalized query embedding matrix (Q x dim)
+            embeddings: Normalized candidate embedding matrix (N x dim)
+            candidates: List of candidate texts (sesuai urutan baris matrix)
+            top_k: Number of top results per query
+            
+        Returns:
+            List (per query) of (index, text, similarity_score)
+        """
+        if len(candidates) == 0:
+            return [[] for _ in range(len(query_embeddings))]
+        
+        scores = query_embeddings @ embeddings.T
+        indices = top_k_indices(scores, top_k)
+        
+        return [
+            [(int(idx), candidates[idx], float(row_scores[idx])) for idx in row_indices]
+            for row_scores, row_indices in zip(scores, indices)
+        ]
     
     def batch_similarity(self, query: str, candidates: List[str]) -> List[float]:
         """
@@ -112,17 +483,42 @@ class EmbeddingService:
         Returns:
             List of similarity scores
         """
-        query_embedding = self.encode_single(query)
-        candidate_embeddings = self.encode(candidates)
+        query_embedding = self.normalize(self.encode_single(query))
+        candidate_embeddings = self.encode_normalized(candidates)
         
-        similarities = [
-            self.cosine_similarity(query_embedding, emb)
-            for emb in candidate_embeddings
-        ]
+        similarities = candidate_embeddings @ query_embedding
+        
+        return similarities.tolist()
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Pilih index top_k score tertinggi tanpa full sort (argpartition).
+    Urutan hasil descending by score, score yang sama diurutkan by index
+    (sama seperti stable sort sebelumnya).
+    
+    Args:
+        scores: Array of scores (N,) atau (Q x N)
+        top_k: Number of top results
         
-        return similarities
+    Returns:
+        Array of indices dengan shape (k,) atau (Q x k)
+    """
+    n = scores.shape[-1]
+    k = max(0, min(top_k, n))
+    if k == 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    
+    candidate_scores = np.take_along_axis(scores, candidates, axis=-1)
+    order = np.lexsort((candidates, -candidate_scores), axis=-1)
+    return np.take_along_axis(candidates, order, axis=-1)
 
 
 # Singleton instance
-embedding_service = EmbeddingService()
+embedding_service = EmbeddingService(backend=settings.EMBEDDING_BACKEND)
 
@@ -0,0 +1,343 @@
+"""
+Embedding Store - Persistent on-disk cache untuk embedding FAQ
+
+Format per model (di dalam EMBEDDING_CACHE_DIR/<model>/, atau
+EMBEDDING_CACHE_DIR/tenants/<tenant_id>/<model>/ untuk tenant selain default):
+- manifest.json          : format_version, model_name, dimension, dtype, count,
+                           dan nama file matrix + hash yang aktif
+- embeddings-<id>.f32    : float32 matrix (count x dim) row-major tanpa header,
+                           L2-normalized
+- hashes-<id>.txt        : hash text per baris matrix (fixed width, satu per baris)
+
+Matrix di-load dengan np.memmap (mode read-only) sehingga beberapa worker
+di host yang sama berbagi page cache yang sama dan tidak perlu encode ulang.
+FAQ baru di-append ke file yang sama (O(baris baru), bukan tulis ulang matrix);
+baris di luar `count` manifest diabaikan, jadi append yang terputus tidak
+merusak cache. Writer di-serialize antar proses dengan file lock.
+"""
+
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import uuid
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+HASH_LENGTH = 40  # sha1 hex
+HASH_RECORD = HASH_LENGTH + 1  # + newline
+
+
+def text_hash(text: str) -> str:
+    """
+    Hash konten text (sha1 hex)
+    
+    Args:
+        text: Text to hash
+        
+    Returns:
+        Hex digest
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def spill_to_memmap(vectors: np.ndarray, directory: Optional[str] = None) -> np.memmap:
+    """
+    Pindahkan matrix ke file sementara (sudah di-unlink) dan kembalikan
+    read-only memmap-nya, sehingga matrix tidak lagi menempati heap proses
+    dan hanya row yang dibaca yang di-page-in
+    
+    Args:
+        vectors: Matrix float32
+        directory: Direktori file sementara (default: EMBEDDING_CACHE_DIR, lalu temp dir sistem)
+        
+    Returns:
+        np.memmap dengan isi yang sama
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    directory = directory or settings.EMBEDDING_CACHE_DIR or None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryFile(dir=directory) as f:
+        f.write(vectors.tobytes())
+        f.flush()
+        # mmap tetap valid setelah file object ditutup
+        return np.memmap(f, dtype=np.float32, mode="r", shape=vectors.shape)
+
+
+class EmbeddingStore:
+    """Versioned on-disk embedding matrix untuk satu model"""
+    
+    def __init__(self, directory: str, model_name: str):
+        """
+        Inisialisasi EmbeddingStore
+        
+        Args:
+            directory: Root directory cache
+            model_name: Nama model (bagian dari key cache)
+        """
+        self.model_name = model_name
+        safe_name = re.sub(r"[^A-Za-z0-9._-]+", "__", model_name)
+        self.directory = os.path.join(directory, safe_name)
+    
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_FILE)
+    
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """File lock exclusive antar proses untuk save/append"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Invalid embedding manifest {self.manifest_path}: {e}")
+            return None
+        
+        if (
+            manifest.get("format_version") != FORMAT_VERSION
+            or manifest.get("model_name") != self.model_name
+        ):
+            return None
+        return manifest
+    
+    def _write_manifest(self, manifest: dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".json.tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _open_matrix(self, manifest: dict) -> np.ndarray:
+        """Matrix `count` baris pertama sebagai read-only memmap"""
+        shape = (manifest["count"], manifest["dimension"])
+        if shape[0] == 0:
+            return np.empty(shape, dtype=np.float32)
+        path = os.path.join(self.directory, manifest["matrix_file"])
+        return np.memmap(path, dtype=np.float32, mode="r", shape=shape)
+    
+    def load(self) -> Optional[Tuple[np.ndarray, List[str]]]:
+        """
+        Load matrix dari disk sebagai read-only memmap
+        
+        Returns:
+            Tuple (embeddings memmap, text_hashes) atau None jika cache tidak ada/invalid
+        """
+        manifest = self._read_manifest()
+        if manifest is None:
+            return None
+        
+        count = manifest["count"]
+        matrix_path = os.path.join(self.directory, manifest["matrix_file"])
+        hashes_path = os.path.join(self.directory, manifest["hashes_file"])
+        try:
+            with open(hashes_path, "rb") as f:
+                raw = f.read(count * HASH_RECORD)
+            if len(raw) != count * HASH_RECORD or os.path.getsize(matrix_path) < count * manifest["dimension"] * 4:
+                logger.warning(f"Embedding cache {self.directory} is shorter than its manifest, ignoring")
+                return None
+            embeddings = self._open_matrix(manifest)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load embedding matrix {matrix_path}: {e}")
+            return None
+        
+        hashes = raw.decode("ascii").split("\n")[:count]
+        return embeddings, hashes
+    
+    def _write_new_file(self, prefix: str, suffix: str, data: bytes) -> str:
+        """
+        Tulis data ke file dengan nama unik (tmp file + rename). File matrix
+        yang sudah ada tidak pernah dibuka ulang untuk ditulis dari awal,
+        sehingga memmap yang masih dipakai snapshot lain tidak ikut berubah.
+        
+        Returns:
+            Nama file (relatif terhadap directory)
+        """
+        name = f"{prefix}-{uuid.uuid4().hex}{suffix}"
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+        return name
+    
+    def save(self, embeddings: np.ndarray, text_hashes: List[str]) -> np.ndarray:
+        """
+        Simpan matrix dan hash ke file baru (nama unik per write) lalu ganti
+        manifest secara atomic. File lama dihapus (unlink), worker yang masih
+        memakai memmap lama tetap aman.
+        
+        Args:
+            embeddings: Normalized embedding matrix (N x dim)
+            text_hashes: Hash text per baris matrix
+            
+        Returns:
+            Matrix yang sudah tersimpan, di-load ulang sebagai memmap
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        with self._locked():
+            manifest = {
+                "format_version": FORMAT_VERSION,
+                "model_name": self.model_name,
+                "dimension": int(embeddings.shape[1]),
+                "dtype": "float32",
+                "count": int(embeddings.shape[0]),
+                "matrix_file": self._write_new_file("embeddings", ".f32", embeddings.tobytes()),
+                "hashes_file": self._write_new_file(
+                    "hashes", ".txt", "".join(h + "\n" for h in text_hashes).encode("ascii")
+                ),
+            }
+            self._write_manifest(manifest)
+            
+            active = (manifest["matrix_file"], manifest["hashes_file"])
+            for name in os.listdir(self.directory):
+                if name.startswith(("embeddings-", "hashes-")) and name not in active:
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+        
+        logger.info(f"Saved {len(text_hashes)} embeddings to {self.directory}")
+        return self._open_matrix(manifest)
+    
+    def append(
+        self,
+        embeddings: np.ndarray,
+        text_hashes: List[str],
+        base_count: int,
+        base_last_hash: Optional[str]
+    ) -> Optional[np.ndarray]:
+        """
+        Append baris baru ke matrix yang tersimpan (hanya baris baru yang ditulis).
+        Ditulis di belakang `count` manifest, baris yang mungkin sudah di-memmap
+        reader tidak pernah ditimpa.
+        
+        Args:
+            embeddings: Normalized embedding matrix baris baru (M x dim)
+            text_hashes: Hash text baris baru
+            base_count: Jumlah baris yang diharapkan sudah ada di store
+            base_last_hash: Hash baris terakhir yang diharapkan (None jika base_count = 0)
+            
+        Returns:
+            Seluruh matrix (base + baris baru) sebagai memmap, atau None jika
+            isi store tidak sesuai base (caller sebaiknya memanggil save)
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        with self._locked():
+            manifest = self._read_manifest()
+            if (
+                manifest is None
+                or manifest["count"] != base_count
+                or manifest["dimension"] != embeddings.shape[1]
+            ):
+                return None
+            
+            matrix_path = os.path.join(self.directory, manifest["matrix_file"])
+            hashes_path = os.path.join(self.directory, manifest["hashes_file"])
+            with open(hashes_path, "r+b") as f:
+                if base_count:
+                    f.seek((base_count - 1) * HASH_RECORD)
+                    if f.read(HASH_LENGTH).decode("ascii") != base_last_hash:
+                        return None
+                f.seek(base_count * HASH_RECORD)
+                f.write("".join(h + "\n" for h in text_hashes).encode("ascii"))
+                f.truncate()
+            with open(matrix_path, "r+b") as f:
+                f.seek(base_count * manifest["dimension"] * 4)
+                f.write(embeddings.tobytes())
+                f.truncate()
+            
+            manifest["count"] = base_count + len(embeddings)
+            self._write_manifest(manifest)
+        
+        logger.info(f"Appended {len(embeddings)} embeddings to {self.directory} ({manifest['count']} total)")
+        return self._open_matrix(manifest)
+    
+    def load_or_build(
+        self,
+        texts: List[str],
+        encode_fn: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Load embeddings dari disk, hanya encode text yang hash-nya berubah/baru
+        
+        Args:
+            texts: Semua text (urutan = urutan baris matrix)
+            encode_fn: Function untuk encode list of texts (normalized)
+            
+        Returns:
+            Normalized embedding matrix (N x dim)
+        """
+        hashes = [text_hash(text) for text in texts]
+        cached = self.load()
+        
+        if cached is not None and cached[1] == hashes:
+            logger.info(f"Loaded {len(hashes)} embeddings from disk cache")
+            return cached[0]
+        
+        cached_rows = {}
+        if cached is not None:
+            cached_rows = {h: row for row, h in enumerate(cached[1])}
+        
+        missing = [i for i, h in enumerate(hashes) if h not in cached_rows]
+        logger.info(
+            f"Embedding cache: reusing {len(hashes) - len(missing)}, encoding {len(missing)}"
+        )
+        
+        new_embeddings = encode_fn([texts[i] for i in missing]) if missing else None
+        
+        if cached is not None:
+            dimension = cached[0].shape[1]
+        else:
+            dimension = new_embeddings.shape[1]
+        embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+        
+        for i, h in enumerate(hashes):
+            if h in cached_rows:
+                embeddings[i] = cached[0][cached_rows[h]]
+        if missing:
+            embeddings[missing] = new_embeddings
+        
+        try:
+            return self.save(embeddings, hashes)
+        except OSError as e:
+            logger.warning(f"Failed to write embedding cache: {e}")
+            return embeddings
+
+
+def get_embedding_store(model_name: str, tenant_id: Optional[str] = None) -> Optional[EmbeddingStore]:
+    """
+    Get EmbeddingStore untuk model sesuai Settings
+    
+    Args:
+        model_name: Nama model
+        tenant_id: Tenant pemilik matrix (None = tenant default)
+        
+    Returns:
+        EmbeddingStore atau None jika cache di-disable
+    """
+    if not settings.EMBEDDING_CACHE_ENABLED or not settings.EMBEDDING_CACHE_DIR:
+        return None
+    directory = settings.EMBEDDING_CACHE_DIR
+    if tenant_id:
+        directory = os.path.join(directory, "tenants", tenant_id)
+    return EmbeddingStore(directory, model_name)
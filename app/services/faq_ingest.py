@@ -0,0 +1,571 @@
+"""
+FAQ Ingest - Bulk import FAQ dalam jumlah besar dari CSV atau JSONL
+
+Input dibaca streaming per record, divalidasi dan di-dedupe dengan question_key
+(terhadap isi knowledge base dan terhadap input itu sendiri), lalu pertanyaan
+baru di-encode per INGEST_BATCH_SIZE. Setiap batch yang selesai di-encode
+ditulis ke checkpoint (INGEST_DIR/checkpoints/<job_id>), sehingga job yang
+gagal dilanjutkan dari batch terakhir tanpa encode ulang. Setelah seluruh input
+terbaca, semua FAQ baru di-commit dengan KnowledgeBase.append_faqs: satu write
+ke store dan satu snapshot baru.
+
+Usage:
+    python -m app.services.faq_ingest supplier_faqs.csv [--tenant ID] [--batch-size 1024]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from collections import OrderedDict
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+from app.core.config import settings
+from app.core.text import question_key
+from app.services.faq_store import TENANT_ID_PATTERN, create_faq_store, tenant_store_path, validate_faq
+from app.services.knowledge_base import KnowledgeBase, knowledge_base
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl")
+ACTIVE_STATUSES = ("pending", "running", "committing")
+
+
+class IngestError(ValueError):
+    """Input bulk ingest tidak valid (format, kolom atau job ID)"""
+
+
+class UploadTooLargeError(IngestError):
+    """Upload melebihi INGEST_MAX_UPLOAD_MB"""
+
+
+def detect_format(path: str) -> str:
+    """Format input dari ekstensi file: .csv -> csv, .jsonl/.ndjson -> jsonl"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise IngestError(f"Format file tidak dikenal: {path} (gunakan .csv atau .jsonl)")
+
+
+def iter_faq_records(path: str, fmt: str) -> Iterator[Optional[Dict[str, str]]]:
+    """
+    Baca record FAQ satu per satu (streaming, memory konstan)
+    
+    Args:
+        path: Path file input
+        fmt: "csv" (kolom question dan answer) atau "jsonl" ({"question", "answer"} per baris)
+        
+    Yields:
+        FAQ dictionary yang valid, atau None untuk record invalid (supaya nomor
+        record tetap stabil untuk resume)
+        
+    Raises:
+        IngestError: Format atau header CSV tidak valid
+    """
+    if fmt not in FORMATS:
+        raise IngestError(f"Unknown ingest format: {fmt}")
+    
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+            if "question" not in columns or "answer" not in columns:
+                raise IngestError("CSV harus punya kolom 'question' dan 'answer'")
+            for row in reader:
+                yield validate_faq({
+                    "question": row.get(columns["question"]),
+                    "answer": row.get(columns["answer"]),
+                })
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield None
+                    continue
+                yield validate_faq(record)
+
+
+def file_fingerprint(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 isi file (dipakai untuk job ID default dan validasi checkpoint)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def validate_job_id(job_id: Optional[str]) -> None:
+    """Job ID dipakai sebagai nama direktori checkpoint, jadi formatnya dibatasi"""
+    if job_id is not None and not re.match(TENANT_ID_PATTERN, job_id):
+        raise IngestError(f"Invalid job id: {job_id!r}")
+
+
+def default_job_id(fingerprint: str, tenant_id: Optional[str] = None) -> str:
+    """Job ID deterministik: file dan tenant yang sama melanjutkan checkpoint yang sama"""
+    return f"{tenant_id or settings.DEFAULT_TENANT_ID}-{fingerprint[:16]}"
+
+
+class IngestJob:
+    """Status dan progress satu job ingest"""
+    
+    def __init__(self, job_id: str, tenant_id: Optional[str], source: str):
+        self.job_id = job_id
+        self.tenant_id = tenant_id
+        self.source = source
+        self.status = "pending"
+        self.rows_read = 0
+        self.resumed_rows = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.accepted = 0
+        self.encoded = 0
+        self.added = 0
+        self.encode_seconds = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+    
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        rows = self.rows_read - self.resumed_rows
+        return {
+            "job_id": self.job_id,
+            "tenant_id": self.tenant_id or settings.DEFAULT_TENANT_ID,
+            "status": self.status,
+            "rows_read": self.rows_read,
+            "resumed_rows": self.resumed_rows,
+            "invalid": self.invalid,
+            "duplicates": self.duplicates,
+            "accepted": self.accepted,
+            "encoded": self.encoded,
+            "added": self.added,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "encoded_per_second": round(self.encoded / self.encode_seconds, 1) if self.encode_seconds > 0 else 0.0,
+            "error": self.error,
+        }
+
+
+class IngestCheckpoint:
+    """
+    Checkpoint job di disk: satu file .npy (embedding) + .jsonl (FAQ) per batch
+    dan state.json (jumlah record yang sudah dibaca, jumlah batch). state.json
+    ditulis terakhir secara atomic, jadi batch yang belum tercatat di state
+    dianggap tidak ada.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.state_path = os.path.join(directory, "state.json")
+    
+    def _batch_path(self, index: int, extension: str) -> str:
+        return os.path.join(self.directory, f"batch-{index:05d}.{extension}")
+    
+    def _replace(self, path: str, write) -> None:
+        """Tulis ke tmp file lalu rename (atomic)"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning(f"Ignoring corrupt ingest checkpoint {self.state_path}")
+            return None
+    
+    def save_batch(
+        self,
+        index: int,
+        faqs: List[Dict[str, str]],
+        embeddings: np.ndarray,
+        state: Dict[str, Any]
+    ) -> None:
+        """
+        Simpan satu batch yang sudah di-encode, lalu state yang mencakup batch tersebut
+        
+        Args:
+            index: Nomor batch (0, 1, ...)
+            faqs: FAQ batch ini
+            embeddings: Normalized embedding matrix, row-aligned dengan faqs
+            state: State job setelah batch ini
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._replace(self._batch_path(index, "npy"), lambda f: np.save(f, embeddings))
+        self._replace(self._batch_path(index, "jsonl"), lambda f: f.write("".join(
+            json.dumps(faq, ensure_ascii=False) + "\n" for faq in faqs
+        ).encode("utf-8")))
+        self._replace(self.state_path, lambda f: f.write(json.dumps(state).encode("utf-8")))
+    
+    def load_batches(self, count: int) -> Tuple[List[Dict[str, str]], List[np.ndarray]]:
+        """
+        Load `count` batch pertama
+        
+        Returns:
+            (FAQ semua batch, list embedding matrix per batch)
+        """
+        faqs: List[Dict[str, str]] = []
+        embeddings: List[np.ndarray] = []
+        for index in range(count):
+            with open(self._batch_path(index, "jsonl"), "r", encoding="utf-8") as f:
+                faqs.extend(json.loads(line) for line in f if line.strip())
+            embeddings.append(np.load(self._batch_path(index, "npy")))
+        return faqs, embeddings
+    
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class FAQIngestor:
+    """Pipeline bulk ingest ke satu knowledge base"""
+    
+    def __init__(
+        self,
+        kb: KnowledgeBase,
+        batch_size: Optional[int] = None,
+        ingest_dir: Optional[str] = None
+    ):
+        """
+        Inisialisasi FAQIngestor
+        
+        Args:
+            kb: Knowledge base tujuan
+            batch_size: Pertanyaan per panggilan encode (default: INGEST_BATCH_SIZE)
+            ingest_dir: Direktori checkpoint (default: INGEST_DIR)
+        """
+        self.kb = kb
+        self.batch_size = max(1, batch_size or settings.INGEST_BATCH_SIZE)
+        self.ingest_dir = ingest_dir or settings.INGEST_DIR
+    
+    def checkpoint(self, job_id: str) -> IngestCheckpoint:
+        return IngestCheckpoint(os.path.join(self.ingest_dir, "checkpoints", job_id))
+    
+    def run(
+        self,
+        path: str,
+        fmt: Optional[str] = None,
+        job_id: Optional[str] = None,
+        resume: bool = True,
+        job: Optional[IngestJob] = None,
+        fingerprint: Optional[str] = None
+    ) -> IngestJob:
+        """
+        Jalankan ingest sampai selesai (blocking)
+        
+        Args:
+            path: File CSV atau JSONL
+            fmt: "csv" atau "jsonl" (default: dari ekstensi file)
+            job_id: ID job / checkpoint (default: dari isi file dan tenant)
+            resume: Lanjutkan checkpoint job_id jika ada
+            job: IngestJob yang di-update (untuk progress dari thread lain)
+            fingerprint: SHA-256 file jika sudah dihitung
+            
+        Returns:
+            IngestJob dengan status "completed"
+            
+        Raises:
+            IngestError: Input tidak valid (checkpoint tetap disimpan)
+        """
+        validate_job_id(job_id)
+        fmt = fmt or detect_format(path)
+        fingerprint = fingerprint or file_fingerprint(path)
+        job_id = job_id or default_job_id(fingerprint, self.kb.tenant_id)
+        job = job or IngestJob(job_id, self.kb.tenant_id, path)
+        job.status = "running"
+        job.started = time.time()
+        checkpoint = self.checkpoint(job_id)
+        
+        model_id = self.kb.embedding_service.model_id
+        state = checkpoint.load() if resume else None
+        if state is not None and (state.get("fingerprint") != fingerprint or state.get("model") != model_id):
+            logger.info(f"Ingest {job_id}: checkpoint is for a different file or model, starting over")
+            state = None
+        if state is None:
+            checkpoint.clear()
+            state = {"fingerprint": fingerprint, "model": model_id, "rows": 0, "batches": 0,
+                     "invalid": 0, "duplicates": 0}
+        
+        try:
+            staged_faqs, staged_embeddings = checkpoint.load_batches(state["batches"])
+            job.rows_read = job.resumed_rows = state["rows"]
+            job.invalid = state["invalid"]
+            job.duplicates = state["duplicates"]
+            job.accepted = job.encoded = len(staged_faqs)
+            if state["rows"]:
+                logger.info(f"Ingest {job_id}: resuming after {state['rows']} rows ({len(staged_faqs)} FAQs staged)")
+            
+            seen = {question_key(q) for q in self.kb.get_all_questions()}
+            seen.update(question_key(faq["question"]) for faq in staged_faqs)
+            pending: List[Dict[str, str]] = []
+            for row, faq in enumerate(iter_faq_records(path, fmt), 1):
+                if row <= state["rows"]:
+                    continue
+                job.rows_read = row
+                if faq is None:
+                    job.invalid += 1
+                    continue
+                key = question_key(faq["question"])
+                if key in seen:
+                    job.duplicates += 1
+                    continue
+                seen.add(key)
+                pending.append(faq)
+                job.accepted += 1
+                if len(pending) >= self.batch_size:
+                    self._encode_batch(pending, job, state, checkpoint, staged_faqs, staged_embeddings)
+                    pending = []
+            if pending:
+                self._encode_batch(pending, job, state, checkpoint, staged_faqs, staged_embeddings)
+            
+            job.status = "committing"
+            if staged_faqs:
+                job.added = self.kb.append_faqs(staged_faqs, np.concatenate(staged_embeddings))
+            checkpoint.clear()
+            job.status = "completed"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Ingest {job_id} failed after {job.rows_read} rows: {str(e)}")
+            raise
+        finally:
+            job.finished = time.time()
+        
+        logger.info(
+            f"Ingest {job_id} completed: {job.rows_read} rows, {job.added} added, "
+            f"{job.duplicates} duplicates, {job.invalid} invalid in {job.elapsed:.1f}s"
+        )
+        return job
+    
+    def _encode_batch(
+        self,
+        faqs: List[Dict[str, str]],
+        job: IngestJob,
+        state: Dict[str, Any],
+        checkpoint: IngestCheckpoint,
+        staged_faqs: List[Dict[str, str]],
+        staged_embeddings: List[np.ndarray]
+    ) -> None:
+        """Encode satu batch pertanyaan, simpan ke checkpoint dan log progress"""
+        service = self.kb.embedding_service
+        started = time.perf_counter()
+        embeddings = service.normalize(service.encode([faq["question"] for faq in faqs]))
+        job.encode_seconds += time.perf_counter() - started
+        
+        state.update(
+            rows=job.rows_read, batches=state["batches"] + 1,
+            invalid=job.invalid, duplicates=job.duplicates
+        )
+        checkpoint.save_batch(state["batches"] - 1, faqs, embeddings, state)
+        staged_faqs.extend(faqs)
+        staged_embeddings.append(embeddings)
+        job.encoded += len(faqs)
+        
+        progress = job.to_dict()
+        logger.info(
+            f"Ingest {job.job_id}: {job.rows_read} rows read, {job.encoded} encoded, "
+            f"{job.duplicates} duplicates, {job.invalid} invalid "
+            f"({progress['rows_per_second']} rows/s, {progress['encoded_per_second']} encodes/s)"
+        )
+
+
+class IngestManager:
+    """
+    Job ingest dari HTTP: upload disimpan ke INGEST_DIR/uploads/<job_id>.<fmt>
+    (satu file per job, dihapus setelah job selesai) lalu diproses di satu
+    background thread (job dijalankan berurutan). Status job disimpan
+    di memory; setelah restart, upload ulang file yang sama melanjutkan
+    checkpoint-nya karena job ID diturunkan dari isi file.
+    """
+    
+    def __init__(self, ingest_dir: Optional[str] = None, max_jobs: int = 100):
+        """
+        Inisialisasi IngestManager
+        
+        Args:
+            ingest_dir: Direktori upload dan checkpoint (default: INGEST_DIR)
+            max_jobs: Jumlah status job selesai yang disimpan
+        """
+        self.ingest_dir = ingest_dir or settings.INGEST_DIR
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    async def save_upload(self, chunks: AsyncIterator[bytes], fmt: str, max_bytes: int) -> Tuple[str, str]:
+        """
+        Stream request body ke file upload
+        
+        Args:
+            chunks: Async iterator of raw bytes (request.stream())
+            fmt: "csv" atau "jsonl"
+            max_bytes: Ukuran maksimal upload
+            
+        Returns:
+            (path file upload sementara dengan nama unik, SHA-256 isi file)
+            
+        Raises:
+            IngestError: Upload kosong
+            UploadTooLargeError: Upload melebihi max_bytes
+        """
+        directory = os.path.join(self.ingest_dir, "uploads")
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, path = tempfile.mkstemp(dir=directory, prefix="upload-", suffix=f".{fmt}")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLargeError(f"Upload melebihi {max_bytes // (1024 * 1024)} MB")
+                    digest.update(chunk)
+                    f.write(chunk)
+            if size == 0:
+                raise IngestError("Upload kosong")
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return path, digest.hexdigest()
+    
+    def submit(
+        self,
+        kb: KnowledgeBase,
+        path: str,
+        fmt: str,
+        fingerprint: str,
+        job_id: Optional[str] = None
+    ) -> IngestJob:
+        """
+        Jadwalkan job ingest (job dengan ID yang sama dan masih berjalan dikembalikan
+        apa adanya). File upload dipindah ke path milik job, sehingga job lain
+        dengan isi file yang sama (tenant/job ID berbeda) tidak saling menghapus input.
+        
+        Args:
+            kb: Knowledge base tujuan
+            path: File upload (dari save_upload, menjadi milik job atau dihapus)
+            fmt: "csv" atau "jsonl"
+            fingerprint: SHA-256 file upload
+            job_id: ID job (default: dari isi file dan tenant)
+            
+        Returns:
+            IngestJob
+            
+        Raises:
+            IngestError: job_id tidak valid
+        """
+        validate_job_id(job_id)
+        job_id = job_id or default_job_id(fingerprint, kb.tenant_id)
+        
+        with self._lock:
+            existing = self._jobs.get(job_id)
+            if existing is not None and existing.status in ACTIVE_STATUSES:
+                os.remove(path)
+                return existing
+            job_path = os.path.join(os.path.dirname(path), f"{job_id}.{fmt}")
+            os.replace(path, job_path)
+            path = job_path
+            job = IngestJob(job_id, kb.tenant_id, path)
+            self._jobs[job_id] = job
+            self._jobs.move_to_end(job_id)
+            while len(self._jobs) > self.max_jobs:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.status in ACTIVE_STATUSES:
+                    break
+                del self._jobs[oldest_id]
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+            self._executor.submit(self._run, kb, path, fmt, fingerprint, job)
+        return job
+    
+    def _run(self, kb: KnowledgeBase, path: str, fmt: str, fingerprint: str, job: IngestJob) -> None:
+        try:
+            FAQIngestor(kb, ingest_dir=self.ingest_dir).run(
+                path, fmt, job.job_id, job=job, fingerprint=fingerprint
+            )
+        except Exception:
+            pass  # Sudah dicatat di job.error dan log, checkpoint tetap ada untuk resume
+        finally:
+            # Upload ulang file yang sama jika perlu resume
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        statuses: Dict[str, int] = {}
+        for job in jobs:
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {"jobs": len(jobs), "statuses": statuses}
+    
+    def shutdown(self) -> None:
+        """Stop thread ingest (job yang sedang berjalan bisa di-resume dari checkpoint)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main() -> None:
+    """CLI: python -m app.services.faq_ingest faqs.csv [--tenant ID] [--batch-size N] [--no-resume]"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", help="File CSV (kolom question, answer) atau JSONL")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="Default: dari ekstensi file")
+    parser.add_argument("--tenant", default=None, help="Tenant tujuan (store di TENANT_KB_DIR)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Default: INGEST_BATCH_SIZE")
+    parser.add_argument("--job-id", default=None, help="ID checkpoint (default: dari isi file dan tenant)")
+    parser.add_argument("--no-resume", action="store_true", help="Abaikan checkpoint yang ada")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    
+    if args.tenant and args.tenant != settings.DEFAULT_TENANT_ID:
+        # Store tenant baru dibuat kosong (tidak di-seed dengan DEFAULT_FAQS)
+        store = create_faq_store(settings.TENANT_KB_BACKEND, tenant_store_path(args.tenant), seed=[])
+        kb = KnowledgeBase(store=store, tenant_id=args.tenant)
+    else:
+        kb = knowledge_base
+    if kb.store.backend == "memory":
+        logger.warning("KB_BACKEND=memory: hasil ingest tidak tersimpan setelah proses selesai")
+    
+    job = FAQIngestor(kb, batch_size=args.batch_size).run(
+        args.file, args.format, args.job_id, resume=not args.no_resume
+    )
+    print(json.dumps(job.to_dict(), indent=2))
+
+
+# Singleton instance
+ingest_manager = IngestManager()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+FAQ Store - Pluggable storage backend untuk isi knowledge base
+
+- memory: FAQ default di dalam kode (tidak persisten, perilaku lama)
+- json  : file JSON (list of {"question", "answer"}) atau JSONL (satu FAQ per baris),
+          writer antar proses di-serialize dengan file lock (<path>.lock)
+- sqlite: database SQLite, aman dipakai banyak worker sekaligus
+
+Setiap store punya `version()` yang murah untuk di-poll (mtime file atau
+counter di SQLite yang di-bump oleh trigger), sehingga worker bisa mendeteksi
+perubahan tanpa membaca ulang semua data.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from contextlib import contextmanager
+import copy
+import fcntl
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TENANT_ID_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+
+# Data berdasarkan informasi resmi dari https://kanvas.co.id/
+DEFAULT_FAQS: List[Dict[str, str]] = [
+    {
+        "question": "Apa itu Kanvas Store?",
+        "answer": "Kanvas Store adalah platform e-commerce cross-border S2B2C (Supplier to Business to Consumer) terkemuka di Indonesia. Kami menghubungkan supplier berkualitas dengan toko retail offline, menyediakan solusi terintegrasi untuk pembelian dan display produk, membantu toko retail meningkatkan efisiensi dan profitabilitas bisnis."
+    },
+    {
+        "question": "Apa itu S2B2C?",
+        "answer": "S2B2C adalah model bisnis Supplier to Business to Consumer. Kanvas Store menghubungkan supplier dengan toko retail (Business), yang kemudian menjual ke konsumen akhir (Consumer). Platform kami menjadi jembatan antara supplier dan retail melalui platform digital yang efisien."
+    },
+    {
+        "question": "Apa layanan yang ditawarkan Kanvas Store?",
+        "answer": "Kanvas Store menyediakan 3 layanan unggulan: 1) Supplier Network - Akses ke supplier terverifikasi dari dalam dan luar negeri dengan kualitas produk terjamin dan harga kompetitif. 2) Layanan Logistik Terintegrasi - Pengiriman cepat dengan tracking real-time dan layanan after-sales. 3) Dukungan Retail - Solusi lengkap termasuk display management, training & support, dan analisis penjualan."
+    },
+    {
+        "question": "Siapa yang bisa menggunakan Kanvas Store?",
+        "answer": "Kanvas Store diperuntukkan untuk toko retail offline yang ingin meningkatkan efisiensi operasional dan profitabilitas bisnis. Baik toko kecil maupun retail chain bisa bergabung dengan platform kami untuk mendapatkan akses ke supplier berkualitas dan layanan terintegrasi."
+    },
+    {
+        "question": "Apa keunggulan Kanvas Store?",
+        "answer": "Keunggulan Kanvas Store: 1) Platform S2B2C terkemuka dan 100% terpercaya, 2) Layanan One-Stop dari pembelian hingga display management, 3) Fokus pada retail offline, 4) Supplier terverifikasi dengan produk berkualitas, 5) Sistem logistik efisien dengan tracking real-time, 6) Support lengkap untuk meningkatkan penjualan."
+    },
+    {
+        "question": "Bagaimana cara bergabung dengan Kanvas Store?",
+        "answer": "Untuk bergabung dengan Kanvas Store, Anda bisa menghubungi kami melalui email di cs@kanvas.co.id atau telepon di (021) 123-4567. Tim kami akan membantu proses registrasi dan onboarding. Kunjungi website kami di https://kanvas.co.id/ untuk informasi lebih lanjut."
+    },
+    {
+        "question": "Di mana lokasi Kanvas Store?",
+        "answer": "Kanvas Store berlokasi di Jakarta, Indonesia. Namun layanan kami dapat diakses oleh toko retail di seluruh Indonesia. Kami menghubungkan supplier dari dalam dan luar negeri dengan toko retail lokal."
+    },
+    {
+        "question": "Bagaimana sistem logistik Kanvas Store?",
+        "answer": "Kanvas Store menyediakan layanan logistik terintegrasi dengan fitur pengiriman cepat, tracking real-time untuk memantau pesanan, dan layanan after-sales untuk memastikan kepuasan pelanggan. Sistem logistik kami dirancang khusus untuk efisiensi pengiriman produk ke toko retail."
+    },
+    {
+        "question": "Apa itu Display Management di Kanvas Store?",
+        "answer": "Display Management adalah layanan dukungan retail dari Kanvas Store yang membantu toko retail dalam penataan dan display produk di toko. Layanan ini termasuk training & support serta analisis penjualan untuk membantu meningkatkan performa penjualan toko retail."
+    },
+    {
+        "question": "Bagaimana cara menghubungi Kanvas Store?",
+        "answer": "Anda dapat menghubungi Kanvas Store melalui: Email: cs@kanvas.co.id, Telepon: (021) 123-4567. Kami juga memiliki website resmi di https://kanvas.co.id/. Tim customer service kami siap membantu Anda."
+    },
+    {
+        "question": "Apakah Kanvas Store menyediakan supplier dari luar negeri?",
+        "answer": "Ya, Kanvas Store adalah platform e-commerce cross-border, yang artinya kami menyediakan akses ke supplier berkualitas dari dalam dan luar negeri. Semua supplier telah melalui proses verifikasi untuk memastikan kualitas produk terjamin."
+    },
+    {
+        "question": "Apa yang dimaksud dengan layanan one-stop?",
+        "answer": "Layanan one-stop Kanvas Store berarti kami menyediakan solusi lengkap dan terintegrasi mulai dari pembelian produk, logistik pengiriman, hingga penataan display di toko retail. Toko retail tidak perlu menggunakan berbagai platform berbeda, cukup satu platform untuk semua kebutuhan."
+    }
+]
+
+
+def validate_faq(item: Any) -> Optional[Dict[str, str]]:
+    """Ambil field question/answer yang valid dari satu record, None jika invalid"""
+    if not isinstance(item, dict):
+        return None
+    question = item.get("question")
+    answer = item.get("answer")
+    if not isinstance(question, str) or not isinstance(answer, str):
+        return None
+    question, answer = question.strip(), answer.strip()
+    if not question or not answer:
+        return None
+    return {"question": question, "answer": answer}
+
+
+def read_faq_file(path: str) -> List[Dict[str, str]]:
+    """
+    Baca FAQ dari file JSON (list) atau JSONL (satu object per baris)
+    
+    Args:
+        path: Path file (.json atau .jsonl)
+        
+    Returns:
+        List of FAQ dictionaries (record invalid dilewati)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = json.load(f)
+    
+    faqs = []
+    for i, record in enumerate(records):
+        faq = validate_faq(record)
+        if faq is None:
+            logger.warning(f"Skipping invalid FAQ record #{i} in {path}")
+            continue
+        faqs.append(faq)
+    return faqs
+
+
+class FAQStore:
+    """Base class storage FAQ"""
+    
+    backend = "base"
+    
+    def load(self) -> List[Dict[str, str]]:
+        """
+        Load semua FAQ (urutan stabil)
+        
+        Returns:
+            List of FAQ dictionaries
+        """
+        raise NotImplementedError
+    
+    def version(self) -> str:
+        """
+        Token versi yang murah untuk di-poll, berubah setiap isi store berubah
+        
+        Returns:
+            Version token
+        """
+        raise NotImplementedError
+    
+    def add(self, question: str, answer: str) -> None:
+        """
+        Tambah satu FAQ
+        
+        Args:
+            question: Question text
+            answer: Answer text
+        """
+        self.bulk_import([{"question": question, "answer": answer}])
+    
+    def bulk_import(self, faqs: Iterable[Dict[str, str]], replace: bool = False) -> int:
+        """
+        Import banyak FAQ sekaligus dalam satu write
+        
+        Args:
+            faqs: FAQ dictionaries
+            replace: True = ganti semua isi store, False = append
+            
+        Returns:
+            Jumlah FAQ yang di-import
+        """
+        raise NotImplementedError
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+
+class MemoryFAQStore(FAQStore):
+    """FAQ di memory proses, di-seed dengan DEFAULT_FAQS"""
+    
+    backend = "memory"
+    
+    def __init__(self, faqs: Optional[List[Dict[str, str]]] = None):
+        self._faqs = copy.deepcopy(DEFAULT_FAQS if faqs is None else faqs)
+        self._version = 0
+        self._lock = threading.Lock()
+    
+    def load(self) -> List[Dict[str, str]]:
+        with self._lock:
+            return copy.deepcopy(self._faqs)
+    
+    def version(self) -> str:
+        return str(self._version)
+    
+    def bulk_import(self, faqs: Iterable[Dict[str, str]], replace: bool = False) -> int:
+        valid = [faq for faq in map(validate_faq, faqs) if faq is not None]
+        with self._lock:
+            self._faqs = valid if replace else self._faqs + valid
+            self._version += 1
+        return len(valid)
+
+
+class JSONFAQStore(FAQStore):
+    """
+    FAQ di file JSON/JSONL, ditulis ulang secara atomic (tmp file + rename).
+    Read-modify-write dijaga file lock exclusive (fcntl) di `<path>.lock`,
+    sehingga aman dipakai banyak worker/proses di host yang sama.
+    """
+    
+    backend = "json"
+    
+    def __init__(self, path: str, seed: Optional[List[Dict[str, str]]] = None):
+        """
+        Inisialisasi JSONFAQStore
+        
+        Args:
+            path: Path file (.json atau .jsonl)
+            seed: Isi file baru (default: DEFAULT_FAQS)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(path):
+            with self._locked():
+                if not os.path.exists(path):
+                    self._write(DEFAULT_FAQS if seed is None else seed)
+    
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Lock exclusive antar thread (threading.Lock) dan antar proses (fcntl)"""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def load(self) -> List[Dict[str, str]]:
+        return read_faq_file(self.path)
+    
+    def version(self) -> str:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return "missing"
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+    
+    def _write(self, faqs: List[Dict[str, str]]) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            if self.path.endswith(".jsonl"):
+                for faq in faqs:
+                    f.write(json.dumps(faq, ensure_ascii=False) + "\n")
+            else:
+                json.dump(faqs, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+    
+    def bulk_import(self, faqs: Iterable[Dict[str, str]], replace: bool = False) -> int:
+        valid = [faq for faq in map(validate_faq, faqs) if faq is not None]
+        with self._locked():
+            existing = [] if replace else self.load()
+            self._write(existing + valid)
+        return len(valid)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "path": self.path}
+
+
+class SQLiteFAQStore(FAQStore):
+    """
+    FAQ di SQLite (WAL mode). Counter versi di tabel kb_meta di-bump oleh
+    trigger, jadi edit langsung ke tabel faqs juga terdeteksi oleh worker.
+    """
+    
+    backend = "sqlite"
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS faqs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question TEXT NOT NULL,
+            answer TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS kb_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        INSERT OR IGNORE INTO kb_meta (key, value) VALUES ('version', 0);
+        CREATE TRIGGER IF NOT EXISTS faqs_insert AFTER INSERT ON faqs
+            BEGIN UPDATE kb_meta SET value = value + 1 WHERE key = 'version'; END;
+        CREATE TRIGGER IF NOT EXISTS faqs_update AFTER UPDATE ON faqs
+            BEGIN UPDATE kb_meta SET value = value + 1 WHERE key = 'version'; END;
+        CREATE TRIGGER IF NOT EXISTS faqs_delete AFTER DELETE ON faqs
+            BEGIN UPDATE kb_meta SET value = value + 1 WHERE key = 'version'; END;
+    """
+    
+    def __init__(self, path: str, seed: Optional[List[Dict[str, str]]] = None):
+        """
+        Inisialisasi SQLiteFAQStore
+        
+        Args:
+            path: Path file database
+            seed: Isi database baru (default: DEFAULT_FAQS)
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+        self._seed(DEFAULT_FAQS if seed is None else seed)
+    
+    def _seed(self, faqs: List[Dict[str, str]]) -> None:
+        """
+        Isi database yang belum pernah diisi. Cek versi dan insert berjalan dalam
+        satu transaksi BEGIN IMMEDIATE, jadi worker yang start bersamaan tidak
+        menduplikasi seed.
+        """
+        valid = [faq for faq in map(validate_faq, faqs) if faq is not None]
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                seeded = conn.execute("SELECT value FROM kb_meta WHERE key = 'version'").fetchone()[0]
+                if seeded == 0:
+                    conn.executemany(
+                        "INSERT INTO faqs (question, answer) VALUES (?, ?)",
+                        [(faq["question"], faq["answer"]) for faq in valid]
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Satu koneksi per operasi (aman dipanggil dari thread mana pun), commit saat sukses"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def load(self) -> List[Dict[str, str]]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT question, answer FROM faqs ORDER BY id").fetchall()
+        return [{"question": question, "answer": answer} for question, answer in rows]
+    
+    def version(self) -> str:
+        with self._connect() as conn:
+            return str(conn.execute("SELECT value FROM kb_meta WHERE key = 'version'").fetchone()[0])
+    
+    def bulk_import(self, faqs: Iterable[Dict[str, str]], replace: bool = False) -> int:
+        valid = [faq for faq in map(validate_faq, faqs) if faq is not None]
+        with self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM faqs")
+            conn.executemany(
+                "INSERT INTO faqs (question, answer) VALUES (?, ?)",
+                [(faq["question"], faq["answer"]) for faq in valid]
+            )
+        return len(valid)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "path": self.path}
+
+
+def create_faq_store(
+    backend: Optional[str] = None,
+    path: Optional[str] = None,
+    seed: Optional[List[Dict[str, str]]] = None
+) -> FAQStore:
+    """
+    Factory FAQ store berdasarkan Settings (KB_BACKEND, KB_PATH)
+    
+    Args:
+        backend: "memory", "json" atau "sqlite"
+        path: Path file untuk backend json/sqlite
+        seed: Isi store baru (default: DEFAULT_FAQS)
+        
+    Returns:
+        FAQStore instance
+    """
+    backend = backend or settings.KB_BACKEND
+    path = path or settings.KB_PATH
+    if backend == "memory":
+        return MemoryFAQStore(seed)
+    if backend == "json":
+        return JSONFAQStore(path, seed)
+    if backend == "sqlite":
+        return SQLiteFAQStore(path, seed)
+    raise ValueError(f"Unknown knowledge base backend: {backend}")
+
+
+def tenant_store_path(tenant_id: str, backend: Optional[str] = None) -> str:
+    """
+    Path FAQ store milik tenant di TENANT_KB_DIR
+    
+    Args:
+        tenant_id: ID tenant (huruf, angka, "_" dan "-", maks 64 karakter)
+        backend: "json" atau "sqlite" (default: settings.TENANT_KB_BACKEND)
+        
+    Returns:
+        <dir>/<tenant_id>.db (sqlite), atau <dir>/<tenant_id>.jsonl jika ada, selain itu .json
+    """
+    if not re.match(TENANT_ID_PATTERN, tenant_id):
+        raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+    
+    base = os.path.join(settings.TENANT_KB_DIR, tenant_id)
+    if (backend or settings.TENANT_KB_BACKEND) == "sqlite":
+        return base + ".db"
+    if os.path.exists(base + ".jsonl"):
+        return base + ".jsonl"
+    return base + ".json"
+
@@ -0,0 +1,497 @@
+"""
+History Store - Riwayat chat per session
+
+- HistoryStore : ring buffer in-memory per session (HISTORY_TURNS_PER_SESSION
+                 turn terakhir), session idle di-evict setelah HISTORY_SESSION_TTL
+                 dan total memory dibatasi HISTORY_MAX_BYTES (LRU per session).
+                 Setiap turn menyimpan embedding pesannya, sehingga konteks
+                 follow-up dihitung tanpa encode ulang history.
+- HistoryWriter: persistence async dalam batch (di luar jalur request) ke
+                 backend pluggable (SQLiteHistoryBackend).
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Perkiraan overhead object Python per turn (di luar text dan embedding)
+TURN_OVERHEAD_BYTES = 400
+
+
+class ChatTurn:
+    """Satu pasang pesan user + response chatbot"""
+    
+    def __init__(
+        self,
+        session_key: str,
+        message: str,
+        response: str,
+        method: Optional[str] = None,
+        confidence: Optional[float] = None,
+        matched_question: Optional[str] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        embedding: Optional[np.ndarray] = None,
+        timestamp: Optional[float] = None
+    ):
+        self.session_key = session_key
+        self.message = message
+        self.response = response
+        self.method = method
+        self.confidence = confidence
+        self.matched_question = matched_question
+        self.user_id = user_id
+        self.session_id = session_id
+        self.tenant_id = tenant_id
+        self.embedding = embedding  # Normalized query embedding pesan (cache per turn)
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.nbytes = (
+            TURN_OVERHEAD_BYTES
+            + len(message) + len(response) + len(matched_question or "")
+            + (embedding.nbytes if embedding is not None else 0)
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "session_id": self.session_id,
+            "tenant_id": self.tenant_id,
+            "message": self.message,
+            "response": self.response,
+            "method": self.method,
+            "confidence": self.confidence,
+            "matched_question": self.matched_question,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+        }
+
+
+class SessionHistory:
+    """Ring buffer turn satu session"""
+    
+    def __init__(self, max_turns: int):
+        self.turns: "deque[ChatTurn]" = deque(maxlen=max_turns)
+        self.nbytes = 0
+        self.last_active = time.monotonic()
+
+
+class HistoryStore:
+    """
+    Ring buffer per session dengan eviction session idle dan memory cap.
+    Session disimpan di OrderedDict berurutan dari yang paling lama tidak
+    aktif, sehingga eviction idle maupun LRU cukup mengambil dari depan.
+    """
+    
+    def __init__(
+        self,
+        max_turns: int = 20,
+        session_ttl: float = 1800.0,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        """
+        Inisialisasi HistoryStore
+        
+        Args:
+            max_turns: Jumlah turn per session (turn lama tertimpa)
+            session_ttl: Detik idle sebelum session di-evict (0 = tanpa expiry)
+            max_bytes: Perkiraan total memory semua session (0 = tanpa batas)
+        """
+        self.max_turns = max_turns
+        self.session_ttl = session_ttl
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, SessionHistory]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.turns_recorded = 0
+        self.idle_evictions = 0
+        self.memory_evictions = 0
+    
+    @staticmethod
+    def session_key(
+        session_id: Optional[str],
+        user_id: Optional[str],
+        tenant_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Key session: session_id, fallback ke user_id (satu session per user)
+        
+        Returns:
+            Key atau None jika request tidak punya session_id maupun user_id
+        """
+        if session_id:
+            return f"{tenant_id or ''}:session:{session_id}"
+        if user_id:
+            return f"{tenant_id or ''}:user:{user_id}"
+        return None
+    
+    def append(self, turn: ChatTurn) -> None:
+        """
+        Tambah turn ke ring buffer session-nya
+        
+        Args:
+            turn: ChatTurn (session_key sudah diisi)
+        """
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(turn.session_key)
+            if session is None:
+                session = self._sessions[turn.session_key] = SessionHistory(self.max_turns)
+            else:
+                self._sessions.move_to_end(turn.session_key)
+            
+            if len(session.turns) == session.turns.maxlen:
+                dropped = session.turns[0].nbytes
+                session.nbytes -= dropped
+                self._bytes -= dropped
+            session.turns.append(turn)
+            session.nbytes += turn.nbytes
+            session.last_active = now
+            self._bytes += turn.nbytes
+            self.turns_recorded += 1
+            self._evict(now, keep=turn.session_key)
+    
+    def _evict(self, now: float, keep: Optional[str] = None) -> None:
+        """Evict session idle, lalu session paling lama tidak aktif jika melebihi max_bytes"""
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if key == keep or not self.session_ttl or now - session.last_active <= self.session_ttl:
+                break
+            self._remove(key)
+            self.idle_evictions += 1
+        
+        while self.max_bytes and self._bytes > self.max_bytes and len(self._sessions) > 1:
+            key = next(iter(self._sessions))
+            if key == keep:
+                break
+            self._remove(key)
+            self.memory_evictions += 1
+    
+    def _remove(self, key: str) -> None:
+        self._bytes -= self._sessions.pop(key).nbytes
+    
+    def recent(self, session_key: str, limit: Optional[int] = None) -> List[ChatTurn]:
+        """
+        Turn terakhir sebuah session (urut dari yang paling lama)
+        
+        Args:
+            session_key: Key dari session_key()
+            limit: Jumlah turn maksimal (default: semua di ring buffer)
+            
+        Returns:
+            List of ChatTurn (kosong jika session tidak ada / sudah idle)
+        """
+        with self._lock:
+            session = self._sessions.get(session_key)
+            if session is None:
+                return []
+            if self.session_ttl and time.monotonic() - session.last_active > self.session_ttl:
+                self._remove(session_key)
+                self.idle_evictions += 1
+                return []
+            turns = list(session.turns)
+        return turns[-limit:] if limit else turns
+    
+    def context_embedding(self, session_key: str, turns: int = 3) -> Optional[np.ndarray]:
+        """
+        Embedding konteks percakapan: rata-rata berbobot embedding turn
+        terakhir (turn lebih baru bobotnya lebih besar), dari embedding yang
+        sudah di-cache per turn
+        
+        Args:
+            session_key: Key session
+            turns: Jumlah turn terakhir yang dipakai
+            
+        Returns:
+            Normalized embedding atau None jika belum ada turn dengan embedding
+        """
+        embeddings = [turn.embedding for turn in self.recent(session_key, turns) if turn.embedding is not None]
+        if not embeddings:
+            return None
+        
+        weights = 0.5 ** np.arange(len(embeddings) - 1, -1, -1, dtype=np.float32)
+        context = weights @ np.stack(embeddings)
+        norm = np.linalg.norm(context)
+        return (context / norm).astype(np.float32) if norm else None
+    
+    def user_turns(self, user_id: str, tenant_id: Optional[str] = None, limit: int = 10) -> List[ChatTurn]:
+        """
+        Turn terakhir user di satu tenant dari semua session in-memory-nya
+        
+        Args:
+            user_id: ID user
+            tenant_id: ID tenant (None = tenant default)
+            limit: Jumlah maksimal
+            
+        Returns:
+            List of ChatTurn (terbaru lebih dulu)
+        """
+        with self._lock:
+            turns = [
+                turn
+                for session in self._sessions.values()
+                for turn in session.turns
+                if turn.user_id == user_id and turn.tenant_id == tenant_id
+            ]
+        turns.sort(key=lambda turn: turn.timestamp, reverse=True)
+        return turns[:limit]
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "turns_per_session": self.max_turns,
+                "session_ttl": self.session_ttl,
+                "turns_recorded": self.turns_recorded,
+                "idle_evictions": self.idle_evictions,
+                "memory_evictions": self.memory_evictions,
+            }
+
+
+class HistoryBackend:
+    """Interface persistence riwayat chat"""
+    
+    backend = "base"
+    
+    def save_batch(self, turns: List[ChatTurn]) -> None:
+        raise NotImplementedError
+    
+    def load_user(self, user_id: str, tenant_id: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Riwayat user di satu tenant (None = tenant default), terbaru lebih dulu"""
+        raise NotImplementedError
+
+
+class SQLiteHistoryBackend(HistoryBackend):
+    """Riwayat chat di SQLite (WAL mode), satu transaksi per batch"""
+    
+    backend = "sqlite"
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS chat_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_key TEXT NOT NULL,
+            tenant_id TEXT,
+            user_id TEXT,
+            session_id TEXT,
+            message TEXT NOT NULL,
+            response TEXT NOT NULL,
+            method TEXT,
+            confidence REAL,
+            matched_question TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS chat_history_user ON chat_history (user_id, id);
+        CREATE INDEX IF NOT EXISTS chat_history_session ON chat_history (session_key, id);
+    """
+    
+    def __init__(self, path: str):
+        """
+        Inisialisasi SQLiteHistoryBackend
+        
+        Args:
+            path: Path file database
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Satu koneksi per operasi (aman dipanggil dari thread mana pun), commit saat sukses"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def save_batch(self, turns: List[ChatTurn]) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO chat_history (session_key, tenant_id, user_id, session_id, message, "
+                "response, method, confidence, matched_question, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (turn.session_key, turn.tenant_id, turn.user_id, turn.session_id, turn.message,
+                     turn.response, turn.method, turn.confidence, turn.matched_question, turn.timestamp)
+                    for turn in turns
+                ]
+            )
+    
+    def load_user(self, user_id: str, tenant_id: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT session_key, tenant_id, user_id, session_id, message, response, method, "
+                "confidence, matched_question, created_at FROM chat_history "
+                "WHERE user_id = ? AND tenant_id IS ? ORDER BY id DESC LIMIT ?",
+                (user_id, tenant_id, limit)
+            ).fetchall()
+        return [
+            ChatTurn(
+                session_key=row[0], tenant_id=row[1], user_id=row[2], session_id=row[3],
+                message=row[4], response=row[5], method=row[6], confidence=row[7],
+                matched_question=row[8], timestamp=row[9]
+            ).to_dict()
+            for row in rows
+        ]
+
+
+class HistoryWriter:
+    """
+    Persist turn ke backend di background task: turn dikumpulkan sampai
+    batch_size atau flush_interval detik, lalu ditulis dalam satu transaksi
+    di thread terpisah. Request tidak pernah menunggu disk.
+    """
+    
+    def __init__(
+        self,
+        backend: Optional[HistoryBackend],
+        flush_interval: float = 1.0,
+        batch_size: int = 256,
+        max_queue: int = 10000
+    ):
+        """
+        Inisialisasi HistoryWriter
+        
+        Args:
+            backend: Backend persistence (None = tidak dipersist)
+            flush_interval: Detik maksimal turn menunggu di queue
+            batch_size: Jumlah turn maksimal per write
+            max_queue: Kapasitas queue; jika penuh turn baru di-drop
+        """
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+    
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = loop.create_task(self._run())
+        return self._queue
+    
+    def submit(self, turn: ChatTurn) -> bool:
+        """
+        Antrikan turn untuk dipersist (non-blocking)
+        
+        Args:
+            turn: ChatTurn
+            
+        Returns:
+            True jika masuk queue
+        """
+        if self.backend is None:
+            return False
+        
+        try:
+            self._ensure_started().put_nowait(turn)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+    
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await asyncio.to_thread(self.backend.save_batch, batch)
+                self.written += len(batch)
+                self.batches += 1
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"Failed to persist {len(batch)} chat turns: {str(e)}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def flush(self) -> None:
+        """Tunggu sampai semua turn di queue sudah ditulis"""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+    
+    async def close(self) -> None:
+        """Flush lalu hentikan background task (dipanggil saat shutdown)"""
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.backend if self.backend is not None else "memory",
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+def create_history_backend(backend: Optional[str] = None, path: Optional[str] = None) -> Optional[HistoryBackend]:
+    """
+    Factory backend persistence berdasarkan Settings (HISTORY_BACKEND, HISTORY_PATH)
+    
+    Args:
+        backend: "memory" (tanpa persistence) atau "sqlite"
+        path: Path database untuk backend sqlite
+        
+    Returns:
+        HistoryBackend atau None untuk "memory"
+    """
+    backend = backend or settings.HISTORY_BACKEND
+    if backend == "memory":
+        return None
+    if backend == "sqlite":
+        return SQLiteHistoryBackend(path or settings.HISTORY_PATH)
+    raise ValueError(f"Unknown history backend: {backend}")
+
+
+# Global instances
+history_store = HistoryStore(
+    max_turns=settings.HISTORY_TURNS_PER_SESSION,
+    session_ttl=settings.HISTORY_SESSION_TTL,
+    max_bytes=settings.HISTORY_MAX_BYTES
+)
+history_writer = HistoryWriter(
+    create_history_backend(),
+    flush_interval=settings.HISTORY_FLUSH_INTERVAL,
+    batch_size=settings.HISTORY_FLUSH_BATCH_SIZE,
+    max_queue=settings.HISTORY_QUEUE_SIZE
+)
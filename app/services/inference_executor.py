@@ -0,0 +1,103 @@
+"""
+Inference Executor - Menjalankan model inference di thread pool khusus
+agar event loop uvicorn tidak terblokir (termasuk /health)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import functools
+import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceOverloadedError(Exception):
+    """Antrian inference penuh, request harus ditolak (HTTP 503)"""
+
+
+class InferenceExecutor:
+    """
+    Bounded executor untuk inference. Jumlah job yang sedang berjalan ditambah
+    yang antri dibatasi `max_workers + max_queue`; job berikutnya langsung
+    ditolak dengan InferenceOverloadedError daripada menumpuk latency.
+    """
+    
+    def __init__(self, max_workers: int = 2, max_queue: int = 64):
+        """
+        Inisialisasi InferenceExecutor
+        
+        Args:
+            max_workers: Jumlah thread inference
+            max_queue: Jumlah maksimal job yang menunggu thread kosong
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="inference"
+        )
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+    
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Jalankan fn(*args, **kwargs) di inference thread pool
+        
+        Args:
+            fn: Blocking function (misal EmbeddingService.encode)
+            
+        Returns:
+            Hasil fn
+            
+        Raises:
+            InferenceOverloadedError: Jika antrian sudah penuh
+        """
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise InferenceOverloadedError(
+                f"Inference queue penuh ({self.in_flight}/{self.capacity})"
+            )
+        
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(
+                self._executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+    
+    def shutdown(self) -> None:
+        """Stop thread pool (dipanggil saat aplikasi shutdown)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get statistik executor
+        
+        Returns:
+            Dict dengan workers, queue limit, in-flight, completed, rejected
+        """
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.max_workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+# Singleton instance
+inference_executor = InferenceExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    max_queue=settings.INFERENCE_MAX_QUEUE
+)
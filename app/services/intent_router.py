@@ -0,0 +1,261 @@
+"""
+Intent Router - Fast-path untuk intent trivial (greeting, terima kasih, kontak)
+sebelum pesan sampai ke embedding model.
+
+Semua keyword dikompilasi menjadi satu regex berbentuk trie dengan word
+boundary (\\b), sehingga "hi" tidak lagi match di dalam "hingga" dan satu
+pass regex cukup untuk semua intent.
+
+Tenant default memakai INTENTS_FILE atau DEFAULT_INTENTS (berisi kontak
+Kanvas). Tenant lain memakai <TENANT_KB_DIR>/<tenant_id>.intents.json jika
+ada, selain itu GENERIC_INTENTS (tanpa intent kontak).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import logging
+import os
+import re
+from app.core.config import settings
+from app.core.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Intent tables default. Urutan = prioritas jika beberapa intent match.
+# max_words: intent hanya dijawab jika pesan sependek ini (pesan panjang
+# kemungkinan berisi pertanyaan sungguhan dan diteruskan ke semantic search).
+DEFAULT_INTENTS: Dict[str, Dict[str, Any]] = {
+    "contact": {
+        "keywords": [
+            "kontak", "hubungi", "menghubungi", "nomor telepon", "no telepon", "telepon",
+            "telp", "email", "whatsapp", "customer service",
+        ],
+        "response": "Anda dapat menghubungi Kanvas Store melalui: Email: cs@kanvas.co.id, Telepon: (021) 123-4567. Kami juga memiliki website resmi di https://kanvas.co.id/. Tim customer service kami siap membantu Anda.",
+        "max_words": 6,
+    },
+    "thanks": {
+        "keywords": [
+            "terima kasih", "terimakasih", "makasih", "thanks", "thank you", "thx", "tengkyu",
+        ],
+        "response": "Sama-sama! Senang bisa membantu. Jika ada pertanyaan lain tentang Kanvas, silakan tanya saja.",
+        "max_words": 5,
+    },
+    "greeting": {
+        "keywords": [
+            "halo", "hallo", "hai", "hello", "hi", "hey",
+            "selamat pagi", "selamat siang", "selamat sore", "selamat malam",
+        ],
+        "response": "Halo! Selamat datang di Kanvas Chatbot. Saya menggunakan AI untuk menjawab pertanyaan Anda. Silakan tanya apa saja!",
+        "max_words": 4,
+    },
+}
+
+# Intent tables tenant tanpa file intents sendiri: tanpa brand dan tanpa
+# kontak (pertanyaan kontak diteruskan ke FAQ tenant)
+GENERIC_INTENTS: Dict[str, Dict[str, Any]] = {
+    "thanks": {
+        "keywords": DEFAULT_INTENTS["thanks"]["keywords"],
+        "response": "Sama-sama! Senang bisa membantu. Jika ada pertanyaan lain, silakan tanya saja.",
+        "max_words": 5,
+    },
+    "greeting": {
+        "keywords": DEFAULT_INTENTS["greeting"]["keywords"],
+        "response": "Halo! Selamat datang. Saya menggunakan AI untuk menjawab pertanyaan Anda. Silakan tanya apa saja!",
+        "max_words": 4,
+    },
+}
+
+
+def load_intents(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Load intent tables dari file JSON
+    
+    Args:
+        path: Path file ({name: {"keywords", "response", "max_words"}})
+        
+    Returns:
+        Intent tables
+    """
+    with open(path, encoding="utf-8") as f:
+        intents = json.load(f)
+    logger.info(f"Loaded {len(intents)} intents from {path}")
+    return intents
+
+
+def tenant_intents_path(tenant_id: str) -> str:
+    """Path file intents tenant: <TENANT_KB_DIR>/<tenant_id>.intents.json"""
+    return os.path.join(settings.TENANT_KB_DIR, f"{tenant_id}.intents.json")
+
+
+def create_tenant_intent_router(tenant_id: str) -> "IntentRouter":
+    """
+    IntentRouter untuk tenant non-default
+    
+    Args:
+        tenant_id: ID tenant (sudah divalidasi)
+        
+    Returns:
+        IntentRouter dengan intents file tenant, atau GENERIC_INTENTS jika tidak ada
+    """
+    path = tenant_intents_path(tenant_id)
+    if os.path.exists(path):
+        return IntentRouter(load_intents(path))
+    return IntentRouter(GENERIC_INTENTS)
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Susun regex dari trie keyword, contoh ["hai", "halo", "hi"] -> h(?:a(?:i|lo)|i)
+    
+    Args:
+        words: List of keywords (sudah normalized)
+        
+    Returns:
+        Regex pattern (tanpa word boundary)
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def node_pattern(node: Dict[str, Any]) -> str:
+        branches = [
+            re.escape(char) + node_pattern(child)
+            for char, child in sorted(node.items())
+            if char != ""
+        ]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+    
+    return node_pattern(trie)
+
+
+class IntentRouter:
+    """Compiled keyword matcher untuk intent yang bisa dijawab tanpa model"""
+    
+    def __init__(self, intents: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Inisialisasi IntentRouter
+        
+        Args:
+            intents: Intent tables {name: {"keywords", "response", "max_words"}}
+                (default: INTENTS_FILE jika diset, selain itu DEFAULT_INTENTS)
+        """
+        self.intents = intents if intents is not None else self._load_intents()
+        self._keyword_intents: Dict[str, str] = {}
+        for name, intent in self.intents.items():
+            for keyword in intent["keywords"]:
+                self._keyword_intents.setdefault(normalize_text(keyword), name)
+        
+        self._priority = {name: i for i, name in enumerate(self.intents)}
+        self._pattern = re.compile(r"\b(?:" + _trie_pattern(list(self._keyword_intents)) + r")\b")
+        
+        self.checks = 0
+        self.hits: Dict[str, int] = {name: 0 for name in self.intents}
+    
+    def _load_intents(self) -> Dict[str, Dict[str, Any]]:
+        """Load intent tables dari INTENTS_FILE (JSON), fallback ke default"""
+        if not settings.INTENTS_FILE:
+            return DEFAULT_INTENTS
+        return load_intents(settings.INTENTS_FILE)
+    
+    def match(self, message: str) -> Optional[str]:
+        """
+        Cari intent trivial dalam pesan
+        
+        Args:
+            message: Pesan dari user
+            
+        Returns:
+            Nama intent atau None jika pesan perlu semantic search
+        """
+        self.checks += 1
+        text = normalize_text(message)
+        words = len(text.split())
+        
+        best = None
+        for found in self._pattern.finditer(text):
+            name = self._keyword_intents[found.group(0)]
+            if words > self.intents[name].get("max_words", words):
+                continue
+            if best is None or self._priority[name] < self._priority[best]:
+                best = name
+        
+        if best is not None:
+            self.hits[best] += 1
+        return best
+    
+    def record_cached(self, method: str) -> None:
+        """
+        Catat response yang dilayani dari response cache (router tidak
+        dijalankan), supaya counter tetap menghitung pesan yang berulang
+        
+        Args:
+            method: Method response yang di-cache (nama intent jika dari fast-path)
+        """
+        self.checks += 1
+        if method in self.hits:
+            self.hits[method] += 1
+    
+    def route(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Jawab pesan lewat fast-path jika match dengan salah satu intent
+        
+        Args:
+            message: Pesan dari user
+            
+        Returns:
+            Dict response atau None
+        """
+        name = self.match(message)
+        if name is None:
+            return None
+        
+        return {
+            "response": self.intents[name]["response"],
+            "method": name,
+            "confidence": 1.0
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        return aggregate_stats([self])
+
+
+def aggregate_stats(routers: Iterable[IntentRouter]) -> Dict[str, Any]:
+    """
+    Statistik gabungan beberapa router (misal router semua tenant yang ter-load)
+    
+    Args:
+        routers: IntentRouter (router yang sama cukup dihitung sekali)
+        
+    Returns:
+        Dict checks, hits per intent, misses dan hit rate
+    """
+    checks = 0
+    hits: Dict[str, int] = {}
+    for router in {id(router): router for router in routers}.values():
+        checks += router.checks
+        for name, count in router.hits.items():
+            hits[name] = hits.get(name, 0) + count
+    
+    total_hits = sum(hits.values())
+    return {
+        "checks": checks,
+        "hits": hits,
+        "misses": checks - total_hits,
+        "hit_rate": total_hits / checks if checks else 0.0,
+        "hit_rate_by_intent": {
+            name: count / checks if checks else 0.0
+            for name, count in hits.items()
+        },
+    }
+
+
+# Global instance (tenant default)
+intent_router = IntentRouter()
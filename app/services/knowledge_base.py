@@ -1,81 +1,473 @@
 """
-Knowledge Base - FAQ dan data untuk chatbot
+Knowledge Base - FAQ dan data untuk chatbot (satu knowledge base per tenant)
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import numpy as np
 import logging
+import os
+import threading
+from app.core.config import settings
+from app.core.text import question_key
+from app.services.embedding_service import embedding_service, top_k_indices
+from app.services.embedding_store import get_embedding_store, text_hash
+from app.services.faq_store import FAQStore, create_faq_store, tenant_store_path
+from app.services.intent_router import IntentRouter, create_tenant_intent_router, intent_router as default_intent_router
+from app.services.lexical_index import BM25Index, reciprocal_rank_fusion
+from app.services.vector_index import SearchResult, VectorIndex, create_index, recall_at_k
 
 logger = logging.getLogger(__name__)
 
 
+class KnowledgeBaseSnapshot:
+    """
+    View knowledge base yang immutable: FAQ, embedding matrix, vector index dan
+    lexical index yang konsisten satu sama lain. Setelah dipublish tidak pernah
+    diubah; writer membuat snapshot baru dan mem-publish-nya dengan satu
+    assignment, sehingga reader cukup mengambil satu reference tanpa lock.
+    """
+    
+    def __init__(
+        self,
+        faqs: Tuple[Dict[str, str], ...],
+        lexical: BM25Index,
+        embeddings: Optional[np.ndarray] = None,
+        embeddings_model: Optional[str] = None,
+        index: Optional[VectorIndex] = None,
+        version: int = 0
+    ):
+        """
+        Inisialisasi KnowledgeBaseSnapshot
+        
+        Args:
+            faqs: FAQ (baris ke-i = row ke-i embedding matrix)
+            lexical: BM25 index atas FAQ yang sama
+            embeddings: Normalized embedding matrix (None = belum di-build)
+            embeddings_model: Model ID yang menghasilkan embeddings
+            index: Vector index atas embeddings
+            version: Di-bump setiap isi knowledge base berubah
+        """
+        self.faqs = tuple(faqs)
+        self.lexical = lexical
+        self.embeddings = embeddings
+        self.embeddings_model = embeddings_model
+        self.index = index if index is not None else create_index()
+        self.version = version
+        self._content_hash: Optional[str] = None
+    
+    @property
+    def content_hash(self) -> str:
+        """
+        Hash isi FAQ (pertanyaan + jawaban, urutan ikut). Berbeda dengan
+        `version` (counter per proses), hash ini sama di semua worker dan
+        setelah restart selama isi knowledge base sama.
+        """
+        if self._content_hash is None:
+            digest = hashlib.sha256()
+            for faq in self.faqs:
+                digest.update(faq["question"].encode("utf-8") + b"\x00")
+                digest.update(faq["answer"].encode("utf-8") + b"\x01")
+            self._content_hash = digest.hexdigest()[:16]
+        return self._content_hash
+    
+    def is_ready_for(self, model_id: str) -> bool:
+        """True jika embedding matrix sudah di-build untuk model_id"""
+        if self.embeddings_model != model_id:
+            return False
+        return self.embeddings is not None or not self.faqs
+    
+    def get_all_questions(self) -> List[str]:
+        return [faq["question"] for faq in self.faqs]
+    
+    def get_faq(self, question_index: int) -> Optional[Dict[str, str]]:
+        if 0 <= question_index < len(self.faqs):
+            return self.faqs[question_index]
+        return None
+    
+    def get_answer(self, question_index: int) -> Optional[str]:
+        faq = self.get_faq(question_index)
+        return faq["answer"] if faq is not None else None
+    
+    def search(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        query_texts: Optional[List[str]] = None
+    ) -> List[List[Tuple[int, str, float]]]:
+        """
+        Cari FAQ paling mirip untuk setiap query
+        
+        Args:
+            query_embeddings: Normalized query matrix (Q x dim)
+            top_k: Number of top results per query
+            query_texts: Query texts asli (untuk HYBRID_MODE prefilter/rrf)
+            
+        Returns:
+            List (per query) of (index, question, similarity_score)
+        """
+        if self.embeddings is None:
+            return [[] for _ in range(len(query_embeddings))]
+        
+        if query_texts is None or settings.HYBRID_MODE == "off":
+            hits = self.index.search(query_embeddings, top_k)
+        else:
+            hits = [
+                self._hybrid_search(query_embedding, query_text, top_k)
+                for query_embedding, query_text in zip(query_embeddings, query_texts)
+            ]
+        
+        return [
+            [
+                (int(idx), self.faqs[idx]["question"], float(score))
+                for idx, score in zip(indices, scores)
+            ]
+            for indices, scores in hits
+        ]
+    
+    def _hybrid_search(
+        self,
+        query_embedding: np.ndarray,
+        query_text: str,
+        top_k: int
+    ) -> SearchResult:
+        """
+        Hybrid lexical + dense retrieval sesuai HYBRID_MODE:
+        - prefilter: dense scoring hanya atas kandidat BM25 (untuk KB besar)
+        - rrf: ranking dense dan BM25 digabung dengan Reciprocal Rank Fusion
+        Score yang dikembalikan selalu cosine similarity dense.
+        """
+        if settings.HYBRID_MODE == "prefilter":
+            candidate_ids = self.prefilter_candidates(query_text)
+            if candidate_ids is not None:
+                scores = np.asarray(self.embeddings[candidate_ids]) @ query_embedding
+                best = top_k_indices(scores, top_k)
+                return candidate_ids[best], scores[best]
+            return self.index.search(query_embedding[np.newaxis, :], top_k)[0]
+        
+        if settings.HYBRID_MODE == "rrf":
+            depth = max(top_k, settings.RRF_DEPTH)
+            dense_ids, _ = self.index.search(query_embedding[np.newaxis, :], depth)[0]
+            lexical_ids, _ = self.lexical.search(query_text, depth)
+            fused = reciprocal_rank_fusion([dense_ids, lexical_ids], k=settings.RRF_K)[:top_k]
+            ids = np.asarray(fused, dtype=np.int64)
+            return ids, np.asarray(self.embeddings[ids]) @ query_embedding
+        
+        raise ValueError(f"Unknown hybrid mode: {settings.HYBRID_MODE}")
+    
+    def prefilter_candidates(self, query_text: str) -> Optional[np.ndarray]:
+        """
+        Kandidat BM25 untuk HYBRID_MODE=prefilter. None (= full dense scan)
+        jika KB lebih kecil dari LEXICAL_PREFILTER_MIN_SIZE, atau BM25 tidak
+        cukup selektif: kandidat kurang dari LEXICAL_PREFILTER_K (query hampir
+        tanpa term yang cocok, misal parafrase) atau skor terbaik di bawah
+        LEXICAL_PREFILTER_MIN_SCORE (hanya term umum yang cocok).
+        Tidak ada jaminan recall: jika kandidat dipakai, FAQ di luar top
+        LEXICAL_PREFILTER_K BM25 tidak ikut di-score (lihat HYBRID_MODE di config).
+        
+        Args:
+            query_text: Query text
+            
+        Returns:
+            Doc ids kandidat (ascending) atau None
+        """
+        if len(self.faqs) < settings.LEXICAL_PREFILTER_MIN_SIZE:
+            return None
+        candidate_ids, scores = self.lexical.search(query_text, settings.LEXICAL_PREFILTER_K)
+        if len(candidate_ids) < settings.LEXICAL_PREFILTER_K or scores[0] < settings.LEXICAL_PREFILTER_MIN_SCORE:
+            return None
+        return np.sort(candidate_ids)
+
+
+def _lexical_document(faq: Dict[str, str]) -> str:
+    """Text yang di-index lexical untuk satu FAQ (pertanyaan + jawaban)"""
+    return f"{faq['question']} {faq['answer']}"
+
+
+def build_lexical_index(faqs: List[Dict[str, str]]) -> BM25Index:
+    """BM25 index atas pertanyaan + jawaban FAQ"""
+    lexical = BM25Index()
+    lexical.add_documents([_lexical_document(faq) for faq in faqs])
+    return lexical
+
+
 class KnowledgeBase:
-    """Knowledge base untuk FAQ dan informasi chatbot"""
+    """
+    Knowledge base untuk FAQ dan informasi chatbot.
+    
+    State disimpan sebagai KnowledgeBaseSnapshot (copy-on-write): reader
+    memakai `get_snapshot()` sekali per request, writer (add_faq, append_faqs,
+    reload, build embeddings) di-serialize oleh satu lock dan mem-publish snapshot baru.
+    Dengan embedding cache aktif, matrix snapshot adalah memmap file cache.
+    """
     
-    def __init__(self):
-        """Inisialisasi knowledge base dengan FAQ"""
-        self.faqs = self._load_faqs()
-        logger.info(f"Loaded {len(self.faqs)} FAQs")
+    def __init__(
+        self,
+        store: Optional[FAQStore] = None,
+        tenant_id: Optional[str] = None,
+        intent_router: Optional[IntentRouter] = None
+    ):
+        """
+        Inisialisasi knowledge base dengan FAQ.
+        Embedding matrix di-build saat pertama kali dibutuhkan atau saat warmup.
+        
+        Args:
+            store: FAQ storage backend (default: sesuai KB_BACKEND)
+            tenant_id: Tenant pemilik knowledge base (None = tenant default)
+            intent_router: Intent router fast-path tenant (default: intent router tenant default)
+        """
+        self.embedding_service = embedding_service
+        self.tenant_id = tenant_id
+        self.intent_router = intent_router or default_intent_router
+        self.store = store or create_faq_store()
+        self._store_version: Optional[str] = None
+        faqs = self._load_faqs()
+        self._snapshot = KnowledgeBaseSnapshot(faqs, build_lexical_index(faqs))
+        self._write_lock = threading.RLock()
+        logger.info(f"Loaded {len(faqs)} FAQs" + (f" for tenant {tenant_id}" if tenant_id else ""))
     
     def _load_faqs(self) -> List[Dict[str, str]]:
         """
-        Load FAQs dari data
-        Sumber: https://kanvas.co.id/
+        Load FAQs dari storage backend (KB_BACKEND)
+        Sumber data default: https://kanvas.co.id/
         
         Returns:
             List of FAQ dictionaries
         """
-        # TODO: Load from database atau file JSON
-        # Data berdasarkan informasi resmi dari https://kanvas.co.id/
-        return [
-            {
-                "question": "Apa itu Kanvas Store?",
-                "answer": "Kanvas Store adalah platform e-commerce cross-border S2B2C (Supplier to Business to Consumer) terkemuka di Indonesia. Kami menghubungkan supplier berkualitas dengan toko retail offline, menyediakan solusi terintegrasi untuk pembelian dan display produk, membantu toko retail meningkatkan efisiensi dan profitabilitas bisnis."
-            },
-            {
-                "question": "Apa itu S2B2C?",
-                "answer": "S2B2C adalah model bisnis Supplier to Business to Consumer. Kanvas Store menghubungkan supplier dengan toko retail (Business), yang kemudian menjual ke konsumen akhir (Consumer). Platform kami menjadi jembatan antara supplier dan retail melalui platform digital yang efisien."
-            },
-            {
-                "question": "Apa layanan yang ditawarkan Kanvas Store?",
-                "answer": "Kanvas Store menyediakan 3 layanan unggulan: 1) Supplier Network - Akses ke supplier terverifikasi dari dalam dan luar negeri dengan kualitas produk terjamin dan harga kompetitif. 2) Layanan Logistik Terintegrasi - Pengiriman cepat dengan tracking real-time dan layanan after-sales. 3) Dukungan Retail - Solusi lengkap termasuk display management, training & support, dan analisis penjualan."
-            },
-            {
-                "question": "Siapa yang bisa menggunakan Kanvas Store?",
-                "answer": "Kanvas Store diperuntukkan untuk toko retail offline yang ingin meningkatkan efisiensi operasional dan profitabilitas bisnis. Baik toko kecil maupun retail chain bisa bergabung dengan platform kami untuk mendapatkan akses ke supplier berkualitas dan layanan terintegrasi."
-            },
-            {
-                "question": "Apa keunggulan Kanvas Store?",
-                "answer": "Keunggulan Kanvas Store: 1) Platform S2B2C terkemuka dan 100% terpercaya, 2) Layanan One-Stop dari pembelian hingga display management, 3) Fokus pada retail offline, 4) Supplier terverifikasi dengan produk berkualitas, 5) Sistem logistik efisien dengan tracking real-time, 6) Support lengkap untuk meningkatkan penjualan."
-            },
-            {
-                "question": "Bagaimana cara bergabung dengan Kanvas Store?",
-                "answer": "Untuk bergabung dengan Kanvas Store, Anda bisa menghubungi kami melalui email di cs@kanvas.co.id atau telepon di (021) 123-4567. Tim kami akan membantu proses registrasi dan onboarding. Kunjungi website kami di https://kanvas.co.id/ untuk informasi lebih lanjut."
-            },
-            {
-                "question": "Di mana lokasi Kanvas Store?",
-                "answer": "Kanvas Store berlokasi di Jakarta, Indonesia. Namun layanan kami dapat diakses oleh toko retail di seluruh Indonesia. Kami menghubungkan supplier dari dalam dan luar negeri dengan toko retail lokal."
-            },
-            {
-                "question": "Bagaimana sistem logistik Kanvas Store?",
-                "answer": "Kanvas Store menyediakan layanan logistik terintegrasi dengan fitur pengiriman cepat, tracking real-time untuk memantau pesanan, dan layanan after-sales untuk memastikan kepuasan pelanggan. Sistem logistik kami dirancang khusus untuk efisiensi pengiriman produk ke toko retail."
-            },
-            {
-                "question": "Apa itu Display Management di Kanvas Store?",
-                "answer": "Display Management adalah layanan dukungan retail dari Kanvas Store yang membantu toko retail dalam penataan dan display produk di toko. Layanan ini termasuk training & support serta analisis penjualan untuk membantu meningkatkan performa penjualan toko retail."
-            },
-            {
-                "question": "Bagaimana cara menghubungi Kanvas Store?",
-                "answer": "Anda dapat menghubungi Kanvas Store melalui: Email: cs@kanvas.co.id, Telepon: (021) 123-4567. Kami juga memiliki website resmi di https://kanvas.co.id/. Tim customer service kami siap membantu Anda."
-            },
-            {
-                "question": "Apakah Kanvas Store menyediakan supplier dari luar negeri?",
-                "answer": "Ya, Kanvas Store adalah platform e-commerce cross-border, yang artinya kami menyediakan akses ke supplier berkualitas dari dalam dan luar negeri. Semua supplier telah melalui proses verifikasi untuk memastikan kualitas produk terjamin."
-            },
-            {
-                "question": "Apa yang dimaksud dengan layanan one-stop?",
-                "answer": "Layanan one-stop Kanvas Store berarti kami menyediakan solusi lengkap dan terintegrasi mulai dari pembelian produk, logistik pengiriman, hingga penataan display di toko retail. Toko retail tidak perlu menggunakan berbagai platform berbeda, cukup satu platform untuk semua kebutuhan."
-            }
-        ]
+        self._store_version = self.store.version()
+        return self.store.load()
+    
+    @property
+    def snapshot(self) -> KnowledgeBaseSnapshot:
+        """Snapshot yang sedang dipublish (tanpa memastikan embedding sudah di-build)"""
+        return self._snapshot
+    
+    @property
+    def faqs(self) -> Tuple[Dict[str, str], ...]:
+        return self._snapshot.faqs
+    
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+    
+    def _publish(self, snapshot: KnowledgeBaseSnapshot) -> None:
+        """Pasang snapshot baru (satu reference assignment, atomic untuk reader)"""
+        self._snapshot = snapshot
+    
+    def _build_embeddings(self) -> None:
+        """
+        Encode semua pertanyaan FAQ sekali dan publish snapshot dengan matrix
+        L2-normalized dan vector index-nya. Dipanggil dengan _write_lock.
+        """
+        snapshot = self._snapshot
+        questions = snapshot.get_all_questions()
+        model_id = self.embedding_service.model_id
+        embeddings = None
+        index = create_index()
+        
+        if questions:
+            logger.info(f"Building embedding matrix for {len(questions)} FAQs")
+            store = get_embedding_store(model_id, self.tenant_id)
+            if store is not None:
+                embeddings = store.load_or_build(
+                    questions, self.embedding_service.encode_normalized
+                )
+            else:
+                embeddings = self.embedding_service.encode_normalized(questions)
+            index.build(embeddings)
+            # Matrix milik index (QuantizedIndex memindahkannya ke memmap)
+            embeddings = index.vectors
+        
+        self._publish(KnowledgeBaseSnapshot(
+            snapshot.faqs, snapshot.lexical, embeddings, model_id, index, snapshot.version
+        ))
+    
+    def _persist_embeddings(self, questions: List[str], embeddings: np.ndarray) -> np.ndarray:
+        """
+        Tulis embedding matrix penuh ke disk cache (jika di-enable)
+        
+        Args:
+            questions: Pertanyaan FAQ, row-aligned dengan embeddings
+            embeddings: Normalized embedding matrix (N x dim)
+            
+        Returns:
+            Matrix tersimpan sebagai memmap, atau embeddings jika cache tidak dipakai
+        """
+        store = get_embedding_store(self.embedding_service.model_id, self.tenant_id)
+        if store is None:
+            return embeddings
+        
+        try:
+            return store.save(embeddings, [text_hash(q) for q in questions])
+        except OSError as e:
+            logger.warning(f"Failed to write embedding cache: {e}")
+            return embeddings
+    
+    def _extended_index(
+        self,
+        snapshot: KnowledgeBaseSnapshot,
+        questions: List[str],
+        embeddings: np.ndarray
+    ) -> VectorIndex:
+        """
+        Copy index snapshot dan tambahkan embedding baru. Baris baru di-append
+        ke disk cache (hanya baris baru yang ditulis) dan index baru memakai
+        memmap hasil append sebagai matrix-nya, sehingga tidak ada copy
+        matrix lama di heap. Jika cache tidak sinkron dengan snapshot (misal
+        ditulis proses lain), matrix ditulis ulang penuh.
+        
+        Args:
+            snapshot: Snapshot saat ini (embedding sudah di-build)
+            questions: Pertanyaan baru
+            embeddings: Normalized embedding matrix pertanyaan baru
+            
+        Returns:
+            VectorIndex baru
+        """
+        stored = None
+        store = get_embedding_store(self.embedding_service.model_id, self.tenant_id)
+        if store is not None:
+            current = snapshot.get_all_questions() if snapshot.embeddings is not None else []
+            try:
+                stored = store.append(
+                    embeddings, [text_hash(q) for q in questions],
+                    len(current), text_hash(current[-1]) if current else None
+                )
+                if stored is None:
+                    full = embeddings if not current else np.vstack([snapshot.embeddings, embeddings])
+                    stored = store.save(full, [text_hash(q) for q in current + questions])
+            except OSError as e:
+                logger.warning(f"Failed to write embedding cache: {e}")
+                stored = None
+        
+        if snapshot.embeddings is None:
+            index = create_index()
+            index.build(embeddings if stored is None else stored)
+        else:
+            index = snapshot.index.copy()
+            index.add(embeddings, stored)
+        return index
+    
+    def invalidate_embeddings(self) -> None:
+        """Hapus embedding matrix, akan di-build ulang saat dibutuhkan"""
+        with self._write_lock:
+            snapshot = self._snapshot
+            self._publish(KnowledgeBaseSnapshot(snapshot.faqs, snapshot.lexical, version=snapshot.version))
+    
+    def get_snapshot(self) -> KnowledgeBaseSnapshot:
+        """
+        Snapshot yang siap dipakai untuk search (embedding di-build untuk
+        model saat ini jika belum). Reader sebaiknya memanggil ini sekali per
+        request dan memakai snapshot yang sama untuk search dan ambil jawaban.
+        
+        Returns:
+            KnowledgeBaseSnapshot
+        """
+        model_id = self.embedding_service.model_id
+        snapshot = self._snapshot
+        if not snapshot.is_ready_for(model_id):
+            with self._write_lock:
+                snapshot = self._snapshot
+                if not snapshot.is_ready_for(model_id):
+                    self._build_embeddings()
+                    snapshot = self._snapshot
+        return snapshot
+    
+    def get_embeddings(self) -> Optional[np.ndarray]:
+        """
+        Get embedding matrix FAQ (N x dim), build ulang jika model berubah
+        
+        Returns:
+            Normalized embedding matrix atau None jika knowledge base kosong
+        """
+        return self.get_snapshot().embeddings
+    
+    @property
+    def is_ready(self) -> bool:
+        """True jika embedding matrix sudah di-build untuk model saat ini"""
+        return self._snapshot.is_ready_for(self.embedding_service.model_id)
+    
+    def warmup(self) -> None:
+        """Build embedding matrix sekarang (dipanggil dari background warmup)"""
+        self.get_snapshot()
+    
+    def search_by_embedding(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 3,
+        query_text: Optional[str] = None,
+        snapshot: Optional[KnowledgeBaseSnapshot] = None
+    ) -> List[Tuple[int, str, float]]:
+        """
+        Cari FAQ yang paling mirip dengan query embedding yang sudah di-encode
+        
+        Args:
+            query_embedding: Query embedding (belum perlu di-normalize)
+            top_k: Number of top results
+            query_text: Query text asli, dipakai untuk hybrid lexical retrieval
+            snapshot: Snapshot yang dipakai (default: get_snapshot())
+            
+        Returns:
+            List of (index, question, similarity_score)
+        """
+        query_texts = [query_text] if query_text is not None else None
+        return self.search_by_embeddings(
+            query_embedding[np.newaxis, :], top_k, query_texts, snapshot
+        )[0]
+    
+    def search_by_embeddings(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 3,
+        query_texts: Optional[List[str]] = None,
+        snapshot: Optional[KnowledgeBaseSnapshot] = None
+    ) -> List[List[Tuple[int, str, float]]]:
+        """
+        Versi batch dari search_by_embedding (satu matrix-matrix product)
+        
+        Args:
+            query_embeddings: Query embedding matrix (Q x dim)
+            top_k: Number of top results per query
+            query_texts: Query texts asli (untuk HYBRID_MODE prefilter/rrf)
+            snapshot: Snapshot yang dipakai (default: get_snapshot())
+            
+        Returns:
+            List (per query) of (index, question, similarity_score)
+        """
+        snapshot = snapshot or self.get_snapshot()
+        return snapshot.search(
+            self.embedding_service.normalize(query_embeddings), top_k, query_texts
+        )
+    
+    def index_stats(self, recall_sample: int = 0, top_k: int = 10) -> Dict[str, any]:
+        """
+        Statistik vector index, optional dengan recall@k terhadap exact search.
+        Tidak pernah mem-build embedding: jika belum di-build, status "not built".
+        
+        Args:
+            recall_sample: Jumlah FAQ embedding yang dipakai sebagai query uji (0 = skip)
+            top_k: k untuk recall@k
+            
+        Returns:
+            Dict statistik index
+        """
+        snapshot = self._snapshot
+        if not snapshot.is_ready_for(self.embedding_service.model_id):
+            stats = {"status": "not built"}
+        else:
+            stats = {"status": "ready", **snapshot.index.stats()}
+        stats["hybrid_mode"] = settings.HYBRID_MODE
+        stats["lexical"] = snapshot.lexical.stats()
+        if stats["status"] != "ready":
+            return stats
+        embeddings = snapshot.embeddings
+        if recall_sample > 0 and embeddings is not None:
+            rng = np.random.default_rng(0)
+            sample = rng.choice(len(embeddings), min(recall_sample, len(embeddings)), replace=False)
+            stats[f"recall@{top_k}"] = recall_at_k(snapshot.index, np.asarray(embeddings[sample]), top_k)
+        return stats
     
     def get_all_questions(self) -> List[str]:
         """
@@ -84,7 +476,7 @@ class KnowledgeBase:
         Returns:
             List of questions
         """
-        return [faq["question"] for faq in self.faqs]
+        return self._snapshot.get_all_questions()
     
     def get_answer(self, question_index: int) -> Optional[str]:
         """
@@ -96,9 +488,7 @@ class KnowledgeBase:
         Returns:
             Answer string atau None
         """
-        if 0 <= question_index < len(self.faqs):
-            return self.faqs[question_index]["answer"]
-        return None
+        return self._snapshot.get_answer(question_index)
     
     def get_faq(self, question_index: int) -> Optional[Dict[str, str]]:
         """
@@ -110,13 +500,12 @@ class KnowledgeBase:
         Returns:
             FAQ dictionary atau None
         """
-        if 0 <= question_index < len(self.faqs):
-            return self.faqs[question_index]
-        return None
+        return self._snapshot.get_faq(question_index)
     
     def add_faq(self, question: str, answer: str) -> bool:
         """
-        Tambah FAQ baru
+        Tambah FAQ baru (disimpan ke storage backend). Index dan lexical index
+        di-copy lalu di-update incremental, kemudian dipublish sebagai snapshot baru.
         
         Args:
             question: Question text
@@ -125,10 +514,178 @@ class KnowledgeBase:
         Returns:
             True if successful
         """
-        self.faqs.append({"question": question, "answer": answer})
+        with self._write_lock:
+            self.store.add(question, answer)
+            snapshot = self.get_snapshot()
+            new_embedding = self.embedding_service.encode_normalized([question])
+            
+            faq = {"question": question, "answer": answer}
+            lexical = snapshot.lexical.copy()
+            lexical.add_documents([_lexical_document(faq)])
+            index = self._extended_index(snapshot, [question], new_embedding)
+            
+            snapshot = KnowledgeBaseSnapshot(
+                snapshot.faqs + (faq,), lexical, index.vectors,
+                self.embedding_service.model_id, index, snapshot.version + 1
+            )
+            self._publish(snapshot)
         logger.info(f"Added new FAQ: {question}")
         return True
     
+    def append_faqs(self, faqs: List[Dict[str, str]], embeddings: np.ndarray) -> int:
+        """
+        Tambah banyak FAQ yang embedding-nya sudah di-encode (bulk ingestion).
+        Store ditulis sekali, lalu index dan lexical index di-copy, di-update
+        dan dipublish sebagai satu snapshot baru: reader melihat semua FAQ baru
+        sekaligus atau tidak sama sekali. Pertanyaan yang sudah ada di knowledge
+        base (menurut question_key) dilewati.
+        
+        Args:
+            faqs: List of {"question", "answer"} (sudah divalidasi)
+            embeddings: Normalized embedding matrix, row-aligned dengan faqs
+            
+        Returns:
+            Jumlah FAQ yang ditambahkan
+        """
+        with self._write_lock:
+            snapshot = self.get_snapshot()
+            existing = {question_key(q) for q in snapshot.get_all_questions()}
+            keep = [i for i, faq in enumerate(faqs) if question_key(faq["question"]) not in existing]
+            if not keep:
+                return 0
+            faqs = [faqs[i] for i in keep]
+            embeddings = np.asarray(embeddings, dtype=np.float32)[keep]
+            
+            self.store.bulk_import(faqs)
+            lexical = snapshot.lexical.copy()
+            lexical.add_documents([_lexical_document(faq) for faq in faqs])
+            index = self._extended_index(snapshot, [faq["question"] for faq in faqs], embeddings)
+            
+            snapshot = KnowledgeBaseSnapshot(
+                snapshot.faqs + tuple(faqs), lexical, index.vectors,
+                self.embedding_service.model_id, index, snapshot.version + 1
+            )
+            self._publish(snapshot)
+        logger.info(f"Appended {len(faqs)} FAQs (version {snapshot.version})")
+        return len(faqs)
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Sinkronkan dengan storage backend jika versinya berubah. Hanya pertanyaan
+        yang baru/berubah yang di-encode; snapshot baru di-build di samping
+        snapshot lama lalu dipublish, sehingga request tetap dilayani selama reload.
+        
+        Args:
+            force: Reload walaupun token versi store tidak berubah
+            
+        Returns:
+            True jika isi knowledge base berubah
+        """
+        with self._write_lock:
+            store_version = self.store.version()
+            if store_version == self._store_version and not force:
+                return False
+            
+            snapshot = self._snapshot
+            faqs = self.store.load()
+            if faqs == list(snapshot.faqs):
+                self._store_version = store_version
+                return False
+            
+            embeddings = None
+            embeddings_model = None
+            index = create_index()
+            if snapshot.is_ready_for(self.embedding_service.model_id):
+                embeddings_model = snapshot.embeddings_model
+                if faqs:
+                    embeddings = self._persist_embeddings(
+                        [faq["question"] for faq in faqs], self._reembed(snapshot, faqs)
+                    )
+                    index.build(embeddings)
+                    embeddings = index.vectors
+            
+            snapshot = KnowledgeBaseSnapshot(
+                faqs, build_lexical_index(faqs), embeddings, embeddings_model, index, snapshot.version + 1
+            )
+            self._publish(snapshot)
+            self._store_version = store_version
+        
+        logger.info(f"Reloaded knowledge base: {len(faqs)} FAQs (version {snapshot.version})")
+        return True
+    
+    def _reembed(self, snapshot: KnowledgeBaseSnapshot, faqs: List[Dict[str, str]]) -> np.ndarray:
+        """
+        Embedding matrix untuk faqs, memakai ulang baris dari matrix snapshot
+        untuk pertanyaan yang tidak berubah
+        
+        Args:
+            snapshot: Snapshot saat ini (sumber embedding lama)
+            faqs: FAQ list baru
+            
+        Returns:
+            Normalized embedding matrix (N x dim)
+        """
+        current_rows = {text_hash(q): row for row, q in enumerate(snapshot.get_all_questions())}
+        hashes = [text_hash(faq["question"]) for faq in faqs]
+        reused = [i for i, h in enumerate(hashes) if h in current_rows]
+        missing = [i for i, h in enumerate(hashes) if h not in current_rows]
+        
+        # Baris yang sudah di-encode proses lain (misal CLI bulk ingest) diambil dari disk cache
+        disk_rows = {}
+        store = get_embedding_store(snapshot.embeddings_model, self.tenant_id) if missing else None
+        cached = store.load() if store is not None else None
+        if cached is not None:
+            disk_rows = {h: row for row, h in enumerate(cached[1])}
+        from_disk = [i for i in missing if hashes[i] in disk_rows]
+        missing = [i for i in missing if hashes[i] not in disk_rows]
+        logger.info(
+            f"Reload: reusing {len(reused)} embeddings, {len(from_disk)} from disk cache, encoding {len(missing)}"
+        )
+        
+        new_embeddings = None
+        if missing:
+            new_embeddings = self.embedding_service.encode_normalized(
+                [faqs[i]["question"] for i in missing]
+            )
+        
+        if snapshot.embeddings is not None:
+            dimension = snapshot.embeddings.shape[1]
+        elif from_disk:
+            dimension = cached[0].shape[1]
+        else:
+            dimension = new_embeddings.shape[1]
+        embeddings = np.empty((len(faqs), dimension), dtype=np.float32)
+        if reused:
+            embeddings[reused] = np.asarray(snapshot.embeddings)[[current_rows[hashes[i]] for i in reused]]
+        if from_disk:
+            embeddings[from_disk] = np.asarray(cached[0][[disk_rows[hashes[i]] for i in from_disk]])
+        if missing:
+            embeddings[missing] = new_embeddings
+        return embeddings
+    
+    def memory_bytes(self) -> int:
+        """
+        Perkiraan memory vector index snapshot saat ini (matrix yang di-scan +
+        struktur index; untuk storage terkompresi hanya kode yang resident)
+        """
+        snapshot = self._snapshot
+        if snapshot.embeddings is None:
+            return 0
+        return snapshot.index.memory_bytes()
+    
+    def stats(self) -> Dict[str, any]:
+        """Statistik isi knowledge base dan storage backend"""
+        stats = self.store.stats()
+        stats.update({
+            "faqs": len(self.faqs),
+            "version": self.version,
+            "content_hash": self._snapshot.content_hash,
+            "store_version": self._store_version,
+            "ready": self.is_ready,
+            "memory_mb": round(self.memory_bytes() / (1024 * 1024), 2),
+        })
+        return stats
+    
     def get_all_faqs(self) -> List[Dict[str, str]]:
         """
         Get semua FAQs
@@ -136,9 +693,185 @@ class KnowledgeBase:
         Returns:
             List of all FAQs
         """
-        return self.faqs
+        return list(self._snapshot.faqs)
+
+
+class TenantNotFoundError(LookupError):
+    """Tenant tidak punya FAQ store di TENANT_KB_DIR"""
+
+
+class KnowledgeBaseRegistry:
+    """
+    Registry knowledge base per tenant. Tenant default memakai KB_BACKEND /
+    KB_PATH dan tidak pernah di-evict. Tenant lain punya FAQ store sendiri
+    (tenant_store_path), embedding matrix dan index sendiri, di-load saat
+    pertama kali diakses, dan di-evict LRU jika total memory-nya melebihi
+    TENANT_MEMORY_BUDGET_MB. Semua tenant memakai model embedding_service yang sama.
+    
+    Eviction hanya melepas reference registry: request yang sedang berjalan
+    tetap memakai snapshot-nya sampai selesai.
+    
+    Load tenant baru (baca store, build lexical index) tidak memegang lock
+    registry: request untuk tenant yang sama menunggu lock per tenant,
+    tenant lain tetap dilayani. Dari async code gunakan `get_async`.
+    """
+    
+    def __init__(self, default: KnowledgeBase, memory_budget_mb: Optional[float] = None):
+        """
+        Inisialisasi KnowledgeBaseRegistry
+        
+        Args:
+            default: Knowledge base tenant default
+            memory_budget_mb: Budget memory tenant non-default (default: TENANT_MEMORY_BUDGET_MB)
+        """
+        self.default = default
+        self.memory_budget_mb = (
+            memory_budget_mb if memory_budget_mb is not None else settings.TENANT_MEMORY_BUDGET_MB
+        )
+        self._tenants: "OrderedDict[str, KnowledgeBase]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.loads = 0
+        self.evictions = 0
+        self.requests: Dict[str, int] = {}
+    
+    def _is_default(self, tenant_id: Optional[str]) -> bool:
+        return not tenant_id or tenant_id == settings.DEFAULT_TENANT_ID
+    
+    def get(self, tenant_id: Optional[str] = None) -> KnowledgeBase:
+        """
+        Knowledge base milik tenant (di-load jika belum). Bisa blocking
+        (I/O store) untuk tenant yang belum ter-load.
+        
+        Args:
+            tenant_id: ID tenant (None/kosong/DEFAULT_TENANT_ID = tenant default)
+            
+        Returns:
+            KnowledgeBase
+            
+        Raises:
+            TenantNotFoundError: Tenant tidak dikenal
+        """
+        if self._is_default(tenant_id):
+            return self.default
+        
+        with self._lock:
+            kb = self._tenants.get(tenant_id)
+            if kb is not None:
+                self._record_access(tenant_id, kb)
+                return kb
+            load_lock = self._load_locks.setdefault(tenant_id, threading.Lock())
+        
+        with load_lock:
+            try:
+                with self._lock:
+                    kb = self._tenants.get(tenant_id)
+                if kb is None:
+                    kb = self._load(tenant_id)
+                    with self._lock:
+                        self._tenants[tenant_id] = kb
+                        self.loads += 1
+            finally:
+                with self._lock:
+                    if self._load_locks.get(tenant_id) is load_lock:
+                        del self._load_locks[tenant_id]
+        
+        with self._lock:
+            self._record_access(tenant_id, kb)
+        return kb
+    
+    async def get_async(self, tenant_id: Optional[str] = None) -> KnowledgeBase:
+        """
+        Versi async dari get(): tenant yang belum ter-load di-load di thread
+        pool sehingga event loop tidak menunggu I/O store
+        
+        Args:
+            tenant_id: ID tenant (None/kosong/DEFAULT_TENANT_ID = tenant default)
+            
+        Returns:
+            KnowledgeBase
+            
+        Raises:
+            TenantNotFoundError: Tenant tidak dikenal
+        """
+        if self._is_default(tenant_id) or tenant_id in self._tenants:
+            return self.get(tenant_id)
+        return await asyncio.to_thread(self.get, tenant_id)
+    
+    def _record_access(self, tenant_id: str, kb: KnowledgeBase) -> None:
+        """Update LRU order, counter request dan budget. Dipanggil dengan _lock."""
+        if self._tenants.get(tenant_id) is kb:
+            self._tenants.move_to_end(tenant_id)
+        self.requests[tenant_id] = self.requests.get(tenant_id, 0) + 1
+        # Memory tenant baru terhitung setelah embedding-nya di-build, jadi
+        # budget dicek setiap akses (bukan hanya saat load)
+        self._enforce_budget(keep=tenant_id)
+    
+    def _load(self, tenant_id: str) -> KnowledgeBase:
+        try:
+            path = tenant_store_path(tenant_id)
+        except ValueError:
+            raise TenantNotFoundError(f"Unknown tenant: {tenant_id}")
+        if not os.path.exists(path):
+            raise TenantNotFoundError(f"Unknown tenant: {tenant_id}")
+        
+        store = create_faq_store(settings.TENANT_KB_BACKEND, path, seed=[])
+        return KnowledgeBase(
+            store=store, tenant_id=tenant_id, intent_router=create_tenant_intent_router(tenant_id)
+        )
+    
+    def _enforce_budget(self, keep: str) -> None:
+        """Evict tenant yang paling lama tidak diakses sampai total memory <= budget"""
+        budget = self.memory_budget_mb * 1024 * 1024
+        used = sum(kb.memory_bytes() for kb in self._tenants.values())
+        for tenant_id in list(self._tenants):
+            if used <= budget:
+                break
+            if tenant_id == keep:
+                continue
+            used -= self._tenants.pop(tenant_id).memory_bytes()
+            self.evictions += 1
+            logger.info(f"Evicted knowledge base of tenant {tenant_id} (memory budget {self.memory_budget_mb} MB)")
+    
+    def loaded(self) -> List[KnowledgeBase]:
+        """Tenant default + semua tenant yang sedang ter-load"""
+        with self._lock:
+            return [self.default] + list(self._tenants.values())
+    
+    def reload_all(self) -> int:
+        """
+        Reload semua knowledge base yang ter-load jika store-nya berubah
+        
+        Returns:
+            Jumlah knowledge base yang di-reload
+        """
+        reloaded = 0
+        for kb in self.loaded():
+            try:
+                reloaded += kb.reload()
+            except Exception as e:
+                logger.error(f"Knowledge base reload failed for tenant {kb.tenant_id or 'default'}: {str(e)}")
+        return reloaded
+    
+    def stats(self) -> Dict[str, any]:
+        with self._lock:
+            tenants = list(self._tenants.items())
+            requests = dict(self.requests)
+        used = sum(kb.memory_bytes() for _, kb in tenants)
+        return {
+            "loaded": len(tenants),
+            "memory_mb": round(used / (1024 * 1024), 2),
+            "memory_budget_mb": self.memory_budget_mb,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "tenants": {
+                tenant_id: {**kb.stats(), "requests": requests.get(tenant_id, 0)}
+                for tenant_id, kb in tenants
+            },
+        }
 
 
-# Singleton instance
+# Singleton instances
 knowledge_base = KnowledgeBase()
+knowledge_bases = KnowledgeBaseRegistry(knowledge_base)
 
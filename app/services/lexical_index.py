@@ -0,0 +1,192 @@
+"""
+Lexical Index - BM25 inverted index atas pertanyaan dan jawaban FAQ
+
+Dipakai sebagai:
+- prefilter: kandidat lexical yang murah untuk mengecilkan set dense scoring
+  pada knowledge base besar
+- sinyal fusion: digabung dengan ranking dense via Reciprocal Rank Fusion (RRF)
+"""
+
+from typing import Dict, List, Optional, Tuple
+import copy
+import math
+import re
+import numpy as np
+from app.services.embedding_service import top_k_indices
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Kata fungsi bahasa Indonesia yang tidak membantu retrieval
+STOPWORDS = frozenset({
+    "yang", "dan", "di", "ke", "dari", "itu", "ini", "untuk", "dengan", "atau",
+    "pada", "adalah", "akan", "sudah", "juga", "saya", "anda", "kami", "kita",
+    "aku", "kamu", "ada", "sih", "dong", "deh", "ya", "kah", "lah", "pun", "nya",
+    "the", "a", "an", "of", "to", "is", "and",
+})
+
+# Singkatan / ejaan informal yang umum di chat
+SLANG = {
+    "gimana": "bagaimana", "gmn": "bagaimana", "bgmn": "bagaimana",
+    "dimana": "mana", "dmn": "mana", "kemana": "mana",
+    "gak": "tidak", "nggak": "tidak", "ngga": "tidak", "ga": "tidak", "tdk": "tidak",
+    "yg": "yang", "utk": "untuk", "dgn": "dengan", "brp": "berapa",
+    "kalo": "kalau", "klo": "kalau", "bs": "bisa", "tlp": "telepon", "telp": "telepon",
+}
+
+# Partikel/klitik yang menempel di akhir kata (contoh: "harganya", "bisakah")
+SUFFIXES = ("nya", "lah", "kah", "pun", "ku", "mu")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize text dengan aturan sederhana untuk bahasa Indonesia:
+    lowercase, normalisasi slang, buang partikel di akhir kata, buang stopwords.
+    
+    Args:
+        text: Text to tokenize
+        
+    Returns:
+        List of tokens
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        token = SLANG.get(token, token)
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+                token = token[:-len(suffix)]
+                break
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """BM25 (Okapi) inverted index dengan incremental add"""
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Inisialisasi BM25Index
+        
+        Args:
+            k1: Term frequency saturation
+            b: Length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Tuple[List[int], List[int]]] = {}  # term -> (doc ids, tfs)
+        self.doc_lengths: List[int] = []
+        self._total_length = 0
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lengths_array: Optional[np.ndarray] = None
+    
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+    
+    def add_documents(self, texts: List[str]) -> None:
+        """
+        Tambah dokumen (doc id melanjutkan dokumen terakhir).
+        Posting list lama tidak diubah in-place (diganti list baru), sehingga
+        index hasil copy() yang masih dipakai reader lain tetap konsisten.
+        
+        Args:
+            texts: List of document texts
+        """
+        start = len(self.doc_lengths)
+        new_postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        lengths = []
+        for offset, text in enumerate(texts):
+            counts: Dict[str, int] = {}
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+            
+            for term, tf in counts.items():
+                doc_ids, tfs = new_postings.setdefault(term, ([], []))
+                doc_ids.append(start + offset)
+                tfs.append(tf)
+            lengths.append(sum(counts.values()))
+        
+        for term, (doc_ids, tfs) in new_postings.items():
+            old_ids, old_tfs = self.postings.get(term, ([], []))
+            self.postings[term] = (old_ids + doc_ids, old_tfs + tfs)
+            self._arrays.pop(term, None)
+        
+        self.doc_lengths = self.doc_lengths + lengths
+        self._total_length += sum(lengths)
+        self._lengths_array = None
+    
+    def copy(self) -> "BM25Index":
+        """Shallow copy (posting list dipakai bersama sampai salah satu di-add)"""
+        clone = copy.copy(self)
+        clone.postings = dict(self.postings)
+        clone._arrays = dict(self._arrays)
+        return clone
+    
+    def _posting_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Posting list sebagai numpy array (di-cache sampai term berubah)"""
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            doc_ids, tfs = self.postings[term]
+            arrays = (np.asarray(doc_ids, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            self._arrays[term] = arrays
+        return arrays
+    
+    def search(self, query: str, top_k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cari dokumen dengan skor BM25 tertinggi (hanya dokumen yang match)
+        
+        Args:
+            query: Query text
+            top_k: Number of top results
+            
+        Returns:
+            Tuple (doc ids, scores), descending
+        """
+        n = len(self.doc_lengths)
+        terms = [term for term in set(tokenize(query)) if term in self.postings]
+        if n == 0 or not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        
+        avg_length = self._total_length / n
+        if self._lengths_array is None:
+            self._lengths_array = np.asarray(self.doc_lengths, dtype=np.float32)
+        doc_lengths = self._lengths_array
+        all_ids = []
+        all_scores = []
+        
+        for term in terms:
+            doc_ids, tfs = self._posting_arrays(term)
+            df = len(doc_ids)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc_ids] / avg_length)
+            all_ids.append(doc_ids)
+            all_scores.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+        
+        doc_ids = np.concatenate(all_ids)
+        unique_ids, inverse = np.unique(doc_ids, return_inverse=True)
+        scores = np.bincount(
+            inverse, weights=np.concatenate(all_scores), minlength=len(unique_ids)
+        ).astype(np.float32)
+        
+        best = top_k_indices(scores, top_k)
+        return unique_ids[best], scores[best]
+    
+    def stats(self) -> Dict[str, int]:
+        return {"documents": len(self), "terms": len(self.postings)}
+
+
+def reciprocal_rank_fusion(rankings: List[np.ndarray], k: int = 60) -> List[int]:
+    """
+    Gabungkan beberapa ranking dengan Reciprocal Rank Fusion
+    
+    Args:
+        rankings: List of doc id arrays (masing-masing descending)
+        k: Konstanta RRF (default 60)
+        
+    Returns:
+        List of doc ids, descending by fused score
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking.tolist()):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused, key=lambda doc_id: (-fused[doc_id], doc_id))
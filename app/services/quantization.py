@@ -0,0 +1,228 @@
+"""
+Quantization - Representasi embedding terkompresi dengan scoring langsung
+di bentuk terkompresi
+
+- float16: 2 byte/dim, hampir lossless
+- int8   : symmetric scalar quantization per vector (1 byte/dim + 1 scale)
+- pq     : product quantization, `m` sub-vector x 256 centroid (1 byte/sub-vector),
+           scoring dengan asymmetric distance lookup table (query tetap float32)
+
+Codec hanya menyimpan parameter (codebook PQ). Kode per vector disimpan
+sebagai tuple array yang row-aligned, sehingga append cukup concatenate dan
+kode lama tidak pernah diubah in-place (aman untuk snapshot copy-on-write).
+"""
+
+from typing import Optional, Tuple
+import copy
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Codes = Tuple[np.ndarray, ...]
+
+# Jumlah row yang di-decompress per langkah scoring (membatasi memory sementara)
+SCORE_CHUNK_SIZE = 16384
+
+
+class EmbeddingCodec:
+    """Base class codec embedding"""
+    
+    kind = "base"
+    
+    def fit(self, vectors: np.ndarray) -> None:
+        """Latih parameter codec (hanya PQ yang perlu)"""
+    
+    @property
+    def is_fitted(self) -> bool:
+        return True
+    
+    def needs_refit(self, size: int) -> bool:
+        """True jika codec sebaiknya dilatih ulang untuk index sebesar `size`"""
+        return False
+    
+    def unfitted_copy(self) -> "EmbeddingCodec":
+        """Codec baru dengan parameter yang sama (codec lama tetap dipakai snapshot lama)"""
+        return copy.copy(self)
+    
+    def encode(self, vectors: np.ndarray) -> Codes:
+        """
+        Kompres vector
+        
+        Args:
+            vectors: Normalized float32 matrix (N x dim)
+            
+        Returns:
+            Tuple of row-aligned code arrays
+        """
+        raise NotImplementedError
+    
+    def score(self, codes: Codes, queries: np.ndarray) -> np.ndarray:
+        """
+        Approximate inner product query x vector terkompresi
+        
+        Args:
+            codes: Hasil encode
+            queries: Normalized float32 query matrix (Q x dim)
+            
+        Returns:
+            Score matrix (Q x N) float32
+        """
+        n = len(codes[0])
+        prepared = self._prepare(queries)
+        scores = np.empty((len(queries), n), dtype=np.float32)
+        for start in range(0, n, SCORE_CHUNK_SIZE):
+            chunk = tuple(code[start:start + SCORE_CHUNK_SIZE] for code in codes)
+            scores[:, start:start + SCORE_CHUNK_SIZE] = self._score_chunk(chunk, prepared)
+        return scores
+    
+    def _prepare(self, queries: np.ndarray) -> np.ndarray:
+        """Bentuk query yang dipakai _score_chunk (default: query apa adanya)"""
+        return queries
+    
+    def _score_chunk(self, codes: Codes, queries: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+    
+    def nbytes(self, codes: Optional[Codes]) -> int:
+        """Ukuran kode (+ codebook) dalam byte"""
+        return 0 if codes is None else sum(code.nbytes for code in codes)
+
+
+class Float16Codec(EmbeddingCodec):
+    kind = "float16"
+    
+    def encode(self, vectors: np.ndarray) -> Codes:
+        return (np.asarray(vectors, dtype=np.float16),)
+    
+    def _score_chunk(self, codes: Codes, queries: np.ndarray) -> np.ndarray:
+        return queries @ codes[0].astype(np.float32).T
+
+
+class Int8Codec(EmbeddingCodec):
+    """x ~= code * scale, scale = max|x| / 127 per vector"""
+    
+    kind = "int8"
+    
+    def encode(self, vectors: np.ndarray) -> Codes:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, np.newaxis]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    
+    def _score_chunk(self, codes: Codes, queries: np.ndarray) -> np.ndarray:
+        values, scales = codes
+        return (queries @ values.astype(np.float32).T) * scales
+
+
+class PQCodec(EmbeddingCodec):
+    """Product quantization: dim dibagi `m` sub-vector, masing-masing 256 centroid"""
+    
+    kind = "pq"
+    
+    def __init__(self, m: int = 48, n_centroids: int = 256, iterations: int = 10, seed: int = 0):
+        """
+        Inisialisasi PQCodec
+        
+        Args:
+            m: Jumlah sub-vector (dim harus habis dibagi m)
+            n_centroids: Centroid per sub-vector (maks 256, kode uint8)
+            iterations: Iterasi k-means saat fit
+            seed: Random seed
+        """
+        self.m = m
+        self.n_centroids = min(n_centroids, 256)
+        self.iterations = iterations
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None  # (m x n_centroids x sub_dim)
+        self._trained_size = 0
+    
+    @property
+    def is_fitted(self) -> bool:
+        return self.codebooks is not None
+    
+    def needs_refit(self, size: int) -> bool:
+        # Codebook dari KB kecil (< n_centroids vector) dilatih ulang saat KB tumbuh 2x
+        return self._trained_size < self.n_centroids and size >= 2 * self._trained_size
+    
+    def unfitted_copy(self) -> "PQCodec":
+        return PQCodec(self.m, self.n_centroids, self.iterations, self.seed)
+    
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """(N x dim) -> (m x N x sub_dim)"""
+        n, dim = vectors.shape
+        if dim % self.m:
+            raise ValueError(f"Embedding dimension {dim} is not divisible by PQ m={self.m}")
+        return np.ascontiguousarray(
+            np.asarray(vectors, dtype=np.float32).reshape(n, self.m, dim // self.m).transpose(1, 0, 2)
+        )
+    
+    def fit(self, vectors: np.ndarray) -> None:
+        rng = np.random.default_rng(self.seed)
+        n = len(vectors)
+        sample = np.asarray(vectors[rng.choice(n, min(n, self.n_centroids * 32), replace=False)])
+        k = min(self.n_centroids, len(sample))
+        
+        codebooks = []
+        for sub in self._split(sample):
+            centroids = sub[rng.choice(len(sub), k, replace=False)].copy()
+            for _ in range(self.iterations):
+                assignments = self._nearest(sub, centroids)
+                counts = np.bincount(assignments, minlength=k)
+                sums = np.stack([
+                    np.bincount(assignments, weights=column, minlength=k) for column in sub.T
+                ], axis=1)
+                filled = counts > 0
+                centroids[filled] = sums[filled] / counts[filled, np.newaxis]
+            codebooks.append(centroids)
+        self.codebooks = np.stack(codebooks).astype(np.float32)
+        self._trained_size = n
+        logger.info(f"Trained PQ codebooks: m={self.m}, k={k}, {len(sample)} samples")
+    
+    @staticmethod
+    def _nearest(sub: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        # argmin ||x - c||^2 = argmax (x.c - ||c||^2 / 2)
+        return np.argmax(sub @ centroids.T - 0.5 * (centroids ** 2).sum(axis=1), axis=1)
+    
+    def encode(self, vectors: np.ndarray) -> Codes:
+        subs = self._split(vectors)
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for i, (sub, centroids) in enumerate(zip(subs, self.codebooks)):
+            codes[:, i] = self._nearest(sub, centroids)
+        return (codes,)
+    
+    def _prepare(self, queries: np.ndarray) -> np.ndarray:
+        # Lookup table per query: inner product sub-query x setiap centroid (Q x m x k)
+        return np.matmul(self._split(queries), self.codebooks.transpose(0, 2, 1)).transpose(1, 0, 2)
+    
+    def _score_chunk(self, codes: Codes, tables: np.ndarray) -> np.ndarray:
+        columns = np.ascontiguousarray(codes[0].T)  # (m x chunk), take per kolom lebih cepat
+        scores = np.zeros((len(tables), columns.shape[1]), dtype=np.float32)
+        for row, table in zip(scores, tables):
+            for sub_table, column in zip(table, columns):
+                row += sub_table.take(column)
+        return scores
+    
+    def nbytes(self, codes: Optional[Codes]) -> int:
+        codebook_bytes = 0 if self.codebooks is None else self.codebooks.nbytes
+        return super().nbytes(codes) + codebook_bytes
+
+
+def create_codec(kind: str, pq_subvectors: int = 48) -> EmbeddingCodec:
+    """
+    Factory codec
+    
+    Args:
+        kind: "float16", "int8" atau "pq"
+        pq_subvectors: Jumlah sub-vector untuk PQ
+        
+    Returns:
+        EmbeddingCodec instance
+    """
+    if kind == "float16":
+        return Float16Codec()
+    if kind == "int8":
+        return Int8Codec()
+    if kind == "pq":
+        return PQCodec(m=pq_subvectors)
+    raise ValueError(f"Unknown embedding storage: {kind}")
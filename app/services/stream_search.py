@@ -0,0 +1,181 @@
+"""
+Stream Search - Similarity search atas candidate list yang sangat besar (NDJSON)
+
+Candidate di-encode per chunk dan hanya top-k terbaik yang disimpan (heap),
+sehingga memory O(chunk + k) berapapun jumlah candidate.
+"""
+
+from typing import AsyncIterator, List, Optional, Tuple
+import heapq
+import json
+import logging
+import numpy as np
+from app.services.embedding_service import EmbeddingService, top_k_indices
+from app.services.inference_executor import InferenceExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class NDJSONError(ValueError):
+    """Baris NDJSON tidak valid"""
+
+
+class NDJSONLineTooLongError(NDJSONError):
+    """Baris NDJSON melebihi batas panjang"""
+
+
+async def iter_ndjson_texts(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    Parse stream NDJSON menjadi candidate texts.
+    Setiap baris berupa JSON string ("teks") atau object ({"text": "teks"}).
+    Hanya bytes yang baru diterima yang di-scan mencari newline; potongan baris
+    yang belum selesai disimpan sebagai list dan di-join sekali per baris.
+    
+    Args:
+        chunks: Async iterator of raw bytes (misal request.stream())
+        max_line_bytes: Panjang maksimal satu baris (None = tanpa batas)
+        
+    Yields:
+        Candidate text
+        
+    Raises:
+        NDJSONError: Jika ada baris yang tidak valid
+        NDJSONLineTooLongError: Jika ada baris yang melebihi max_line_bytes
+    """
+    pending: List[bytes] = []  # Potongan baris terakhir yang belum ada newline-nya
+    pending_bytes = 0
+    line_number = 0
+    
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            line_number += 1
+            _check_line_length(pending_bytes + end - start, max_line_bytes, line_number)
+            line = b"".join(pending) + chunk[start:end] if pending else chunk[start:end]
+            pending, pending_bytes = [], 0
+            start = end + 1
+            text = _parse_line(line, line_number)
+            if text is not None:
+                yield text
+        
+        if start < len(chunk):
+            pending.append(chunk[start:])
+            pending_bytes += len(chunk) - start
+            _check_line_length(pending_bytes, max_line_bytes, line_number + 1)
+    
+    line = b"".join(pending)
+    if line.strip():
+        text = _parse_line(line, line_number + 1)
+        if text is not None:
+            yield text
+
+
+def _check_line_length(length: int, max_line_bytes: Optional[int], line_number: int) -> None:
+    if max_line_bytes is not None and length > max_line_bytes:
+        raise NDJSONLineTooLongError(f"Baris {line_number}: melebihi {max_line_bytes} bytes")
+
+
+def _parse_line(line: bytes, line_number: int):
+    line = line.strip()
+    if not line:
+        return None
+    
+    try:
+        value = json.loads(line)
+    except ValueError:
+        raise NDJSONError(f"Baris {line_number}: JSON tidak valid")
+    
+    if isinstance(value, dict):
+        value = value.get("text")
+    if not isinstance(value, str):
+        raise NDJSONError(f"Baris {line_number}: harus string atau object dengan field 'text'")
+    return value
+
+
+class StreamingTopK:
+    """Menyimpan top-k (score, index, text) secara incremental per chunk"""
+    
+    def __init__(self, top_k: int):
+        self.top_k = top_k
+        self._heap: List[Tuple[float, int, str]] = []  # min-heap by (score, -index)
+        self.processed = 0
+        self.cached = 0
+    
+    def add_chunk(self, texts: List[str], scores: np.ndarray) -> None:
+        """
+        Masukkan satu chunk hasil scoring
+        
+        Args:
+            texts: Candidate texts di chunk ini
+            scores: Similarity scores untuk texts
+        """
+        offset = self.processed
+        for idx in top_k_indices(scores, self.top_k):
+            item = (float(scores[idx]), -(offset + int(idx)), texts[idx])
+            if len(self._heap) < self.top_k:
+                heapq.heappush(self._heap, item)
+            elif item > self._heap[0]:
+                heapq.heapreplace(self._heap, item)
+        self.processed += len(texts)
+    
+    def results(self) -> List[Tuple[int, str, float]]:
+        """
+        Returns:
+            List of (index, text, similarity_score), descending
+        """
+        return [
+            (-neg_index, text, score)
+            for score, neg_index, text in sorted(self._heap, reverse=True)
+        ]
+
+
+async def stream_similarity_search(
+    query_embedding: np.ndarray,
+    texts: AsyncIterator[str],
+    service: EmbeddingService,
+    executor: InferenceExecutor,
+    top_k: int = 3,
+    chunk_size: int = 256
+) -> StreamingTopK:
+    """
+    Encode candidates per chunk dan simpan top-k terbaik
+    
+    Args:
+        query_embedding: Normalized query embedding
+        texts: Async iterator of candidate texts
+        service: EmbeddingService untuk encode candidates
+        executor: Executor tempat encode dijalankan
+        top_k: Number of top results
+        chunk_size: Jumlah candidate per encode
+        
+    Returns:
+        StreamingTopK berisi hasil dan jumlah candidate yang diproses
+    """
+    top = StreamingTopK(top_k)
+    chunk: List[str] = []
+    
+    async def flush(chunk: List[str]) -> None:
+        embeddings, stats = await executor.run(service.encode_candidates, chunk)
+        top.add_chunk(chunk, embeddings @ query_embedding)
+        top.cached += stats["cached"]
+    
+    async for text in texts:
+        chunk.append(text)
+        if len(chunk) >= chunk_size:
+            await flush(chunk)
+            chunk = []
+    
+    if chunk:
+        await flush(chunk)
+    
+    logger.info(
+        f"Streamed similarity search over {top.processed} candidates "
+        f"({top.cached} from cache)"
+    )
+    return top
@@ -0,0 +1,422 @@
+"""
+Vector Index - Pluggable index untuk nearest-neighbour search atas embedding FAQ
+
+- FlatIndex: exact brute-force (default), satu matrix product atas semua vector
+- IVFIndex: approximate (inverted file), pure NumPy. Vector dikelompokkan ke
+  `nlist` cluster dengan spherical k-means, query hanya men-scan `nprobe`
+  cluster terdekat. nprobe lebih besar = recall lebih tinggi, latency lebih besar.
+- QuantizedIndex: exact scan atas embedding terkompresi (float16, int8, PQ),
+  optional re-rank kandidat teratas dengan vector float32 yang disimpan di
+  disk (memmap), sehingga yang resident di memory hanya kode terkompresi.
+
+Semua vector diasumsikan L2-normalized, sehingga score = cosine similarity.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import copy
+import logging
+import numpy as np
+from app.core.config import settings
+from app.services.embedding_service import top_k_indices
+from app.services.embedding_store import spill_to_memmap
+from app.services.quantization import Codes, EmbeddingCodec, create_codec
+
+logger = logging.getLogger(__name__)
+
+SearchResult = Tuple[np.ndarray, np.ndarray]  # (indices, scores), descending
+
+
+class VectorIndex:
+    """Base class index. Row ke-i dari `vectors` = FAQ index ke-i."""
+    
+    kind = "base"
+    
+    def __init__(self):
+        self.vectors: Optional[np.ndarray] = None
+    
+    def __len__(self) -> int:
+        return 0 if self.vectors is None else len(self.vectors)
+    
+    def build(self, vectors: np.ndarray) -> None:
+        """
+        Build index dari awal
+        
+        Args:
+            vectors: Normalized embedding matrix (N x dim)
+        """
+        raise NotImplementedError
+    
+    def add(self, vectors: np.ndarray, combined: Optional[np.ndarray] = None) -> None:
+        """
+        Tambah vector baru (incremental), index-nya melanjutkan row terakhir
+        
+        Args:
+            vectors: Normalized embedding matrix (M x dim)
+            combined: Matrix lengkap (vector lama + `vectors`) yang sudah ada,
+                misalnya memmap embedding store; dipakai langsung tanpa vstack
+        """
+        raise NotImplementedError
+    
+    def copy(self) -> "VectorIndex":
+        """
+        Copy index untuk copy-on-write: add() pada copy tidak mengubah index asli
+        (array vector tidak pernah diubah in-place, cukup shallow copy)
+        
+        Returns:
+            VectorIndex baru
+        """
+        return copy.copy(self)
+    
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[SearchResult]:
+        """
+        Cari top_k vector paling mirip untuk setiap query
+        
+        Args:
+            query_embeddings: Normalized query matrix (Q x dim)
+            top_k: Number of top results per query
+            
+        Returns:
+            List (per query) of (indices, scores)
+        """
+        raise NotImplementedError
+    
+    def memory_bytes(self) -> int:
+        """Memory yang dipakai index: matrix yang di-scan setiap query + struktur index"""
+        return 0 if self.vectors is None else self.vectors.nbytes
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "size": len(self)}
+
+
+class FlatIndex(VectorIndex):
+    """Exact search: scoring semua vector"""
+    
+    kind = "flat"
+    
+    def build(self, vectors: np.ndarray) -> None:
+        self.vectors = vectors
+    
+    def add(self, vectors: np.ndarray, combined: Optional[np.ndarray] = None) -> None:
+        if combined is not None:
+            self.vectors = combined
+        elif self.vectors is None:
+            self.vectors = vectors
+        else:
+            self.vectors = np.vstack([self.vectors, vectors])
+    
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[SearchResult]:
+        if self.vectors is None or len(self.vectors) == 0:
+            return [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+                    for _ in range(len(query_embeddings))]
+        
+        scores = query_embeddings @ self.vectors.T
+        indices = top_k_indices(scores, top_k)
+        return [
+            (row_indices, row_scores[row_indices])
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+
+
+class IVFIndex(FlatIndex):
+    """
+    Approximate search dengan inverted file lists.
+    Selama jumlah vector < min_train_size, index berperilaku seperti FlatIndex.
+    """
+    
+    kind = "ivf"
+    
+    def __init__(
+        self,
+        nlist: int = 0,
+        nprobe: int = 8,
+        min_train_size: int = 1000,
+        kmeans_iterations: int = 10,
+        seed: int = 0
+    ):
+        """
+        Inisialisasi IVFIndex
+        
+        Args:
+            nlist: Jumlah cluster (0 = otomatis, ~4 * sqrt(N))
+            nprobe: Jumlah cluster yang di-scan per query
+            min_train_size: Minimal jumlah vector sebelum clustering dipakai
+            kmeans_iterations: Iterasi k-means saat training
+            seed: Random seed (hasil training reproducible)
+        """
+        super().__init__()
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        self._trained_size = 0
+    
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+    
+    def build(self, vectors: np.ndarray) -> None:
+        self.vectors = vectors
+        self.centroids = None
+        self.lists = []
+        if len(vectors) >= self.min_train_size:
+            self._train()
+    
+    def add(self, vectors: np.ndarray, combined: Optional[np.ndarray] = None) -> None:
+        start = len(self)
+        super().add(vectors, combined)
+        
+        if not self.is_trained:
+            if len(self) >= self.min_train_size:
+                self._train()
+            return
+        
+        # Retrain jika index sudah tumbuh 2x sejak training terakhir
+        if len(self) >= 2 * self._trained_size:
+            self._train()
+            return
+        
+        assignments = self._assign(vectors)
+        for list_id in np.unique(assignments):
+            new_ids = start + np.flatnonzero(assignments == list_id)
+            self.lists[list_id] = np.concatenate([self.lists[list_id], new_ids])
+    
+    def copy(self) -> "IVFIndex":
+        clone = super().copy()
+        clone.lists = list(self.lists)
+        return clone
+    
+    def _assign(self, vectors: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+        """Assign setiap vector ke centroid terdekat (diproses per chunk)"""
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return assignments
+    
+    def _train(self) -> None:
+        """Spherical k-means atas sample vector, lalu isi inverted lists"""
+        n = len(self.vectors)
+        nlist = self.nlist or max(1, int(4 * np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+        
+        sample_size = min(n, nlist * 64)
+        sample = np.asarray(self.vectors[rng.choice(n, sample_size, replace=False)])
+        self.centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        
+        for _ in range(self.kmeans_iterations):
+            assignments = self._assign(sample)
+            counts = np.bincount(assignments, minlength=nlist)
+            grouped = sample[np.argsort(assignments, kind="stable")]
+            bounds = np.concatenate([[0], np.cumsum(counts)])
+            sums = np.zeros_like(self.centroids)
+            for list_id in np.flatnonzero(counts):
+                sums[list_id] = grouped[bounds[list_id]:bounds[list_id + 1]].sum(axis=0)
+            
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.centroids = (sums / norms).astype(np.float32)
+        
+        assignments = self._assign(self.vectors)
+        order = np.argsort(assignments, kind="stable")
+        boundaries = np.searchsorted(assignments[order], np.arange(nlist + 1))
+        self.lists = [order[boundaries[i]:boundaries[i + 1]] for i in range(nlist)]
+        self._trained_size = n
+        logger.info(f"Trained IVF index: {n} vectors, {nlist} lists")
+    
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[SearchResult]:
+        if not self.is_trained:
+            return super().search(query_embeddings, top_k)
+        
+        nprobe = min(self.nprobe, len(self.lists))
+        probes = top_k_indices(query_embeddings @ self.centroids.T, nprobe)
+        
+        results = []
+        for query_embedding, query_probes in zip(query_embeddings, probes):
+            ids = np.concatenate([self.lists[list_id] for list_id in query_probes])
+            if len(ids) == 0:
+                results.append((ids, np.empty(0, dtype=np.float32)))
+                continue
+            
+            ids = np.sort(ids)
+            scores = self.vectors[ids] @ query_embedding
+            best = top_k_indices(scores, top_k)
+            results.append((ids[best], scores[best]))
+        return results
+    
+    def memory_bytes(self) -> int:
+        if not self.is_trained:
+            return super().memory_bytes()
+        return super().memory_bytes() + self.centroids.nbytes + sum(ids.nbytes for ids in self.lists)
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "trained": self.is_trained,
+            "nlist": len(self.lists),
+            "nprobe": self.nprobe,
+        })
+        return stats
+
+
+class QuantizedIndex(FlatIndex):
+    """
+    Brute-force scan atas kode terkompresi. `vectors` (float32) hanya dipakai
+    untuk re-rank dan selalu berupa memmap: matrix dari embedding cache, atau
+    file sementara jika cache tidak aktif. Scan utama hanya menyentuh kode
+    terkompresi dan hanya row kandidat re-rank yang di-page-in.
+    """
+    
+    def __init__(self, codec: EmbeddingCodec, rerank_factor: int = 4):
+        """
+        Inisialisasi QuantizedIndex
+        
+        Args:
+            codec: Codec kompresi (lihat app.services.quantization)
+            rerank_factor: Kandidat = top_k * rerank_factor di-rescore dengan
+                float32 (0 = tanpa re-rank, score approximate)
+        """
+        super().__init__()
+        self.codec = codec
+        self.rerank_factor = rerank_factor
+        self.codes: Optional[Codes] = None
+    
+    @property
+    def kind(self) -> str:
+        return f"flat-{self.codec.kind}"
+    
+    def build(self, vectors: np.ndarray) -> None:
+        self.vectors = vectors
+        if len(vectors) and not self.codec.is_fitted:
+            self.codec.fit(vectors)
+        self.codes = self.codec.encode(vectors)
+        self._spill_vectors()
+    
+    def add(self, vectors: np.ndarray, combined: Optional[np.ndarray] = None) -> None:
+        if self.codes is None:
+            self.build(vectors if combined is None else combined)
+            return
+        
+        super().add(vectors, combined)
+        if self.codec.needs_refit(len(self)):
+            self.codec = self.codec.unfitted_copy()
+            self.build(self.vectors)
+            return
+        
+        new_codes = self.codec.encode(vectors)
+        self.codes = tuple(np.concatenate([old, new]) for old, new in zip(self.codes, new_codes))
+        self._spill_vectors()
+    
+    @property
+    def has_resident_vectors(self) -> bool:
+        """True jika matrix float32 ada di heap (bukan memmap)"""
+        return self.vectors is not None and len(self.vectors) > 0 and not isinstance(self.vectors, np.memmap)
+    
+    def _spill_vectors(self) -> None:
+        """Pindahkan matrix float32 ke memmap agar tidak resident di heap"""
+        if self.has_resident_vectors:
+            self.vectors = spill_to_memmap(self.vectors)
+    
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[SearchResult]:
+        if self.codes is None or len(self) == 0:
+            return super().search(query_embeddings, top_k)
+        
+        scores = self.codec.score(self.codes, query_embeddings)
+        depth = top_k * self.rerank_factor if self.rerank_factor > 0 else top_k
+        candidates = top_k_indices(scores, depth)
+        
+        results = []
+        for query_embedding, row_scores, ids in zip(query_embeddings, scores, candidates):
+            if self.rerank_factor <= 0:
+                results.append((ids, row_scores[ids]))
+                continue
+            
+            ids = np.sort(ids)
+            exact = self.vectors[ids] @ query_embedding
+            best = top_k_indices(exact, top_k)
+            results.append((ids[best], exact[best]))
+        return results
+    
+    def memory_bytes(self) -> int:
+        resident = self.vectors.nbytes if self.has_resident_vectors else 0
+        return self.codec.nbytes(self.codes) + resident
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        full_bytes = 0 if self.vectors is None else len(self) * self.vectors.shape[1] * 4
+        code_bytes = self.codec.nbytes(self.codes)
+        stats.update({
+            "rerank_factor": self.rerank_factor,
+            "float32_mb": round(full_bytes / (1024 * 1024), 2),
+            "float32_backing": "memory" if self.has_resident_vectors else "memmap",
+            "compressed_mb": round(code_bytes / (1024 * 1024), 2),
+            "resident_mb": round(self.memory_bytes() / (1024 * 1024), 2),
+            "compression_ratio": round(full_bytes / code_bytes, 2) if code_bytes else None,
+        })
+        return stats
+
+
+def create_index(kind: Optional[str] = None, storage: Optional[str] = None) -> VectorIndex:
+    """
+    Factory index berdasarkan Settings (VECTOR_INDEX, EMBEDDING_STORAGE)
+    
+    Args:
+        kind: "flat" atau "ivf" (default: settings.VECTOR_INDEX)
+        storage: "float32", "float16", "int8" atau "pq" (default: settings.EMBEDDING_STORAGE)
+        
+    Returns:
+        VectorIndex instance
+    """
+    kind = kind or settings.VECTOR_INDEX
+    storage = storage or settings.EMBEDDING_STORAGE
+    if kind == "flat":
+        if storage != "float32":
+            return QuantizedIndex(
+                create_codec(storage, settings.PQ_SUBVECTORS),
+                rerank_factor=settings.QUANTIZED_RERANK_FACTOR
+            )
+        return FlatIndex()
+    if kind == "ivf":
+        if storage != "float32":
+            logger.warning(f"EMBEDDING_STORAGE={storage} is only supported by the flat index, IVF uses float32")
+        return IVFIndex(
+            nlist=settings.IVF_NLIST,
+            nprobe=settings.IVF_NPROBE,
+            min_train_size=settings.IVF_MIN_TRAIN_SIZE
+        )
+    raise ValueError(f"Unknown vector index: {kind}")
+
+
+def recall_at_k(
+    index: VectorIndex,
+    query_embeddings: np.ndarray,
+    top_k: int = 10
+) -> float:
+    """
+    Recall@k index dibandingkan exact flat search atas vector yang sama
+    
+    Args:
+        index: Index yang diuji
+        query_embeddings: Normalized query matrix (Q x dim)
+        top_k: k
+        
+    Returns:
+        Rata-rata fraksi hasil exact top-k yang juga ditemukan index (0-1)
+    """
+    exact = FlatIndex()
+    exact.build(index.vectors)
+    
+    exact_results = exact.search(query_embeddings, top_k)
+    approx_results = index.search(query_embeddings, top_k)
+    
+    recalls = [
+        len(set(exact_ids.tolist()) & set(approx_ids.tolist())) / max(1, len(exact_ids))
+        for (exact_ids, _), (approx_ids, _) in zip(exact_results, approx_results)
+    ]
+    return float(np.mean(recalls)) if recalls else 1.0
@@ -0,0 +1,126 @@
+"""
+Warmup - Load model dan build index FAQ di luar event loop,
+serta polling storage knowledge base untuk reload incremental
+"""
+
+from typing import Optional
+import asyncio
+import gc
+import logging
+import os
+from app.core.config import settings
+from app.core.lifecycle import StageTimer, lifecycle
+from app.core.memory import format_memory, process_memory
+from app.services.embedding_service import embedding_service
+from app.services.inference_executor import InferenceOverloadedError, inference_executor
+from app.services.knowledge_base import KnowledgeBase, knowledge_base, knowledge_bases
+
+logger = logging.getLogger(__name__)
+
+
+def is_ready() -> bool:
+    """True jika model sudah di-load dan embedding matrix FAQ sudah siap"""
+    return embedding_service.is_loaded and knowledge_base.is_ready
+
+
+async def warmup() -> None:
+    """
+    Background warmup: load model lalu build embedding matrix FAQ.
+    Dijalankan dari startup hook di main.py, request tetap dilayani selama warmup.
+    """
+    lifecycle.warmup_state = "running"
+    try:
+        with StageTimer(lifecycle, "model_load"):
+            await inference_executor.run(embedding_service.load_model)
+        with StageTimer(lifecycle, "kb_index"):
+            await inference_executor.run(knowledge_base.warmup)
+        lifecycle.warmup_state = "done"
+        logger.info(f"Warmup completed, worker {os.getpid()} memory: {format_memory(process_memory())}")
+    except Exception as e:
+        lifecycle.warmup_state = "failed"
+        lifecycle.warmup_error = str(e)
+        logger.error(f"Warmup failed: {str(e)}")
+
+
+def preload_for_fork() -> None:
+    """
+    Load model dan embedding matrix FAQ di master process sebelum worker
+    di-fork (serve.py / gunicorn --preload). Weight model dan matrix
+    (memmap dari EMBEDDING_CACHE_DIR, atau array biasa) lalu di-share
+    copy-on-write oleh semua worker karena tidak pernah ditulis.
+    
+    Torch dibatasi 1 thread selama preload supaya thread pool OpenMP tidak
+    dibuat sebelum fork (tidak fork-safe); worker mengatur ulang jumlah
+    thread di configure_worker_threads().
+    """
+    if embedding_service.backend != "torch":
+        # Session ONNX Runtime membuat thread pool sendiri dan tidak fork-safe
+        logger.warning(
+            f"Backend {embedding_service.backend} is not fork-safe, "
+            "model will be loaded in each worker"
+        )
+        return
+    
+    import torch
+    torch.set_num_threads(1)
+    
+    with StageTimer(lifecycle, "model_load"):
+        embedding_service.load_model()
+    with StageTimer(lifecycle, "kb_index"):
+        knowledge_base.warmup()
+    
+    # Objek yang sudah ada dipindah ke permanent generation: GC worker tidak
+    # menyentuh header-nya, sehingga page-nya tidak ter-copy setelah fork
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded before fork, master memory: {format_memory(process_memory())}")
+
+
+def configure_worker_threads(workers: int) -> None:
+    """
+    Set jumlah thread torch per worker setelah fork agar total thread
+    semua worker tidak melebihi jumlah CPU
+    
+    Args:
+        workers: Jumlah worker process
+    """
+    if embedding_service.backend != "torch":
+        return
+    
+    import torch
+    threads = settings.TORCH_THREADS_PER_WORKER or max(1, (os.cpu_count() or 1) // workers)
+    torch.set_num_threads(threads)
+
+
+async def ensure_knowledge_base_ready(kb: Optional[KnowledgeBase] = None) -> None:
+    """
+    Pastikan embedding matrix FAQ sudah di-build. Jika belum (misal serverless
+    tanpa warmup, atau tenant yang baru di-load), build dijalankan di inference
+    executor, bukan di event loop.
+    
+    Args:
+        kb: Knowledge base tenant (default: tenant default)
+    """
+    kb = kb or knowledge_base
+    if not kb.is_ready:
+        await inference_executor.run(kb.warmup)
+
+
+async def watch_knowledge_base(interval: float) -> None:
+    """
+    Poll versi FAQ store dan reload knowledge base (tenant default dan semua
+    tenant yang ter-load) jika berubah, sehingga edit dari worker/proses lain
+    ikut terbaca. Reload berjalan di inference
+    executor; jika executor sedang penuh, dicoba lagi di polling berikutnya.
+    
+    Args:
+        interval: Detik antar polling
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await inference_executor.run(knowledge_bases.reload_all)
+        except InferenceOverloadedError:
+            logger.debug("Inference executor busy, knowledge base reload postponed")
+        except Exception as e:
+            logger.error(f"Knowledge base reload failed: {str(e)}")
@@ -0,0 +1,3 @@
+"""
+Benchmarks - Script pengukuran performa (jalankan dengan python -m benchmarks.<nama>)
+"""
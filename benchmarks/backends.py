@@ -0,0 +1,83 @@
+"""
+Benchmark embedding backend: torch vs onnx vs onnx-int8
+
+- Parity: cosine score query x FAQ setiap backend dibandingkan dengan torch
+  (max abs diff dan top-1 agreement)
+- Performa: latency single query dan throughput batch per backend
+
+Usage:
+    python -m benchmarks.backends --backends torch onnx onnx-int8
+"""
+
+import argparse
+import numpy as np
+from app.services.embedding_service import EmbeddingService
+from app.services.knowledge_base import KnowledgeBase
+from benchmarks.common import measure, setup_logging, summarize, write_results
+
+QUERIES = [
+    "Bagaimana cara menghubungi Kanvas Store?",
+    "kanvas itu apa sih",
+    "apakah ada supplier dari luar negeri",
+    "lokasi kantor kanvas dimana",
+    "gimana cara daftar jadi mitra",
+    "pengiriman barang bisa dilacak?",
+    "apa bedanya S2B2C dengan B2B",
+    "layanan apa saja yang tersedia",
+]
+
+
+def score_matrix(service: EmbeddingService, queries, questions) -> np.ndarray:
+    return service.encode_normalized(queries) @ service.encode_normalized(questions).T
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default="benchmarks/results/backends.json")
+    args = parser.parse_args()
+    setup_logging()
+    
+    questions = KnowledgeBase().get_all_questions()
+    batch = (QUERIES * (args.batch_size // len(QUERIES) + 1))[:args.batch_size]
+    
+    results = {}
+    reference = None
+    for backend in args.backends:
+        service = EmbeddingService(backend=backend)
+        service.load_model()
+        scores = score_matrix(service, QUERIES, questions)
+        
+        result = {
+            "load_time_s": service.load_time,
+            "single_query": summarize(measure(lambda: service.encode(QUERIES[:1]), args.repeat)),
+            "batch": summarize(
+                measure(lambda: service.encode(batch), max(3, args.repeat // 4)),
+                items_per_call=len(batch)
+            ),
+        }
+        if reference is None:
+            reference = scores
+        else:
+            result["parity"] = {
+                "reference": args.backends[0],
+                "max_abs_score_diff": float(np.abs(scores - reference).max()),
+                "top1_agreement": float(
+                    (scores.argmax(axis=1) == reference.argmax(axis=1)).mean()
+                ),
+            }
+        results[backend] = result
+        
+        print(f"[{backend}] single p50 {result['single_query']['p50_ms']:.2f} ms, "
+              f"batch throughput {result['batch']['throughput']:.1f} texts/s")
+        if "parity" in result:
+            print(f"[{backend}] max |score diff| {result['parity']['max_abs_score_diff']:.4f}, "
+                  f"top-1 agreement {result['parity']['top1_agreement']:.2%}")
+    
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Helper bersama untuk benchmark: timing, percentiles, dan output JSON
+"""
+
+from typing import Any, Callable, Dict, List
+import json
+import logging
+import os
+import platform
+import time
+import numpy as np
+from app.core.config import settings
+from app.core.memory import process_memory
+from app.services.embedding_service import embedding_service
+
+
+def measure(fn: Callable[[], object], repeat: int = 20, warmup: int = 2) -> List[float]:
+    """
+    Jalankan fn berulang kali dan catat latency tiap panggilan
+    
+    Args:
+        fn: Function tanpa argumen yang diukur
+        repeat: Jumlah pengukuran
+        warmup: Jumlah panggilan awal yang tidak dihitung
+        
+    Returns:
+        List of latency dalam detik
+    """
+    for _ in range(warmup):
+        fn()
+    
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def summarize(latencies: List[float], items_per_call: int = 1) -> Dict[str, float]:
+    """
+    Ringkas latency menjadi p50/p95/p99 (ms) dan throughput (items/detik)
+    
+    Args:
+        latencies: List of latency dalam detik
+        items_per_call: Jumlah item yang diproses per panggilan
+        
+    Returns:
+        Dict statistik
+    """
+    values = np.asarray(latencies)
+    return {
+        "calls": int(len(values)),
+        "p50_ms": float(np.percentile(values, 50) * 1000),
+        "p95_ms": float(np.percentile(values, 95) * 1000),
+        "p99_ms": float(np.percentile(values, 99) * 1000),
+        "mean_ms": float(values.mean() * 1000),
+        "throughput": float(items_per_call * len(values) / values.sum()) if values.sum() else 0.0,
+    }
+
+
+def write_results(path: str, results: Dict) -> None:
+    """
+    Simpan hasil benchmark sebagai JSON
+    
+    Args:
+        path: Output file
+        results: Hasil benchmark
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {path}")
+
+
+def synthetic_faqs(n: int, seed: int = 0, unique: bool = True) -> List[Dict[str, str]]:
+    """
+    Buat FAQ sintetis (kombinasi topik/aksi/objek) untuk benchmark skala besar
+    
+    Args:
+        n: Jumlah FAQ
+        seed: Random seed
+        unique: Tambahkan token unik "kode<i>" per FAQ (teks unik untuk encode/dedupe).
+            Jangan dipakai untuk benchmark lexical: token unik membuat BM25
+            selalu menemukan FAQ yang tepat.
+            
+    Returns:
+        List of {"question", "answer"}
+    """
+    rng = np.random.default_rng(seed)
+    actions = ["cara", "syarat", "biaya", "waktu", "lokasi", "jadwal", "prosedur", "batas"]
+    objects = ["pengiriman", "pembayaran", "pendaftaran", "retur", "supplier", "mitra",
+               "invoice", "produk", "gudang", "promo", "akun", "pesanan"]
+    faqs = []
+    for i in range(n):
+        action, obj = rng.choice(actions), rng.choice(objects)
+        code = f" kode{i}" if unique else ""
+        faqs.append({
+            "question": f"Bagaimana {action} {obj}{code}?",
+            "answer": f"Informasi {action} {obj} untuk item{code} tersedia di dashboard.",
+        })
+    return faqs
+
+
+def random_embeddings(n: int, dim: int = 384, seed: int = 0) -> np.ndarray:
+    """
+    Embedding acak L2-normalized (pengganti encode untuk KB sintetis besar)
+    
+    Args:
+        n: Jumlah vector
+        dim: Dimensi (default dimensi all-MiniLM-L6-v2)
+        seed: Random seed
+        
+    Returns:
+        float32 matrix (n x dim)
+    """
+    embeddings = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings
+
+
+def environment() -> Dict[str, Any]:
+    """Metadata run (untuk membandingkan hasil dengan baseline yang sebanding)"""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": embedding_service.model_id,
+        "vector_index": settings.VECTOR_INDEX,
+        "memory": process_memory(),
+    }
+
+
+def setup_logging() -> None:
+    """Kurangi log per-request agar output benchmark terbaca"""
+    logging.basicConfig(level=logging.WARNING)
@@ -0,0 +1,132 @@
+"""
+Bandingkan hasil benchmark dengan baseline tersimpan dan tandai regresi
+
+Setiap ringkasan latency (hasil summarize) dibandingkan per metric:
+- p50_ms / p95_ms / p99_ms: regresi jika naik lebih dari --tolerance
+- throughput: regresi jika turun lebih dari --tolerance
+
+Baseline default: benchmarks/baselines/<nama file hasil>. Simpan baseline
+baru dari hasil run yang sudah diverifikasi dengan --save-baseline. Baseline
+hanya sebanding jika dijalankan di mesin dan konfigurasi yang sama
+(lihat bagian "environment" di file hasil), karena itu tidak di-commit;
+tanpa baseline script keluar dengan exit code 2 dan command untuk membuatnya.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/micro.json
+    python -m benchmarks.compare benchmarks/results/load.json --tolerance 0.2
+    python -m benchmarks.compare benchmarks/results/load.json --save-baseline
+"""
+
+from typing import Dict, Iterator, List, Tuple
+import argparse
+import json
+import os
+import shutil
+import sys
+
+BASELINE_DIR = "benchmarks/baselines"
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms")
+HIGHER_IS_BETTER = ("throughput",)
+
+
+def iter_summaries(results: Dict, path: str = "") -> Iterator[Tuple[str, Dict]]:
+    """Cari semua ringkasan latency (dict dengan p50_ms) secara rekursif"""
+    for key, value in results.items():
+        if key == "environment" or not isinstance(value, dict):
+            continue
+        child = f"{path}.{key}" if path else key
+        if "p50_ms" in value:
+            yield child, value
+        else:
+            yield from iter_summaries(value, child)
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """
+    Bandingkan hasil dengan baseline
+    
+    Args:
+        results: Hasil benchmark saat ini
+        baseline: Hasil benchmark baseline
+        tolerance: Perubahan relatif yang masih diterima (0.15 = 15%)
+        
+    Returns:
+        List of row perbandingan (path, metric, baseline, current, change, regression)
+    """
+    baseline_summaries = dict(iter_summaries(baseline))
+    rows = []
+    for path, summary in iter_summaries(results):
+        reference = baseline_summaries.get(path)
+        if reference is None:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if metric not in summary or not reference.get(metric):
+                continue
+            change = (summary[metric] - reference[metric]) / reference[metric]
+            regression = change > tolerance if metric in LOWER_IS_BETTER else change < -tolerance
+            rows.append({
+                "path": path,
+                "metric": metric,
+                "baseline": reference[metric],
+                "current": summary[metric],
+                "change": change,
+                "regression": regression,
+            })
+    return rows
+
+
+def _producer_command(results_path: str) -> str:
+    """Command benchmark yang menghasilkan file hasil (dari nama file)"""
+    name = os.path.splitext(os.path.basename(results_path))[0]
+    if os.path.exists(os.path.join(os.path.dirname(__file__), f"{name}.py")):
+        return f"python -m benchmarks.{name} --output {results_path}"
+    return "python -m benchmarks.<benchmark> --output " + results_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("results", help="File hasil benchmark (JSON)")
+    parser.add_argument("--baseline", default=None, help="File baseline (default: benchmarks/baselines/<nama>)")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--save-baseline", action="store_true", help="Simpan hasil sebagai baseline baru")
+    args = parser.parse_args()
+    
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, os.path.basename(args.results))
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        shutil.copyfile(args.results, baseline_path)
+        print(f"Baseline saved to {baseline_path}")
+        return
+    
+    if not os.path.exists(args.results):
+        print(f"No results at {args.results}. Create them with: {_producer_command(args.results)}", file=sys.stderr)
+        sys.exit(2)
+    if not os.path.exists(baseline_path):
+        print(
+            f"No baseline at {baseline_path} (baselines are machine-specific and not committed).\n"
+            f"Create one on this machine from a verified run:\n"
+            f"  {_producer_command(args.results)}\n"
+            f"  python -m benchmarks.compare {args.results} --save-baseline",
+            file=sys.stderr
+        )
+        sys.exit(2)
+    
+    with open(args.results, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    
+    rows = compare(results, baseline, args.tolerance)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        print(f"{row['path']:<40} {row['metric']:<11} {row['baseline']:>12.3f} -> "
+              f"{row['current']:>12.3f} ({row['change']:+.1%}) {flag}")
+    
+    regressions = [row for row in rows if row["regression"]]
+    print(f"{len(rows)} metrics compared, {len(regressions)} regressions (tolerance {args.tolerance:.0%})")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
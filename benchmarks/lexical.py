@@ -0,0 +1,82 @@
+"""
+Benchmark hybrid retrieval: BM25 prefilter vs full dense scan
+
+Memakai FAQ sintetis (tanpa token unik per FAQ, sehingga banyak FAQ punya
+term yang sama seperti KB sungguhan) dan embedding acak (normalized), jadi
+yang diukur hanya biaya retrieval, bukan model. Prefilter dijalankan lewat
+KnowledgeBaseSnapshot (HYBRID_MODE=prefilter), termasuk fallback ke dense scan:
+- Latency dense scan penuh vs prefilter
+- Fallback rate (query yang BM25-nya tidak cukup selektif)
+- Top-1 agreement prefilter terhadap dense scan penuh (dengan embedding acak,
+  hanya top-1 yang bermakna; tetangga lainnya random)
+
+Usage:
+    python -m benchmarks.lexical --sizes 1000 10000 100000
+"""
+
+import argparse
+import numpy as np
+from app.core.config import settings
+from app.services.knowledge_base import KnowledgeBaseSnapshot, build_lexical_index
+from app.services.vector_index import FlatIndex
+from benchmarks.common import measure, setup_logging, summarize, synthetic_faqs, write_results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--prefilter-k", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--output", default="benchmarks/results/lexical.json")
+    args = parser.parse_args()
+    setup_logging()
+    rng = np.random.default_rng(0)
+    
+    settings.LEXICAL_PREFILTER_K = args.prefilter_k
+    settings.LEXICAL_PREFILTER_MIN_SIZE = 0
+    
+    results = {}
+    for size in args.sizes:
+        faqs = synthetic_faqs(size, unique=False)
+        embeddings = rng.standard_normal((size, args.dim)).astype(np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        index = FlatIndex()
+        index.build(embeddings)
+        snapshot = KnowledgeBaseSnapshot(tuple(faqs), build_lexical_index(faqs), embeddings, "random", index)
+        
+        # Query = pertanyaan FAQ yang ada, embedding = embedding FAQ + noise
+        picks = rng.choice(size, args.queries, replace=False)
+        queries = [faqs[i]["question"] for i in picks]
+        query_embeddings = embeddings[picks] + 0.1 * rng.standard_normal((args.queries, args.dim))
+        query_embeddings = (query_embeddings / np.linalg.norm(query_embeddings, axis=1, keepdims=True)).astype(np.float32)
+        
+        def run(mode: str) -> list:
+            settings.HYBRID_MODE = mode
+            return [
+                snapshot.search(query_embeddings[i:i + 1], args.top_k, [queries[i]])[0]
+                for i in range(args.queries)
+            ]
+        
+        dense_top1 = [hits[0][0] for hits in run("off")]
+        prefilter_top1 = [hits[0][0] for hits in run("prefilter")]
+        agreement = np.mean([a == b for a, b in zip(dense_top1, prefilter_top1)])
+        fallback = np.mean([snapshot.prefilter_candidates(query) is None for query in queries])
+        results[str(size)] = {
+            "dense": summarize(measure(lambda: run("off"), 5), args.queries),
+            "prefilter": summarize(measure(lambda: run("prefilter"), 5), args.queries),
+            "fallback_rate": float(fallback),
+            "top1_agreement": float(agreement),
+        }
+        print(
+            f"{size:>7} FAQs  dense p50={results[str(size)]['dense']['p50_ms']:.1f}ms  "
+            f"prefilter p50={results[str(size)]['prefilter']['p50_ms']:.1f}ms  "
+            f"fallback={fallback:.2f}  top1 agreement={agreement:.2f}"
+        )
+    
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
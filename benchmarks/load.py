@@ -0,0 +1,128 @@
+"""
+Load test in-process: request dikirim langsung ke ASGI app (tanpa network)
+dengan N client concurrent, sehingga hasilnya reproducible dan hanya
+mengukur server (routing, validasi, batching, inference, serialisasi).
+
+Workload:
+- chat: POST /chat/ dengan campuran query (sebagian berulang -> response cache)
+- chat_batch: POST /chat/batch dengan --batch-size item per request
+- faqs_search: GET /similarity/faqs/search
+
+Usage:
+    python -m benchmarks.load --workloads chat chat_batch faqs_search --concurrency 16
+    python -m benchmarks.compare benchmarks/results/load.json
+"""
+
+import argparse
+import asyncio
+import time
+import httpx
+from app.core.memory import process_memory
+from benchmarks.common import environment, setup_logging, summarize, write_results
+
+QUERIES = [
+    "Apa itu Kanvas Store?",
+    "kanvas itu apa sih",
+    "apakah ada supplier dari luar negeri",
+    "lokasi kantor kanvas dimana",
+    "gimana cara daftar jadi mitra",
+    "pengiriman barang bisa dilacak?",
+    "apa bedanya S2B2C dengan B2B",
+    "layanan apa saja yang tersedia",
+    "hingga kapan proses verifikasi supplier?",
+    "display produk di toko dibantu juga?",
+]
+
+
+def make_request(workload: str, i: int, unique: bool, batch_size: int) -> dict:
+    """Argumen httpx request ke-i untuk workload"""
+    query = QUERIES[i % len(QUERIES)]
+    if unique:
+        # Query unik -> selalu cache miss (ukur jalur model)
+        query = f"{query} #{i}"
+    
+    if workload == "chat":
+        return {"method": "POST", "url": "/chat/", "json": {"message": query}}
+    if workload == "chat_batch":
+        items = [{"message": f"{QUERIES[(i + j) % len(QUERIES)]} #{i}-{j}" if unique
+                  else QUERIES[(i + j) % len(QUERIES)]} for j in range(batch_size)]
+        return {"method": "POST", "url": "/chat/batch", "json": {"items": items}}
+    if workload == "faqs_search":
+        return {"method": "GET", "url": "/similarity/faqs/search", "params": {"query": query, "top_k": 3}}
+    raise ValueError(f"Unknown workload: {workload}")
+
+
+async def run_workload(
+    client: httpx.AsyncClient,
+    workload: str,
+    requests: int,
+    concurrency: int,
+    unique: bool,
+    batch_size: int
+) -> dict:
+    """Jalankan `requests` request dengan `concurrency` client paralel"""
+    latencies = []
+    statuses = {}
+    counter = iter(range(requests))
+    
+    async def client_loop() -> None:
+        for i in counter:
+            started = time.perf_counter()
+            response = await client.request(**make_request(workload, i, unique, batch_size))
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*[client_loop() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    
+    items_per_request = batch_size if workload == "chat_batch" else 1
+    result = summarize(latencies, items_per_call=items_per_request)
+    # Throughput wall-clock (dengan concurrency), bukan 1 / mean latency
+    result["throughput"] = requests * items_per_request / elapsed
+    result["statuses"] = {str(code): count for code, count in statuses.items()}
+    result["memory"] = process_memory()
+    return result
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from main import app
+    from app.services.warmup import warmup
+    
+    # ASGITransport tidak menjalankan lifespan, warmup dijalankan langsung
+    await warmup()
+    
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for workload in args.workloads:
+            requests = max(1, args.requests // args.batch_size) if workload == "chat_batch" else args.requests
+            await run_workload(client, workload, min(requests, args.concurrency), args.concurrency,
+                               args.unique, args.batch_size)
+            result = await run_workload(client, workload, requests, args.concurrency,
+                                        args.unique, args.batch_size)
+            results[workload] = result
+            print(f"[{workload}] p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+                  f"p99 {result['p99_ms']:.2f} ms, {result['throughput']:.1f} items/s, "
+                  f"RSS {result['memory'].get('rss_mb')} MB, statuses {result['statuses']}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="+", default=["chat", "chat_batch", "faqs_search"])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--unique", action="store_true", help="Query unik per request (tanpa cache hit)")
+    parser.add_argument("--output", default="benchmarks/results/load.json")
+    args = parser.parse_args()
+    setup_logging()
+    
+    results = asyncio.run(run(args))
+    results["environment"] = environment()
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Micro-benchmark hot path: encode, find_most_similar, dan lookup knowledge base
+
+- encode: single query dan batch
+- find_most_similar: query vs N candidate (ad-hoc, lewat candidate cache)
+- knowledge base: search_by_embedding + ambil jawaban untuk KB sintetis
+  100 -> 100k FAQ. Embedding FAQ sintetis memakai vector acak (tanpa encode)
+  kecuali --encode-kb, sehingga yang diukur adalah scoring/lookup.
+
+Usage:
+    python -m benchmarks.micro --sizes 100 1000 10000 100000
+    python -m benchmarks.compare benchmarks/results/micro.json
+"""
+
+import argparse
+import itertools
+from app.core.memory import process_memory
+from app.services.embedding_service import embedding_service
+from app.services.knowledge_base import KnowledgeBaseSnapshot, build_lexical_index
+from app.services.vector_index import create_index
+from benchmarks.backends import QUERIES
+from benchmarks.common import (
+    environment, measure, random_embeddings, setup_logging, summarize,
+    synthetic_faqs, write_results
+)
+
+
+def bench_encode(repeat: int, batch_size: int) -> dict:
+    batch = (QUERIES * (batch_size // len(QUERIES) + 1))[:batch_size]
+    return {
+        "single": summarize(measure(lambda: embedding_service.encode(QUERIES[:1]), repeat)),
+        f"batch_{batch_size}": summarize(
+            measure(lambda: embedding_service.encode(batch), max(3, repeat // 4)),
+            items_per_call=batch_size
+        ),
+    }
+
+
+def bench_find_most_similar(repeat: int, candidates: int) -> dict:
+    texts = [faq["question"] for faq in synthetic_faqs(candidates)]
+    # Panggilan pertama meng-encode candidate; selanjutnya dari candidate cache
+    cold = summarize(measure(
+        lambda: embedding_service.find_most_similar(QUERIES[0], texts, top_k=5), 1, warmup=0
+    ))
+    warm = summarize(measure(
+        lambda: embedding_service.find_most_similar(QUERIES[0], texts, top_k=5), repeat
+    ))
+    return {"candidates": candidates, "cold": cold, "warm": warm}
+
+
+def bench_knowledge_base(size: int, repeat: int, encode_kb: bool) -> dict:
+    faqs = synthetic_faqs(size)
+    if encode_kb:
+        embeddings = embedding_service.encode_normalized([faq["question"] for faq in faqs])
+    else:
+        embeddings = random_embeddings(size, embedding_service.encode_single("dim").shape[0])
+    
+    index = create_index()
+    index.build(embeddings)
+    snapshot = KnowledgeBaseSnapshot(
+        faqs, build_lexical_index(faqs), embeddings, embedding_service.model_id, index
+    )
+    queries = embeddings[:64] + 0.05 * random_embeddings(64, embeddings.shape[1], seed=1)
+    queries = embedding_service.normalize(queries)
+    texts = [faq["question"] for faq in faqs[:64]]
+    
+    def lookup(i: int) -> None:
+        results = snapshot.search(queries[i:i + 1], 3, [texts[i]])[0]
+        snapshot.get_answer(results[0][0])
+    
+    counter = itertools.count()
+    return {
+        "size": size,
+        "lookup": summarize(measure(lambda: lookup(next(counter) % 64), repeat)),
+        "batch_search_64": summarize(
+            measure(lambda: snapshot.search(queries, 3, texts), max(3, repeat // 4)),
+            items_per_call=64
+        ),
+        "memory": process_memory(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--encode-kb", action="store_true", help="Encode FAQ sintetis dengan model")
+    parser.add_argument("--output", default="benchmarks/results/micro.json")
+    args = parser.parse_args()
+    setup_logging()
+    
+    embedding_service.load_model()
+    results = {
+        "encode": bench_encode(args.repeat, args.batch_size),
+        "find_most_similar": bench_find_most_similar(args.repeat, args.candidates),
+        "knowledge_base": {},
+    }
+    print(f"encode single p50 {results['encode']['single']['p50_ms']:.2f} ms")
+    
+    for size in args.sizes:
+        result = bench_knowledge_base(size, args.repeat, args.encode_kb)
+        results["knowledge_base"][str(size)] = result
+        print(f"KB {size:>7}: lookup p50 {result['lookup']['p50_ms']:.3f} ms, "
+              f"p99 {result['lookup']['p99_ms']:.3f} ms, RSS {result['memory'].get('rss_mb')} MB")
+    
+    results["environment"] = environment()
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
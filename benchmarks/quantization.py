@@ -0,0 +1,86 @@
+"""
+Benchmark kompresi embedding: float32 vs float16 / int8 / PQ
+
+Untuk setiap storage dan ukuran KB:
+- Ukuran matrix float32 vs kode terkompresi (MB, compression ratio)
+- Memory resident index (kode + codebook; float32 re-rank berupa memmap)
+- Recall@k terhadap exact float32 search, tanpa dan dengan re-rank float32
+- Latency search per query
+
+Default memakai embedding acak (worst case untuk kuantisasi: tidak ada
+struktur cluster); --encode-kb memakai embedding model atas FAQ sintetis.
+
+Usage:
+    python -m benchmarks.quantization --sizes 10000 100000 --rerank 0 4 16
+"""
+
+import argparse
+import numpy as np
+from app.services.embedding_service import embedding_service
+from app.services.vector_index import create_index, recall_at_k
+from benchmarks.common import (
+    environment, measure, random_embeddings, setup_logging, summarize, synthetic_faqs, write_results
+)
+
+STORAGES = ["float32", "float16", "int8", "pq"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000])
+    parser.add_argument("--storages", nargs="+", default=STORAGES, choices=STORAGES)
+    parser.add_argument("--rerank", nargs="+", type=int, default=[0, 4], help="Rerank factor (0 = off)")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--encode-kb", action="store_true", help="Encode FAQ sintetis dengan model")
+    parser.add_argument("--output", default="benchmarks/results/quantization.json")
+    args = parser.parse_args()
+    setup_logging()
+    rng = np.random.default_rng(0)
+    
+    results = {}
+    for size in args.sizes:
+        if args.encode_kb:
+            embedding_service.load_model()
+            embeddings = embedding_service.encode_normalized([faq["question"] for faq in synthetic_faqs(size)])
+        else:
+            embeddings = random_embeddings(size)
+        
+        # Query = embedding FAQ + noise (ada jawaban yang jelas, tetangga lain mirip)
+        picks = rng.choice(size, min(args.queries, size), replace=False)
+        queries = embeddings[picks] + 0.1 * rng.standard_normal((len(picks), embeddings.shape[1]))
+        queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+        
+        results[str(size)] = {}
+        for storage in args.storages:
+            index = create_index("flat", storage)
+            index.build(embeddings)
+            for rerank in (args.rerank if storage != "float32" else [0]):
+                if storage != "float32":
+                    index.rerank_factor = rerank
+                name = storage if storage == "float32" else f"{storage}-rerank{rerank}"
+                stats = index.stats()
+                result = {
+                    "float32_mb": round(embeddings.nbytes / (1024 * 1024), 2),
+                    "compressed_mb": stats.get("compressed_mb", round(embeddings.nbytes / (1024 * 1024), 2)),
+                    "compression_ratio": stats.get("compression_ratio", 1.0),
+                    "resident_mb": round(index.memory_bytes() / (1024 * 1024), 2),
+                    f"recall@{args.top_k}": recall_at_k(index, queries, args.top_k),
+                    "search": summarize(
+                        measure(lambda: index.search(queries, args.top_k), args.repeat, warmup=1), len(queries)
+                    ),
+                }
+                results[str(size)][name] = result
+                print(
+                    f"{size:>7} {name:<16} {result['compressed_mb']:>8.2f} MB "
+                    f"(x{result['compression_ratio']}, resident {result['resident_mb']:.2f} MB)  recall@{args.top_k}={result[f'recall@{args.top_k}']:.3f}  "
+                    f"{result['search']['mean_ms'] / len(queries):.3f} ms/query"
+                )
+    
+    results["environment"] = environment()
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,23 @@
 Main Application Entry Point
 """
 
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
 
 from app.core.config import settings
-from app.api.routes import health, chat, similarity
+from app.core.lifecycle import lifecycle
+from app.core.metrics import MetricsMiddleware
+from app.api.routes import health, chat, similarity, knowledge_base
+from app.services.faq_ingest import ingest_manager
+from app.services.history_store import history_writer
+from app.services.inference_executor import inference_executor
+from app.services.warmup import warmup, watch_knowledge_base
 
 # Setup logging
 logging.basicConfig(
@@ -33,21 +44,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency & in-flight metrics (lihat GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(health.router)
 app.include_router(chat.router)
 app.include_router(similarity.router)
+app.include_router(knowledge_base.router)
+
+lifecycle.record("import", time.perf_counter() - _import_started)
+_warmup_task = None
+_reload_task = None
 
 @app.on_event("startup")
 async def startup_event():
     """Event yang dijalankan saat aplikasi startup"""
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"Debug mode: {settings.DEBUG}")
+    
+    # Load model di background agar /health bisa langsung menjawab
+    global _warmup_task
+    if settings.WARMUP_ON_STARTUP:
+        _warmup_task = asyncio.create_task(warmup())
+    
+    # Worker lain bisa mengubah FAQ store (default dan tenant), poll versinya secara berkala
+    global _reload_task
+    if settings.KB_RELOAD_INTERVAL > 0:
+        _reload_task = asyncio.create_task(watch_knowledge_base(settings.KB_RELOAD_INTERVAL))
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Event yang dijalankan saat aplikasi shutdown"""
     logger.info(f"Shutting down {settings.APP_NAME}")
+    if _reload_task is not None:
+        _reload_task.cancel()
+    await history_writer.close()
+    ingest_manager.shutdown()
+    inference_executor.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
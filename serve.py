@@ -0,0 +1,85 @@
+"""
+Multi-process launcher untuk production
+
+Model dan embedding matrix FAQ di-load sekali di master process, lalu worker
+di-fork (gunicorn preload + UvicornWorker). Weight model dan matrix di-share
+copy-on-write oleh semua worker, jadi menambah worker tidak mengalikan memory
+model. Memory (RSS/PSS) master dan tiap worker dicatat di log saat startup.
+
+Usage:
+    python serve.py --workers 4 --bind 0.0.0.0:8000
+"""
+
+import argparse
+import logging
+import os
+
+# Tokenizer Rust membuat thread pool sendiri; matikan sebelum fork
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+from gunicorn.app.base import BaseApplication
+
+from app.core.config import settings
+from app.core.memory import format_memory, process_memory
+from app.services.warmup import configure_worker_threads, preload_for_fork
+
+logger = logging.getLogger(__name__)
+
+
+def when_ready(server) -> None:
+    """Master: app sudah di-import (preload), load model + embedding sebelum fork"""
+    preload_for_fork()
+
+
+def post_fork(server, worker) -> None:
+    """Worker: atur thread torch sesuai jumlah worker"""
+    configure_worker_threads(server.cfg.workers)
+
+
+def post_worker_init(worker) -> None:
+    logger.info(f"Worker {worker.pid} started, memory: {format_memory(process_memory())}")
+
+
+class PreloadedApplication(BaseApplication):
+    """Gunicorn application dengan konfigurasi dari argumen CLI"""
+    
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+    
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+    
+    def load(self):
+        from main import app
+        return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=settings.SERVE_WORKERS)
+    parser.add_argument("--bind", default=f"{settings.HOST}:{settings.PORT}")
+    parser.add_argument("--timeout", type=int, default=120)
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=settings.LOG_LEVEL,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    
+    PreloadedApplication({
+        "bind": args.bind,
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "timeout": args.timeout,
+        "loglevel": settings.LOG_LEVEL.lower(),
+        "when_ready": when_ready,
+        "post_fork": post_fork,
+        "post_worker_init": post_worker_init,
+    }).run()
+
+
+if __name__ == "__main__":
+    main()